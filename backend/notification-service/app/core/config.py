@@ -25,3 +25,6 @@ JWT_ALGORITHM: str = os.getenv(
     "JWT_ALGORITHM",
     "HS256",
 )
+
+# Verified-token LRU size; 0 verifies every connection from scratch.
+JWT_CACHE_MAX_ENTRIES: int = int(os.getenv("JWT_CACHE_MAX_ENTRIES", "10000"))
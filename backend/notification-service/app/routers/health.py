@@ -11,6 +11,7 @@ from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.models.connection import Notification
+from app.routers import websocket
 from app.schemas.notification import (
     HealthResponse,
     MetricsResponse,
@@ -74,6 +75,7 @@ async def metrics() -> MetricsResponse:
         unique_students=get_unique_students(),
         notifications_persisted=get_notifications_persisted(),
         failed_deliveries=get_failed_deliveries(),
+        **websocket.verified_tokens.stats(),
     )
 
 
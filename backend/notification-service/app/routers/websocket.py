@@ -3,24 +3,32 @@ import logging
 import jwt
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
 
-from app.core.config import JWT_SECRET, JWT_ALGORITHM
+from app.core.config import JWT_CACHE_MAX_ENTRIES, JWT_SECRET, JWT_ALGORITHM
 from app.services.notifier import connect, disconnect
+from app.services.token_cache import VerifiedTokenCache
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["websocket"])
 
+# Reconnecting clients skip the signature check (see services/token_cache.py).
+verified_tokens = VerifiedTokenCache(JWT_CACHE_MAX_ENTRIES)
+
 
 def _validate_ws_token(token: str | None) -> str | None:
     """Decode a JWT and return the student_id, or None on failure."""
     if not token:
         return None
+    cached = verified_tokens.get(token)
+    if cached is not None:
+        return cached.get("student_id")
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload.get("student_id")
     except jwt.PyJWTError as exc:
         logger.warning("WS token validation failed: %s", exc)
         return None
+    verified_tokens.put(token, payload)
+    return payload.get("student_id")
 
 
 @router.websocket("/ws")
@@ -40,3 +40,6 @@ class MetricsResponse(BaseModel):
     unique_students: Annotated[int, Field(ge=0)]
     notifications_persisted: Annotated[int, Field(ge=0)]
     failed_deliveries: Annotated[int, Field(ge=0)]
+    jwt_cache_hits: Annotated[int, Field(ge=0)] = 0
+    jwt_cache_misses: Annotated[int, Field(ge=0)] = 0
+    jwt_cache_size: Annotated[int, Field(ge=0)] = 0
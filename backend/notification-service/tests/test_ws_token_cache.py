@@ -0,0 +1,44 @@
+"""Verified-JWT cache in front of the WebSocket token check."""
+import time
+from unittest.mock import patch
+
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers import websocket
+from app.services.token_cache import VerifiedTokenCache
+
+_JWT_SECRET = "test-secret-for-pytest-at-least-32-bytes!"
+
+
+@pytest.fixture()
+def cache():
+    fresh = VerifiedTokenCache(max_entries=16)
+    with patch.object(websocket, "verified_tokens", fresh):
+        yield fresh
+
+
+def test_reconnecting_client_is_verified_once(cache):
+    token = jwt.encode({"student_id": "stu-ws", "exp": int(time.time()) + 600}, _JWT_SECRET, algorithm="HS256")
+    with patch("app.routers.websocket.jwt.decode", wraps=jwt.decode) as decode:
+        assert websocket._validate_ws_token(token) == "stu-ws"
+        assert websocket._validate_ws_token(token) == "stu-ws"
+    assert decode.call_count == 1
+
+    with TestClient(app) as client:
+        body = client.get("/metrics").json()
+    assert body["jwt_cache_hits"] == 1
+    assert body["jwt_cache_misses"] == 1
+
+
+def test_tokens_without_exp_are_accepted_but_not_cached(cache):
+    token = jwt.encode({"student_id": "stu-ws"}, _JWT_SECRET, algorithm="HS256")
+    assert websocket._validate_ws_token(token) == "stu-ws"
+    assert cache.stats()["jwt_cache_size"] == 0
+
+
+def test_bad_token_is_rejected(cache):
+    assert websocket._validate_ws_token("not.a.jwt") is None
+    assert cache.stats()["jwt_cache_size"] == 0
@@ -9,6 +9,8 @@ class Settings(BaseSettings):
 
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
+    # Verified-token LRU size; 0 verifies every request from scratch.
+    JWT_CACHE_MAX_ENTRIES: int = 10_000
     REDIS_HOST: str
     REDIS_PORT: int
     REDIS_PASSWORD: str = ""
@@ -18,6 +20,119 @@ class Settings(BaseSettings):
     GATEWAY_TIMEOUT_MS: int
     TESTING: bool = False
 
+    # Retention for the gateway's bookkeeping tables (see services/retention.py).
+    OUTBOX_RETENTION_HOURS: float = 24.0
+    IDEMPOTENCY_RETENTION_HOURS: float = 48.0
+    # A RECEIVED claim not updated for this long belongs to a request that
+    # died mid-flight; a retry of the same order_id may take it over.  A live
+    # request older than half of it renews its claim before persisting, and
+    # gives up if it was taken over, so the persist step itself must finish
+    # within the other half.
+    IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS: float = 30.0
+    RETENTION_INTERVAL_SECONDS: float = 60.0
+    RETENTION_BATCH_SIZE: int = 500
+
+    # In-process L1 in front of the Redis stock cache (see services/cache.py).
+    # Set STOCK_L1_TTL_SECONDS=0 to disable it.
+    STOCK_L1_TTL_SECONDS: float = 1.0
+    STOCK_L1_MAX_ENTRIES: int = 256
+    # Bulk refresh of every item's cached level (see services/stock_refresh.py),
+    # at startup and then about every STOCK_CACHE_REFRESH_SECONDS; keep it
+    # well under the 60 s cache TTL.  0 disables it.
+    STOCK_CACHE_REFRESH_SECONDS: float = 15.0
+
+    # Stock-service circuit breaker (sliding window, see services/order.py).
+    BREAKER_WINDOW_SECONDS: float = 10.0
+    BREAKER_MIN_CALLS: int = 10
+    BREAKER_FAILURE_RATE: float = 0.5
+    BREAKER_SLOW_CALL_MS: float = 1000.0
+    BREAKER_SLOW_CALL_RATE: float = 0.8
+    BREAKER_RECOVERY_SECONDS: float = 30.0
+    BREAKER_HALF_OPEN_PROBES: int = 3
+    # Share trips with the other gateway replicas through Redis.
+    BREAKER_SHARED: bool = False
+
+    # Adaptive (AIMD) limit on in-flight stock-service calls; calls over the
+    # limit are shed with a 503 instead of waiting for GATEWAY_TIMEOUT_MS.
+    STOCK_CONCURRENCY_INITIAL: int = 50
+    STOCK_CONCURRENCY_MIN: int = 4
+    STOCK_CONCURRENCY_MAX: int = 200
+
+    # Hedged deductions (see services/order.py).  A deduction still unanswered
+    # after the recent STOCK_HEDGE_PERCENTILE latency is sent a second time,
+    # and the first answer wins.  Hedges are paid from a budget that every
+    # deduction tops up by STOCK_HEDGE_BUDGET_RATIO, so they add at most that
+    # fraction of extra load.  Set the ratio to 0 to disable hedging.
+    STOCK_HEDGE_BUDGET_RATIO: float = 0.1
+    STOCK_HEDGE_PERCENTILE: float = 95.0
+    STOCK_HEDGE_MIN_DELAY_MS: float = 10.0
+
+    # Connection pool for stock-service calls (see services/order.py).
+    # GATEWAY_TIMEOUT_MS is the read/write timeout; connecting and waiting for
+    # a free pooled connection have their own, shorter budgets.  A request
+    # that cannot get a connection within STOCK_POOL_TIMEOUT_MS is shed (503).
+    STOCK_POOL_MAX_CONNECTIONS: int = 100
+    STOCK_POOL_MAX_KEEPALIVE: int = 20
+    STOCK_POOL_KEEPALIVE_EXPIRY_SECONDS: float = 5.0
+    STOCK_CONNECT_TIMEOUT_MS: int = 1000
+    STOCK_POOL_TIMEOUT_MS: int = 500
+    # Multiplex calls over HTTP/2 connections.  Needs the ``h2`` package, and
+    # is only negotiated when STOCK_SERVICE_URL is https:// (ALPN); plain
+    # http:// URLs stay on HTTP/1.1.
+    STOCK_HTTP2: bool = False
+
+    # Virtual waiting room (see services/waiting_room.py).  Once a replica has
+    # ADMISSION_MAX_IN_FLIGHT orders in progress, new orders get a queue ticket
+    # and ticket holders are admitted at ADMISSION_RATE_PER_SECOND across all
+    # replicas.  Set ADMISSION_MAX_IN_FLIGHT=0 to disable.
+    ADMISSION_MAX_IN_FLIGHT: int = 200
+    ADMISSION_RATE_PER_SECOND: float = 100.0
+    ADMISSION_TICKET_TTL_SECONDS: int = 300
+
+    # Coalescing of /stock/deduct calls (see services/order.py): concurrent
+    # single-item deductions wait up to DEDUCT_BATCH_WINDOW_MS, or until
+    # DEDUCT_BATCH_MAX_SIZE are queued, and go out as one batched call.
+    # Set the window to 0 to send every deduction on its own.  The batch size
+    # is capped at 100, the most lines stock-service accepts in one call.
+    DEDUCT_BATCH_WINDOW_MS: float = 2.0
+    DEDUCT_BATCH_MAX_SIZE: int = 50
+
+    # RabbitMQ publishing (see services/queue.py): the outbox relay and the
+    # status workers share one connection and this many confirm channels.
+    # PENDING notifications queue up to STATUS_PUBLISH_QUEUE_SIZE deep and
+    # are dropped (and counted) beyond that.
+    AMQP_CHANNEL_POOL_SIZE: int = 4
+    STATUS_PUBLISH_QUEUE_SIZE: int = 1000
+    STATUS_PUBLISH_WORKERS: int = 2
+
+    # Group commit of confirmed orders (see services/order_writer.py): orders
+    # wait up to ORDER_GROUP_COMMIT_LINGER_MS, or until ORDER_GROUP_COMMIT_MAX_BATCH
+    # are queued, and commit together in one transaction.  0 commits every
+    # order on its own.
+    ORDER_GROUP_COMMIT_LINGER_MS: float = 0.0
+    ORDER_GROUP_COMMIT_MAX_BATCH: int = 100
+
+    # Asynchronous stock reservation (see services/reservation.py).  Orders
+    # that cannot be served from a stock lease are recorded as RECEIVED and
+    # acknowledged at once; stock-service deducts them from ``order.received``
+    # events and answers with STOCK_VERIFIED or REJECTED on kitchen_events.
+    STOCK_RESERVATION_ASYNC: bool = False
+
+    # Stock allotment leases (see services/allotment.py).  Single-item orders
+    # are confirmed against a block of STOCK_LEASE_SIZE units leased from
+    # stock-service.  Off by default (0 = call /stock/deduct for every order);
+    # try e.g. 20 once the reconciler's rejected rows are being monitored.
+    STOCK_LEASE_SIZE: int = 0
+    STOCK_LEASE_TTL_SECONDS: int = 30
+    STOCK_LEASE_RECONCILE_INTERVAL_SECONDS: float = 1.0
+    STOCK_LEASE_RETRY_SECONDS: float = 5.0
+
+    # Multi-worker metrics (see services/worker_metrics.py).  Set a directory
+    # shared by the workers (e.g. /tmp/gateway-metrics) when running uvicorn
+    # with --workers, so /metrics reports the whole gateway, not one worker.
+    METRICS_MULTIPROC_DIR: str = ""
+    METRICS_EXPORT_INTERVAL_SECONDS: float = 1.0
+
     # Comma-separated list of allowed CORS origins.
     # Example: "http://localhost:3000,https://myapp.example.com"
     CORS_ORIGINS: List[str] = ["http://localhost:3000"]
@@ -36,6 +151,13 @@ class Settings(BaseSettings):
             raise ValueError("REDIS_PORT must be between 1 and 65535")
         return v
 
+    @field_validator("IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS")
+    @classmethod
+    def claim_timeout_valid(cls, v: float) -> float:
+        if v < 10:
+            raise ValueError("IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS must be at least 10")
+        return v
+
     @field_validator("GATEWAY_TIMEOUT_MS")
     @classmethod
     def timeout_positive(cls, v: int) -> int:
@@ -1,8 +1,13 @@
 import os
-from typing import Callable
+from typing import AsyncIterator
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import DeclarativeBase
 
 
 class Base(DeclarativeBase):
@@ -11,6 +16,23 @@ class Base(DeclarativeBase):
 
 DATABASE_URL: str = os.getenv("DATABASE_URL", "")
 
+# Async driver for each sync URL scheme we are handed by docker-compose / .env.
+_ASYNC_DRIVERS = {
+    "postgresql://": "postgresql+asyncpg://",
+    "postgres://": "postgresql+asyncpg://",
+    "postgresql+psycopg2://": "postgresql+asyncpg://",
+    "sqlite://": "sqlite+aiosqlite://",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Rewrite a plain ``postgresql://`` / ``sqlite://`` URL to its async driver."""
+    for prefix, async_prefix in _ASYNC_DRIVERS.items():
+        if url.startswith(prefix):
+            return async_prefix + url[len(prefix):]
+    return url
+
+
 _pool_kwargs: dict = {}
 if DATABASE_URL and not DATABASE_URL.startswith("sqlite"):
     _pool_kwargs = {
@@ -20,26 +42,56 @@ if DATABASE_URL and not DATABASE_URL.startswith("sqlite"):
         "pool_pre_ping": True,
     }
 
-engine = create_engine(DATABASE_URL, **_pool_kwargs) if DATABASE_URL else None
+engine = (
+    create_async_engine(to_async_url(DATABASE_URL), **_pool_kwargs)
+    if DATABASE_URL
+    else None
+)
 SessionLocal = (
-    sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
     if engine
     else None
 )
 
 
-def get_db():
+# Columns / indexes added after a table was first created.  ``create_all``
+# never alters existing tables, so these idempotent statements bring old
+# databases up to date on startup (PostgreSQL only — test databases are
+# always fresh).
+_SCHEMA_UPGRADES: list[str] = [
+    "ALTER TABLE gateway_orders ADD COLUMN IF NOT EXISTS items JSON",
+    "CREATE INDEX IF NOT EXISTS ix_outbox_events_unpublished "
+    "ON outbox_events (created_at) WHERE published = false",
+    "DROP INDEX IF EXISTS ix_outbox_events_published",
+    "CREATE INDEX IF NOT EXISTS ix_idempotency_keys_updated_at "
+    "ON idempotency_keys (updated_at)",
+    "CREATE INDEX IF NOT EXISTS ix_gateway_orders_student_created "
+    "ON gateway_orders (student_id, created_at, order_id)",
+    "ALTER TABLE stock_lease_consumptions "
+    "ADD COLUMN IF NOT EXISTS rejected_at TIMESTAMP WITH TIME ZONE",
+]
+
+
+async def init_models() -> None:
+    """Create missing tables and apply :data:`_SCHEMA_UPGRADES`."""
+    if engine is None:
+        return
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        if conn.dialect.name == "postgresql":
+            for statement in _SCHEMA_UPGRADES:
+                await conn.execute(text(statement))
+
+
+async def get_db() -> AsyncIterator[AsyncSession]:
     """Request-scoped DB session (for simple endpoints like list_orders)."""
     if SessionLocal is None:
         raise RuntimeError("DATABASE_URL is not configured")
-    db = SessionLocal()
-    try:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
-def get_session_factory() -> Callable[[], Session]:
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
     """Return a factory for creating short-lived DB sessions.
 
     Use this dependency when the handler needs to open/close sessions at
@@ -4,11 +4,18 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.core.database import Base, engine
+from app.core.database import engine, init_models
 from app.core.config import settings
 from app.routers import order, health, metrics
-from app.services.queue import close_rabbitmq, start_outbox_relay
+from app.services.allotment import start_allotments, stop_allotments
+from app.services.cache import start_cache_invalidation, stop_cache_invalidation
+from app.services.queue import close_rabbitmq, start_outbox_relay, start_status_publisher
 from app.services.order import close_http_client
+from app.services.order_status import start_status_consumer, stop_status_consumer
+from app.services.order_tracking import start_order_tracking, stop_order_tracking
+from app.services.retention import start_retention, stop_retention
+from app.services.stock_refresh import start_stock_refresh, stop_stock_refresh
+from app.services.worker_metrics import start_metrics_export, stop_metrics_export
 
 logging.basicConfig(
     level=logging.INFO,
@@ -23,11 +30,30 @@ async def lifespan(application: FastAPI):
         import app.models.order  # noqa: F401
         import app.models.idempotency  # noqa: F401
         import app.models.outbox  # noqa: F401
-        Base.metadata.create_all(bind=engine)
+        import app.models.lease  # noqa: F401
+        import app.models.order_status  # noqa: F401
+        await init_models()
     start_outbox_relay()
+    start_status_publisher()
+    start_retention()
+    start_cache_invalidation()
+    start_stock_refresh()
+    start_allotments()
+    start_status_consumer()
+    start_order_tracking()
+    start_metrics_export()
     yield
+    await stop_metrics_export()
+    await stop_order_tracking()
+    await stop_status_consumer()
+    await stop_allotments()
+    await stop_stock_refresh()
+    await stop_cache_invalidation()
+    await stop_retention()
     await close_rabbitmq()
     await close_http_client()
+    if engine is not None:
+        await engine.dispose()
 
 
 app = FastAPI(title="Order Gateway", version="1.0.0", lifespan=lifespan)
@@ -38,6 +64,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Read by the frontend: order ETags (long poll) and waiting-room back-off.
+    expose_headers=["ETag", "Retry-After"],
 )
 
 app.include_router(order.router)
@@ -61,6 +61,7 @@ class IdempotencyKey(Base):
         nullable=False,
         default=_utcnow,
         onupdate=_utcnow,
+        index=True,
     )
 
     def __repr__(self) -> str:
@@ -0,0 +1,44 @@
+"""Orders confirmed against a stock lease, queued for reconciliation."""
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, Integer, String, Uuid
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class LeaseConsumption(Base):
+    """
+    One row per order confirmed from a local allotment.  Written in the same
+    transaction as the order, deleted once stock-service has recorded it —
+    so a crash between the two never loses a deduction.  Rows stock-service
+    refuses to record are kept with ``rejected_at`` set for follow-up.
+    """
+
+    __tablename__ = "stock_lease_consumptions"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4,
+    )
+    lease_id: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
+    holder: Mapped[str] = mapped_column(
+        String(128), nullable=False,
+        comment="Gateway process that holds the lease",
+    )
+    order_id: Mapped[uuid.UUID] = mapped_column(Uuid(as_uuid=True), nullable=False)
+    item_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=_utcnow,
+    )
+    rejected_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True,
+        comment="Set when stock-service refused to record the consumption",
+    )
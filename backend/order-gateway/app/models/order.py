@@ -4,7 +4,7 @@ import enum
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import DateTime, Integer, String, Uuid
+from sqlalchemy import DateTime, Index, Integer, JSON, String, Uuid
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.core.database import Base
@@ -22,6 +22,10 @@ def _utcnow() -> datetime:
 
 class GatewayOrder(Base):
     __tablename__ = "gateway_orders"
+    __table_args__ = (
+        # Keyset pagination of a student's orders (GET /orders).
+        Index("ix_gateway_orders_student_created", "student_id", "created_at", "order_id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         Uuid(as_uuid=True),
@@ -36,6 +40,8 @@ class GatewayOrder(Base):
         index=True,
     )
     student_id: Mapped[str] = mapped_column(String(128), nullable=False)
+    # For cart orders item_id / quantity describe the first line; the full
+    # cart is in ``items``.
     item_id: Mapped[str] = mapped_column(String(128), nullable=False)
     quantity: Mapped[int] = mapped_column(Integer, nullable=False)
     status: Mapped[str] = mapped_column(
@@ -49,6 +55,11 @@ class GatewayOrder(Base):
         nullable=False,
         default=_utcnow,
     )
+    items: Mapped[list | None] = mapped_column(
+        JSON,
+        nullable=True,
+        comment="Cart lines [{item_id, quantity}]; NULL for single-item orders",
+    )
 
     def __repr__(self) -> str:
         return (
@@ -0,0 +1,42 @@
+"""Latest pipeline status of each order, projected from ``kitchen_events``."""
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, Integer, String, Uuid
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+# Pipeline statuses in the order an order moves through them.  An event only
+# replaces the stored status when its rank is higher, so redelivered or
+# reordered messages never move an order backwards.
+PIPELINE_STATUS_RANK: dict[str, int] = {
+    "PENDING": 0,
+    "STOCK_VERIFIED": 1,
+    "IN_KITCHEN": 2,
+    "READY": 3,
+    "CANCELLED": 3,
+    "REJECTED": 3,
+}
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class OrderStatusView(Base):
+    """
+    One row per order that has had a pipeline event.  Orders without a row
+    are still PENDING.
+    """
+
+    __tablename__ = "order_status_view"
+
+    order_id: Mapped[uuid.UUID] = mapped_column(Uuid(as_uuid=True), primary_key=True)
+    status: Mapped[str] = mapped_column(String(32), nullable=False)
+    status_rank: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=_utcnow,
+    )
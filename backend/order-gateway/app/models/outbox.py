@@ -4,7 +4,7 @@ from __future__ import annotations
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import Boolean, DateTime, JSON, String, Uuid
+from sqlalchemy import Boolean, DateTime, Index, JSON, String, Uuid, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.core.database import Base
@@ -16,6 +16,16 @@ def _utcnow() -> datetime:
 
 class OutboxEvent(Base):
     __tablename__ = "outbox_events"
+    __table_args__ = (
+        # Partial index: the relay's "oldest unpublished first" scan only ever
+        # touches pending rows, so its cost does not grow with history.
+        Index(
+            "ix_outbox_events_unpublished",
+            "created_at",
+            postgresql_where=text("published = false"),
+            sqlite_where=text("published = 0"),
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4,
@@ -33,7 +43,7 @@ class OutboxEvent(Base):
         DateTime(timezone=True), nullable=False, default=_utcnow,
     )
     published: Mapped[bool] = mapped_column(
-        Boolean, nullable=False, default=False, index=True,
+        Boolean, nullable=False, default=False,
     )
     published_at: Mapped[datetime | None] = mapped_column(
         DateTime(timezone=True), nullable=True,
@@ -1,11 +1,53 @@
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
 
 from app.schemas.metrics import MetricsResponse
-from app.services.metrics import metrics
+from app.services.metrics import _Metrics
+from app.services.worker_metrics import collect
 
 router = APIRouter(tags=["Ops"])
 
+_PROMETHEUS_PREFIX = "gateway_"
 
-@router.get("/metrics", response_model=MetricsResponse, summary="In-process metrics")
+
+def _collect() -> tuple[MetricsResponse, _Metrics]:
+    merged, process = collect()
+    return MetricsResponse(**merged.snapshot(), **process), merged
+
+
+@router.get("/metrics", response_model=MetricsResponse, summary="Gateway metrics")
 async def get_metrics() -> MetricsResponse:
-    return MetricsResponse(**metrics.snapshot())
+    return _collect()[0]
+
+
+@router.get(
+    "/metrics/prometheus",
+    response_class=PlainTextResponse,
+    summary="Gateway metrics in Prometheus text format",
+)
+async def get_prometheus_metrics() -> str:
+    snapshot, merged = _collect()
+    lines = [
+        f"{_PROMETHEUS_PREFIX}{name} {float(value)}"
+        for name, value in snapshot.model_dump().items()
+    ]
+
+    edges, count, total_ms = merged.latency_histogram()
+    name = f"{_PROMETHEUS_PREFIX}order_latency_ms"
+    lines.append(f"# TYPE {name} histogram")
+    for le, cumulative in edges:
+        lines.append(f'{name}_bucket{{le="{le:g}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{le="+Inf"}} {count}')
+    lines.append(f"{name}_sum {total_ms}")
+    lines.append(f"{name}_count {count}")
+
+    name = f"{_PROMETHEUS_PREFIX}order_phase_ms"
+    lines.append(f"# TYPE {name} histogram")
+    for phase, outcome, edges, count, total_ms in merged.phase_histograms():
+        labels = f'phase="{phase}",outcome="{outcome}"'
+        for le, cumulative in edges:
+            lines.append(f'{name}_bucket{{{labels},le="{le:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {count}')
+        lines.append(f"{name}_sum{{{labels}}} {total_ms}")
+        lines.append(f"{name}_count{{{labels}}} {count}")
+    return "\n".join(lines) + "\n"
@@ -1,66 +1,245 @@
+import base64
 import hashlib
 import asyncio
 import json
 import logging
 import time
-from contextlib import contextmanager
-from typing import Annotated, Callable
+import uuid
+from datetime import datetime, timedelta, timezone
+from contextlib import asynccontextmanager
+from typing import Annotated, Any, AsyncIterator
 
 import httpx
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy import text
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from app.core.config import settings
 from app.core.database import get_db, get_session_factory
 from app.models.idempotency import IdempotencyKey, IdempotencyStatus
 from app.models.order import GatewayOrder, OrderStatus
-from app.schemas.order import OrderRequest, OrderResponse, OrderListResponse, OrderSummary
+from app.models.order_status import OrderStatusView
+from app.schemas.order import (
+    OrderRequest, OrderResponse, OrderListResponse, OrderSummary, QueueTicketResponse,
+)
+from app.services import allotment, order_tracking, order_writer, waiting_room
 from app.services.auth import validate_token
 from app.services.cache import get_cached_stock, set_cached_stock
-from app.services.metrics import metrics
-from app.services.order import deduct_stock
-from app.services.queue import publish_order_event, publish_status_event
+from app.services.metrics import PhaseTimer, metrics
+from app.services.order import StockServiceOverloaded, deduct_stock, deduct_stock_batch
+from app.services.queue import publish_status_event
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["Orders"])
 _bearer_scheme = HTTPBearer(auto_error=False)
 
+# Outcome label of a place_order error response, for the phase histograms.
+_OUTCOME_BY_STATUS = {
+    status.HTTP_409_CONFLICT: "conflict",
+    status.HTTP_429_TOO_MANY_REQUESTS: "queued",
+    status.HTTP_502_BAD_GATEWAY: "error",
+    status.HTTP_503_SERVICE_UNAVAILABLE: "shed",
+    status.HTTP_504_GATEWAY_TIMEOUT: "timeout",
+}
+
 
 def _request_hash(request: OrderRequest) -> str:
     """Compute a stable SHA-256 digest for the canonical request body."""
-    canonical = json.dumps(
-        {"order_id": str(request.order_id), "item_id": request.item_id, "quantity": request.quantity},
-        sort_keys=True,
-    )
+    if request.is_cart:
+        body = {
+            "order_id": str(request.order_id),
+            "items": [line.model_dump() for line in request.lines],
+        }
+    else:
+        body = {"order_id": str(request.order_id), "item_id": request.item_id, "quantity": request.quantity}
+    canonical = json.dumps(body, sort_keys=True)
     return hashlib.sha256(canonical.encode()).hexdigest()
 
 
-@contextmanager
-def _short_session(factory: Callable):
+async def _deduct(request: OrderRequest) -> dict[str, int]:
+    """
+    Deduct stock for every line of *request* and return ``{item_id: remaining}``
+    for the lines stock-service reported a remaining level for.
+
+    Single-item orders use ``/stock/deduct``; carts use ONE batched call.
+    """
+    order_id = str(request.order_id)
+    if not request.is_cart:
+        stock_response = await deduct_stock(
+            order_id=order_id,
+            item_id=request.item_id,
+            quantity=request.quantity,
+        )
+        results = [{"item_id": request.item_id, **stock_response}]
+    else:
+        stock_response = await deduct_stock_batch(
+            order_id, [line.model_dump() for line in request.lines],
+        )
+        results = stock_response.get("results", [])
+    return {
+        str(result["item_id"]): int(result["remaining_stock"])
+        for result in results
+        if result.get("remaining_stock") is not None
+    }
+
+
+def _sold_out_item(request: OrderRequest, detail: Any) -> str | None:
+    """Which item a stock-service 409 refers to (batch errors name the line)."""
+    if not request.is_cart:
+        return request.item_id
+    if isinstance(detail, dict) and isinstance(detail.get("detail"), dict):
+        return detail["detail"].get("item_id")
+    return None
+
+
+@asynccontextmanager
+async def _short_session(
+    factory: async_sessionmaker[AsyncSession],
+) -> AsyncIterator[AsyncSession]:
     """Open a DB session and guarantee it is closed (connection returned to pool)."""
     db = factory()
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
+
+
+async def _get_idempotency_key(db: AsyncSession, order_id) -> IdempotencyKey | None:
+    result = await db.execute(
+        select(IdempotencyKey).where(IdempotencyKey.order_id == order_id)
+    )
+    return result.scalars().first()
+
+
+async def _claim_idempotency_key(
+    db: AsyncSession, request: OrderRequest, claimed_at: datetime,
+) -> IdempotencyKey | None:
+    """
+    Claim *request*'s order_id with ONE ``INSERT ... ON CONFLICT DO NOTHING
+    RETURNING``.  Returns ``None`` when this request now owns the order_id;
+    otherwise reads and returns the record that got there first.
+
+    A RECEIVED claim older than ``IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS`` was left
+    by a request that never finished (crash, failed release); it is taken
+    over with a conditional UPDATE, so only one retry wins it.  The claim's
+    ``updated_at`` is set to *claimed_at*, which identifies it for
+    :func:`_renew_claim`.
+    """
+    insert_ = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    claimed = await db.execute(
+        insert_(IdempotencyKey)
+        .values(
+            order_id=request.order_id,
+            request_hash=_request_hash(request),
+            status=IdempotencyStatus.RECEIVED.value,
+            updated_at=claimed_at,
+        )
+        .on_conflict_do_nothing(index_elements=[IdempotencyKey.order_id])
+        .returning(IdempotencyKey.id)
+    )
+    if claimed.first() is not None:
+        return None
+
+    stale_before = claimed_at - timedelta(seconds=settings.IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS)
+    taken_over = await db.execute(
+        update(IdempotencyKey)
+        .where(
+            IdempotencyKey.order_id == request.order_id,
+            IdempotencyKey.status == IdempotencyStatus.RECEIVED.value,
+            IdempotencyKey.updated_at < stale_before,
+        )
+        .values(request_hash=_request_hash(request), updated_at=claimed_at)
+        .returning(IdempotencyKey.id)
+    )
+    if taken_over.first() is not None:
+        logger.warning("Took over stale idempotency claim for order %s", request.order_id)
+        return None
+    return await _get_idempotency_key(db, request.order_id)
+
+
+async def _renew_claim(
+    db_factory: async_sessionmaker[AsyncSession], order_id, claimed_at: datetime,
+) -> bool:
+    """
+    Refresh our RECEIVED claim's ``updated_at`` so it cannot be taken over
+    as stale.  ``False`` if it was taken over already (it no longer carries
+    *claimed_at*): the order now belongs to another request.
+    """
+    async with _short_session(db_factory) as db:
+        renewed = await db.execute(
+            update(IdempotencyKey)
+            .where(
+                IdempotencyKey.order_id == order_id,
+                IdempotencyKey.status == IdempotencyStatus.RECEIVED.value,
+                IdempotencyKey.updated_at == claimed_at,
+            )
+            .values(updated_at=datetime.now(timezone.utc))
+            .returning(IdempotencyKey.id)
+        )
+        owned = renewed.first() is not None
+        await db.commit()
+    return owned
 
 
-def _mark_idempotency_failed(
-    db_factory: Callable, order_id, detail: str,
+class _ClaimLost(Exception):
+    """Our idempotency claim was taken over while the order was in flight."""
+
+
+async def _mark_idempotency_failed(
+    db_factory: async_sessionmaker[AsyncSession], order_id, detail: str,
 ) -> None:
     """Update the idempotency record to FAILED in its own short-lived session."""
-    with _short_session(db_factory) as db:
-        idem = (
-            db.query(IdempotencyKey)
-            .filter(IdempotencyKey.order_id == order_id)
-            .first()
-        )
+    async with _short_session(db_factory) as db:
+        idem = await _get_idempotency_key(db, order_id)
         if idem:
             idem.status = IdempotencyStatus.FAILED.value
             idem.response_payload = {"detail": detail}
-            db.commit()
+            await db.commit()
+
+
+async def _release_idempotency_key(
+    db_factory: async_sessionmaker[AsyncSession], order_id,
+) -> None:
+    """Drop the RECEIVED record so the client may retry the same order_id."""
+    async with _short_session(db_factory) as db:
+        await db.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.order_id == order_id,
+                IdempotencyKey.status == IdempotencyStatus.RECEIVED.value,
+            )
+        )
+        await db.commit()
+
+
+async def _settle_persisted_order(
+    db_factory: async_sessionmaker[AsyncSession], order_id,
+) -> str | None:
+    """
+    Status of an order already in ``gateway_orders`` — its idempotency key
+    was purged by retention and a late retry claimed a fresh one — after
+    settling the new key to match.  ``None`` if the order is not there.
+    """
+    async with _short_session(db_factory) as db:
+        order_status = (
+            await db.execute(select(GatewayOrder.status).where(GatewayOrder.order_id == order_id))
+        ).scalar()
+        if order_status is None:
+            return None
+        idem = await _get_idempotency_key(db, order_id)
+        if idem:
+            if order_status == OrderStatus.REJECTED.value:
+                idem.status = IdempotencyStatus.FAILED.value
+                idem.response_payload = {"detail": "Previously rejected"}
+            else:
+                idem.status = IdempotencyStatus.CONFIRMED.value
+                idem.response_payload = {"order_id": str(order_id), "status": order_status}
+            await db.commit()
+        return order_status
 
 
 @router.post(
@@ -71,10 +250,12 @@ def _mark_idempotency_failed(
 )
 async def place_order(
     request: OrderRequest,
+    response: Response,
     credentials: Annotated[
         HTTPAuthorizationCredentials | None, Depends(_bearer_scheme)
     ],
-    db_factory: Callable = Depends(get_session_factory),
+    db_factory: async_sessionmaker[AsyncSession] = Depends(get_session_factory),
+    queue_ticket: Annotated[str | None, Header(alias="X-Queue-Ticket")] = None,
 ) -> OrderResponse:
     start = time.perf_counter()
     metrics.increment_total_attempts()
@@ -82,36 +263,83 @@ async def place_order(
     payload = validate_token(credentials)
     student_id: str = payload["student_id"]
 
-    # ── Phase 1: Idempotency check (short-lived session) ───────────
-    with _short_session(db_factory) as db:
-        existing_key = (
-            db.query(IdempotencyKey)
-            .filter(IdempotencyKey.order_id == request.order_id)
-            .first()
-        )
-        if existing_key is not None:
-            if existing_key.status == IdempotencyStatus.CONFIRMED.value:
-                metrics.record_latency((time.perf_counter() - start) * 1000)
-                return OrderResponse(order_id=request.order_id, status=OrderStatus.CONFIRMED.value)
-            if existing_key.status == IdempotencyStatus.FAILED.value:
-                metrics.increment_rejected()
-                metrics.record_latency((time.perf_counter() - start) * 1000)
-                detail = (existing_key.response_payload or {}).get("detail", "Previously rejected")
-                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail)
+    # Every phase is timed into the metrics histograms (labelled with the
+    # outcome) and reported to the client in a Server-Timing header.
+    timer = PhaseTimer()
+    outcome = "error"
+    try:
+        # ── Admission: queue the request when the gateway is saturated ─
+        timer.begin("admission")
+        admission = await waiting_room.admit(student_id, queue_ticket)
+        if not admission.admitted:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail={
+                    "message": "The canteen is busy, you are in the queue",
+                    **_ticket_body(admission).model_dump(),
+                },
+                headers={"Retry-After": str(admission.retry_after)},
+            )
+        with waiting_room.occupy():
+            result = await _place_admitted_order(request, student_id, start, db_factory, timer)
+        outcome = timer.outcome or "success"
+        response.headers["Server-Timing"] = timer.server_timing()
+        return result
+    except HTTPException as exc:
+        outcome = timer.outcome or _OUTCOME_BY_STATUS.get(exc.status_code, str(exc.status_code))
+        exc.headers = {**(exc.headers or {}), "Server-Timing": timer.server_timing()}
+        raise
+    finally:
+        metrics.record_phases(outcome, timer.finish())
 
-        idem_record = IdempotencyKey(
-            order_id=request.order_id,
-            request_hash=_request_hash(request),
-            status=IdempotencyStatus.RECEIVED.value,
-        )
-        db.add(idem_record)
-        db.commit()
+
+async def _place_admitted_order(
+    request: OrderRequest,
+    student_id: str,
+    start: float,
+    db_factory: async_sessionmaker[AsyncSession],
+    timer: PhaseTimer,
+) -> OrderResponse:
+    # ── Phase 1: Idempotency claim (short-lived session) ───────────
+    timer.begin("idempotency")
+    claimed_at = datetime.now(timezone.utc)
+    claimed = time.monotonic()
+    async with _short_session(db_factory) as db:
+        existing_key = await _claim_idempotency_key(db, request, claimed_at)
+        await db.commit()
     # ← DB connection returned to pool
 
+    if existing_key is not None:
+        if existing_key.status == IdempotencyStatus.CONFIRMED.value:
+            timer.outcome = "replay"
+            metrics.record_latency((time.perf_counter() - start) * 1000)
+            replayed = (existing_key.response_payload or {}).get("status", OrderStatus.CONFIRMED.value)
+            return OrderResponse(order_id=request.order_id, status=replayed)
+        metrics.increment_rejected()
+        metrics.record_latency((time.perf_counter() - start) * 1000)
+        if existing_key.status == IdempotencyStatus.FAILED.value:
+            timer.outcome = "replay_rejected"
+            detail = (existing_key.response_payload or {}).get("detail", "Previously rejected")
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail)
+        # RECEIVED and not stale: a duplicate is still being processed, so
+        # retrying shortly is worthwhile (stale claims were taken over above).
+        timer.outcome = "in_progress"
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Order is already being processed",
+            headers={"Retry-After": "1"},
+        )
+
     # ── Phase 2: Cache short-circuit (NO DB session held) ──────────
-    cached = await get_cached_stock(request.item_id)
-    if cached is not None and cached == 0:
-        _mark_idempotency_failed(db_factory, request.order_id, "Item is out of stock")
+    timer.begin("cache")
+    lines = request.lines
+    cached_levels = await asyncio.gather(*(get_cached_stock(line.item_id) for line in lines))
+    if any(
+        cached is not None and cached == 0 and not allotment.covers(line.item_id, line.quantity)
+        for line, cached in zip(lines, cached_levels)
+    ):
+        timer.outcome = "cache_reject"
+        await _mark_idempotency_failed(db_factory, request.order_id, "Item is out of stock")
         metrics.increment_cache_short_circuits()
         metrics.increment_rejected()
         metrics.record_latency((time.perf_counter() - start) * 1000)
@@ -121,14 +349,21 @@ async def place_order(
         )
 
     # ── Phase 3: Stock deduction (NO DB session held) ──────────────
+    # Single-item orders are confirmed against a local stock lease when one
+    # is available; everything else goes to stock-service — right now, or
+    # after the acknowledgment with STOCK_RESERVATION_ASYNC.
+    timer.begin("stock")
+    lease = (
+        None if request.is_cart
+        else await allotment.take(request.item_id, request.quantity)
+    )
+    reserve_later = lease is None and settings.STOCK_RESERVATION_ASYNC
+    if reserve_later:
+        timer.outcome = "accepted"
     try:
-        stock_response = await deduct_stock(
-            order_id=str(request.order_id),
-            item_id=request.item_id,
-            quantity=request.quantity,
-        )
+        remaining_by_item = {} if lease is not None or reserve_later else await _deduct(request)
     except httpx.TimeoutException:
-        _mark_idempotency_failed(db_factory, request.order_id, "Stock service did not respond in time")
+        await _mark_idempotency_failed(db_factory, request.order_id, "Stock service did not respond in time")
         metrics.increment_downstream_failures()
         metrics.increment_rejected()
         metrics.record_latency((time.perf_counter() - start) * 1000)
@@ -144,16 +379,29 @@ async def place_order(
             detail = exc.response.text
 
         if upstream_status == status.HTTP_409_CONFLICT:
-            await set_cached_stock(request.item_id, 0)
+            sold_out = _sold_out_item(request, detail)
+            if sold_out is not None:
+                await set_cached_stock(sold_out, 0)
 
-        _mark_idempotency_failed(db_factory, request.order_id, str(detail))
+        await _mark_idempotency_failed(db_factory, request.order_id, str(detail))
         metrics.increment_downstream_failures()
         metrics.increment_rejected()
         metrics.record_latency((time.perf_counter() - start) * 1000)
         raise HTTPException(status_code=upstream_status, detail=detail)
+    except StockServiceOverloaded:
+        # Shed before reaching stock-service: nothing was deducted, so the
+        # same order_id may be retried.
+        await _release_idempotency_key(db_factory, request.order_id)
+        metrics.increment_rejected()
+        metrics.record_latency((time.perf_counter() - start) * 1000)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Stock service is busy, please retry",
+            headers={"Retry-After": "1"},
+        )
     except Exception as exc:
         logger.error("Unexpected error calling stock-service: %s", exc)
-        _mark_idempotency_failed(db_factory, request.order_id, "Stock service is unavailable")
+        await _mark_idempotency_failed(db_factory, request.order_id, "Stock service is unavailable")
         metrics.increment_downstream_failures()
         metrics.increment_rejected()
         metrics.record_latency((time.perf_counter() - start) * 1000)
@@ -162,112 +410,235 @@ async def place_order(
             detail="Stock service is unavailable",
         )
 
-    remaining = stock_response.get("remaining_stock")
-    if remaining is not None:
-        await set_cached_stock(request.item_id, int(remaining))
+    for item_id, remaining in remaining_by_item.items():
+        await set_cached_stock(item_id, remaining)
 
     # ── Phase 4: Persist order + outbox event (short-lived session) ─
-    with _short_session(db_factory) as db:
-        order_record = GatewayOrder(
-            order_id=request.order_id,
-            student_id=student_id,
-            item_id=request.item_id,
-            quantity=request.quantity,
-            status=OrderStatus.CONFIRMED.value,
+    timer.begin("persist")
+    order = order_writer.ConfirmedOrder(
+        order_id=request.order_id,
+        student_id=student_id,
+        item_id=lines[0].item_id,
+        quantity=lines[0].quantity,
+        items=[line.model_dump() for line in lines] if request.is_cart else None,
+        lease=lease,
+        status=OrderStatus.RECEIVED.value if reserve_later else OrderStatus.CONFIRMED.value,
+    )
+    try:
+        with allotment.hold(lease, lines[0].quantity, committed=lambda: order.committed):
+            # A claim this old could be taken over as stale before we commit:
+            # renew it (and stop if that already happened).  Younger claims
+            # skip the round trip.
+            if (
+                time.monotonic() - claimed >= settings.IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS / 2
+                and not await _renew_claim(db_factory, request.order_id, claimed_at)
+            ):
+                raise _ClaimLost()
+            await order_writer.write(db_factory, order)
+    except _ClaimLost:
+        # The request that took over finishes the order; stock-service
+        # deducts each order_id once, and our lease units were handed back.
+        timer.outcome = "in_progress"
+        metrics.increment_rejected()
+        metrics.record_latency((time.perf_counter() - start) * 1000)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Order is already being processed",
+            headers={"Retry-After": "1"},
         )
-        db.add(order_record)
-
-        idem = (
-            db.query(IdempotencyKey)
-            .filter(IdempotencyKey.order_id == request.order_id)
-            .first()
+    except Exception as exc:
+        # A unique violation on gateway_orders.order_id means the order was
+        # placed long ago and retention purged its key: answer as a replay.
+        replayed = (
+            await _settle_persisted_order(db_factory, request.order_id)
+            if isinstance(exc, IntegrityError) else None
+        )
+        if replayed is not None:
+            metrics.record_latency((time.perf_counter() - start) * 1000)
+            if replayed == OrderStatus.REJECTED.value:
+                timer.outcome = "replay_rejected"
+                metrics.increment_rejected()
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Previously rejected")
+            timer.outcome = "replay"
+            return OrderResponse(order_id=request.order_id, status=replayed)
+        # Nothing was saved: free the claim so the client can retry the same
+        # order_id (stock-service deducts each order_id at most once).
+        logger.error("Persisting order %s failed: %s", request.order_id, exc)
+        try:
+            await _release_idempotency_key(db_factory, request.order_id)
+        except Exception as release_exc:
+            # The claim goes stale and is taken over by the next retry.
+            logger.error("Releasing idempotency key %s failed: %s", request.order_id, release_exc)
+        metrics.increment_rejected()
+        metrics.record_latency((time.perf_counter() - start) * 1000)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Order could not be saved, please retry",
+            headers={"Retry-After": "1"},
         )
-        if idem:
-            idem.status = IdempotencyStatus.CONFIRMED.value
-            idem.response_payload = {
-                "order_id": str(request.order_id),
-                "status": OrderStatus.CONFIRMED.value,
-            }
-
-        # Outbox: event is written in the SAME transaction as the order
-        publish_order_event(db, {
-            "order_id": str(request.order_id),
-            "item_id": request.item_id,
-            "quantity": request.quantity,
-            "student_id": student_id,
-        })
-        db.commit()
     # ← DB connection returned to pool
 
     # Notify live tracker: order is now entering the pipeline (PENDING)
-    asyncio.create_task(publish_status_event({
+    publish_status_event({
         "order_id": str(request.order_id),
         "student_id": student_id,
         "status": "PENDING",
-    }))
+    })
 
     elapsed_ms = (time.perf_counter() - start) * 1000
     metrics.increment_successful()
     metrics.record_latency(elapsed_ms)
 
     logger.info(
-        "Order accepted: order_id=%s student_id=%s latency=%.2f ms",
+        "Order accepted: order_id=%s student_id=%s status=%s latency=%.2f ms",
         request.order_id,
         student_id,
+        order.status,
         elapsed_ms,
     )
-    return OrderResponse(order_id=request.order_id, status=OrderStatus.CONFIRMED.value)
+    return OrderResponse(order_id=request.order_id, status=order.status)
+
+
+def _ticket_body(admission: waiting_room.Admission) -> QueueTicketResponse:
+    return QueueTicketResponse(
+        ticket=admission.ticket,
+        admitted=admission.admitted,
+        position=admission.position,
+        estimated_wait_seconds=admission.estimated_wait_seconds,
+    )
+
+
+@router.get(
+    "/queue/{ticket}",
+    response_model=QueueTicketResponse,
+    summary="Position of a waiting-room ticket",
+)
+async def get_queue_ticket(
+    ticket: int,
+    credentials: Annotated[
+        HTTPAuthorizationCredentials | None, Depends(_bearer_scheme)
+    ],
+) -> QueueTicketResponse:
+    payload = validate_token(credentials)
+    try:
+        admission = await waiting_room.ticket_status(payload["student_id"], ticket)
+    except Exception as exc:
+        logger.warning("Waiting room unavailable: %s", exc)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Waiting room is unavailable, resubmit the order",
+        )
+    if admission is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unknown or expired ticket",
+        )
+    return _ticket_body(admission)
+
+
+def _encode_cursor(order: GatewayOrder) -> str:
+    raw = f"{order.created_at.isoformat()}|{order.order_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        created_at, order_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(order_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
 
 
 @router.get(
     "/orders",
     response_model=OrderListResponse,
-    summary="List all orders for the current user",
+    summary="List the current user's orders, newest first",
 )
 async def list_orders(
     credentials: Annotated[
         HTTPAuthorizationCredentials | None, Depends(_bearer_scheme)
     ],
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: str | None = None,
 ) -> OrderListResponse:
     payload = validate_token(credentials)
     student_id: str = payload["student_id"]
 
-    orders = (
-        db.query(GatewayOrder)
-        .filter(GatewayOrder.student_id == student_id)
-        .order_by(GatewayOrder.created_at.desc())
-        .all()
+    # One keyset-paginated query on (student_id, created_at, order_id); the
+    # pipeline status comes from the gateway's own projection of
+    # kitchen_events.  Orders with no pipeline event yet are PENDING.
+    query = (
+        select(GatewayOrder, OrderStatusView.status)
+        .outerjoin(OrderStatusView, OrderStatusView.order_id == GatewayOrder.order_id)
+        .where(GatewayOrder.student_id == student_id)
+        .order_by(GatewayOrder.created_at.desc(), GatewayOrder.order_id.desc())
+        .limit(limit + 1)
     )
+    if cursor is not None:
+        query = query.where(
+            tuple_(GatewayOrder.created_at, GatewayOrder.order_id) < _decode_cursor(cursor)
+        )
+    rows = (await db.execute(query)).all()
 
-    # Enrich each order with the latest pipeline status from the shared notifications
-    # table (stock/kitchen services). Falls back to PENDING when the pipeline has not
-    # emitted a status event yet (i.e. order was just CONFIRMED by the gateway).
-    pipeline_status_map: dict[str, str] = {}
-    if orders:
-        order_ids_str = [str(o.order_id) for o in orders]
-        rows = db.execute(
-            text(
-                """
-                SELECT DISTINCT ON (order_id) order_id::text AS order_id_str, status_sent
-                FROM notifications
-                WHERE order_id::text = ANY(:oids)
-                ORDER BY order_id, sent_at DESC
-                """
-            ),
-            {"oids": order_ids_str},
-        ).fetchall()
-        pipeline_status_map = {row.order_id_str: row.status_sent for row in rows}
-
+    page = rows[:limit]
     enriched = [
         OrderSummary(
             order_id=o.order_id,
             item_id=o.item_id,
             quantity=o.quantity,
-            status=pipeline_status_map.get(str(o.order_id), "PENDING"),
+            items=o.items,
+            status=pipeline_status or "PENDING",
             created_at=o.created_at,
         )
-        for o in orders
+        for o, pipeline_status in page
     ]
+    next_cursor = _encode_cursor(page[-1][0]) if len(rows) > limit else None
+    return OrderListResponse(orders=enriched, next_cursor=next_cursor)
+
+
+def _owned_order(order: dict[str, Any] | None, student_id: str) -> dict[str, Any]:
+    """*order* if it exists and belongs to *student_id*; 404 otherwise."""
+    if order is None or order["student_id"] != student_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+    return order
+
+
+@router.get(
+    "/orders/{order_id}",
+    response_model=OrderSummary,
+    summary="Status of one order",
+    responses={304: {"description": "Status unchanged (If-None-Match)"}},
+)
+async def get_order(
+    order_id: uuid.UUID,
+    response: Response,
+    credentials: Annotated[
+        HTTPAuthorizationCredentials | None, Depends(_bearer_scheme)
+    ],
+    db_factory: async_sessionmaker[AsyncSession] = Depends(get_session_factory),
+    if_none_match: Annotated[str | None, Header()] = None,
+    wait: Annotated[float, Query(ge=0, le=30)] = 0,
+) -> OrderSummary | Response:
+    """
+    Latest pipeline status of one order, with an ``ETag``.  With
+    ``If-None-Match`` and ``wait`` (seconds) the request is held until the
+    status changes or the wait runs out, then answered 200 or 304.
+    """
+    payload = validate_token(credentials)
+    student_id: str = payload["student_id"]
 
-    return OrderListResponse(orders=enriched)
+    order = _owned_order(await order_tracking.load_order(db_factory, order_id), student_id)
+    tag = order_tracking.etag(order["status"])
+    deadline = time.monotonic() + wait
+    while tag == if_none_match and (remaining := deadline - time.monotonic()) > 0:
+        await order_tracking.wait_for_change(order_id, remaining)
+        # Re-checked on every reload: the order may be gone by now.
+        order = _owned_order(await order_tracking.load_order(db_factory, order_id), student_id)
+        tag = order_tracking.etag(order["status"])
+
+    headers = {"ETag": tag, "Cache-Control": "private, no-cache"}
+    if tag == if_none_match:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return OrderSummary(**order)
@@ -10,6 +10,95 @@ class MetricsResponse(BaseModel):
     cache_short_circuits: Annotated[int, Field(ge=0)]
     downstream_failures: Annotated[int, Field(ge=0)]
     average_response_time_ms: Annotated[float, Field(ge=0)]
+    # Orders confirmed from a local stock lease instead of /stock/deduct
+    allotment_orders: Annotated[int, Field(ge=0)] = 0
+    # Lease consumptions stock-service refused to record
+    lease_consumptions_rejected: Annotated[int, Field(ge=0)] = 0
+    # Coalesced /stock/deduct calls
+    deduct_batches: Annotated[int, Field(ge=0)] = 0
+    deduct_batch_avg_size: Annotated[float, Field(ge=0)] = 0.0
+    deduct_queue_delay_avg_ms: Annotated[float, Field(ge=0)] = 0.0
+    deduct_queue_delay_max_ms: Annotated[float, Field(ge=0)] = 0.0
+    # Group-committed orders
+    order_commit_batches: Annotated[int, Field(ge=0)] = 0
+    order_commit_batch_avg_size: Annotated[float, Field(ge=0)] = 0.0
+    order_commit_avg_ms: Annotated[float, Field(ge=0)] = 0.0
+    # Virtual waiting room
+    waiting_room_tickets: Annotated[int, Field(ge=0)] = 0
+    waiting_room_admitted: Annotated[int, Field(ge=0)] = 0
+    orders_in_flight: Annotated[int, Field(ge=0)] = 0
+    # Pipeline status events projected into order_status_view
+    status_events_applied: Annotated[int, Field(ge=0)] = 0
+    # Asynchronously reserved orders settled by stock-service
+    stock_reservations_confirmed: Annotated[int, Field(ge=0)] = 0
+    stock_reservations_rejected: Annotated[int, Field(ge=0)] = 0
+    # PENDING notifications from the bounded status publisher
+    status_events_published: Annotated[int, Field(ge=0)] = 0
+    status_publish_failures: Annotated[int, Field(ge=0)] = 0
+    status_events_dropped: Annotated[int, Field(ge=0)] = 0
+    status_publish_queue_depth: Annotated[int, Field(ge=0)] = 0
     # 30-second rolling window fields
     rolling_window_avg_ms: Annotated[float, Field(ge=0)] = 0.0
     latency_alert: bool = False
+    # Order latency percentiles, since start and over the rolling window
+    latency_p50_ms: Annotated[float, Field(ge=0)] = 0.0
+    latency_p95_ms: Annotated[float, Field(ge=0)] = 0.0
+    latency_p99_ms: Annotated[float, Field(ge=0)] = 0.0
+    rolling_p50_ms: Annotated[float, Field(ge=0)] = 0.0
+    rolling_p95_ms: Annotated[float, Field(ge=0)] = 0.0
+    rolling_p99_ms: Annotated[float, Field(ge=0)] = 0.0
+    # place_order phase timings over the rolling window (see Server-Timing)
+    phase_admission_avg_ms: Annotated[float, Field(ge=0)] = 0.0
+    phase_admission_p95_ms: Annotated[float, Field(ge=0)] = 0.0
+    phase_idempotency_avg_ms: Annotated[float, Field(ge=0)] = 0.0
+    phase_idempotency_p95_ms: Annotated[float, Field(ge=0)] = 0.0
+    phase_cache_avg_ms: Annotated[float, Field(ge=0)] = 0.0
+    phase_cache_p95_ms: Annotated[float, Field(ge=0)] = 0.0
+    phase_stock_avg_ms: Annotated[float, Field(ge=0)] = 0.0
+    phase_stock_p95_ms: Annotated[float, Field(ge=0)] = 0.0
+    phase_persist_avg_ms: Annotated[float, Field(ge=0)] = 0.0
+    phase_persist_p95_ms: Annotated[float, Field(ge=0)] = 0.0
+    # Stock-service circuit breaker (1 = OPEN / HALF_OPEN) and AIMD limit
+    stock_breaker_open: Annotated[int, Field(ge=0, le=1)] = 0
+    stock_concurrency_limit: Annotated[float, Field(ge=0)] = 0.0
+    stock_in_flight: Annotated[int, Field(ge=0)] = 0
+    stock_shed_total: Annotated[int, Field(ge=0)] = 0
+    # Hedged deductions: share of calls hedged, share of hedges that won
+    stock_hedges_total: Annotated[int, Field(ge=0)] = 0
+    stock_hedge_wins_total: Annotated[int, Field(ge=0)] = 0
+    stock_hedge_rate: Annotated[float, Field(ge=0, le=1)] = 0.0
+    stock_hedge_win_rate: Annotated[float, Field(ge=0, le=1)] = 0.0
+    # Stock-service connection pool (wait and connect figures over 30 s)
+    stock_pool_connections: Annotated[int, Field(ge=0)] = 0
+    stock_pool_in_use: Annotated[int, Field(ge=0)] = 0
+    stock_pool_wait_avg_ms: Annotated[float, Field(ge=0)] = 0.0
+    stock_pool_wait_p99_ms: Annotated[float, Field(ge=0)] = 0.0
+    stock_pool_new_connections_per_sec: Annotated[float, Field(ge=0)] = 0.0
+    stock_pool_connect_avg_ms: Annotated[float, Field(ge=0)] = 0.0
+    # Verified-JWT cache
+    jwt_cache_hits: Annotated[int, Field(ge=0)] = 0
+    jwt_cache_misses: Annotated[int, Field(ge=0)] = 0
+    jwt_cache_size: Annotated[int, Field(ge=0)] = 0
+    # Age of the oldest outbox event not yet relayed to RabbitMQ
+    outbox_lag_seconds: Annotated[float, Field(ge=0)] = 0.0
+    # Retention of outbox_events / idempotency_keys
+    outbox_rows: Annotated[int, Field(ge=0)] = 0
+    idempotency_rows: Annotated[int, Field(ge=0)] = 0
+    retention_purged_total: Annotated[int, Field(ge=0)] = 0
+    retention_purge_rate_per_sec: Annotated[float, Field(ge=0)] = 0.0
+    # Two-tier stock cache: in-process L1 and Redis L2
+    stock_cache_l1_hits: Annotated[int, Field(ge=0)] = 0
+    stock_cache_l1_misses: Annotated[int, Field(ge=0)] = 0
+    stock_cache_l1_hit_ratio: Annotated[float, Field(ge=0, le=1)] = 0.0
+    stock_cache_l2_hits: Annotated[int, Field(ge=0)] = 0
+    stock_cache_l2_misses: Annotated[int, Field(ge=0)] = 0
+    stock_cache_l2_hit_ratio: Annotated[float, Field(ge=0, le=1)] = 0.0
+    # Bulk stock cache refresh; age is since any replica last refreshed (0 = never)
+    stock_cache_refreshes: Annotated[int, Field(ge=0)] = 0
+    stock_cache_refresh_failures: Annotated[int, Field(ge=0)] = 0
+    stock_cache_items: Annotated[int, Field(ge=0)] = 0
+    stock_cache_age_seconds: Annotated[float, Field(ge=0)] = 0.0
+    # Single-order lookups (GET /orders/{order_id}) served from Redis
+    order_cache_hits: Annotated[int, Field(ge=0)] = 0
+    order_cache_misses: Annotated[int, Field(ge=0)] = 0
+    order_cache_hit_ratio: Annotated[float, Field(ge=0, le=1)] = 0.0
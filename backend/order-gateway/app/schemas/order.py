@@ -3,24 +3,58 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Literal, Annotated
 from uuid import UUID
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
-class OrderRequest(BaseModel):
-    order_id: UUID
+class OrderLine(BaseModel):
     item_id: Annotated[str, Field(min_length=1)]
     quantity: Annotated[int, Field(ge=1)]
 
 
+class OrderRequest(BaseModel):
+    """Either a single item (``item_id`` + ``quantity``) or a cart (``items``)."""
+
+    order_id: UUID
+    item_id: Annotated[str, Field(min_length=1)] | None = None
+    quantity: Annotated[int, Field(ge=1)] | None = None
+    items: Annotated[list[OrderLine], Field(min_length=1, max_length=20)] | None = None
+
+    @model_validator(mode="after")
+    def _single_item_or_cart(self) -> "OrderRequest":
+        if self.items is None:
+            if self.item_id is None or self.quantity is None:
+                raise ValueError("Provide item_id and quantity, or a non-empty items list")
+            return self
+        if self.item_id is not None or self.quantity is not None:
+            raise ValueError("Provide either item_id/quantity or items, not both")
+        item_ids = [line.item_id for line in self.items]
+        if len(set(item_ids)) != len(item_ids):
+            raise ValueError("Each item_id may appear only once per cart")
+        return self
+
+    @property
+    def is_cart(self) -> bool:
+        return self.items is not None
+
+    @property
+    def lines(self) -> list[OrderLine]:
+        """The order as a list of lines (one line for single-item orders)."""
+        if self.items is not None:
+            return self.items
+        return [OrderLine(item_id=self.item_id, quantity=self.quantity)]
+
+
 class OrderResponse(BaseModel):
     order_id: UUID
-    status: Literal["CONFIRMED"]
+    # RECEIVED: accepted, stock still to be reserved (STOCK_RESERVATION_ASYNC).
+    status: Literal["CONFIRMED", "RECEIVED"]
 
 
 class OrderSummary(BaseModel):
     order_id: UUID
     item_id: str
     quantity: int
+    items: list[OrderLine] | None = None
     status: str
     created_at: datetime
 
@@ -29,6 +63,17 @@ class OrderSummary(BaseModel):
 
 class OrderListResponse(BaseModel):
     orders: list[OrderSummary]
+    # Pass as ``cursor`` to fetch the next page; ``None`` on the last page.
+    next_cursor: str | None = None
+
+
+class QueueTicketResponse(BaseModel):
+    """Waiting-room ticket: resubmit the order with ``X-Queue-Ticket`` once admitted."""
+
+    ticket: int
+    admitted: bool
+    position: int
+    estimated_wait_seconds: float
 
 
 class OrderErrorResponse(BaseModel):
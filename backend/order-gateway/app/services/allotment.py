@@ -0,0 +1,325 @@
+"""
+Stock allotment leases.
+
+Instead of one ``/stock/deduct`` call per order, the gateway leases a block of
+``STOCK_LEASE_SIZE`` units of an item from stock-service and confirms
+single-item orders against it locally — no network hop on the order path
+until the block runs out.
+
+Each order confirmed this way writes a :class:`LeaseConsumption` row in the
+same transaction as the order itself.  A background reconciler posts those
+rows to ``/stock/leases/{id}/reconcile`` (which records the StockTransaction
+rows) and deletes them, and releases leases that are exhausted, close to
+expiry or left over at shutdown, so unused units go back to inventory.
+Rows left behind by a crashed process are picked up by any replica once the
+lease would have expired.  Rows stock-service refuses to record are never
+deleted: they are marked ``rejected_at``, logged and counted in
+``lease_consumptions_rejected`` so an operator can settle them.
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterator
+
+import httpx
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.lease import LeaseConsumption
+from app.services.cache import set_cached_stock
+from app.services.metrics import metrics
+from app.services.order import acquire_lease, reconcile_lease
+
+logger = logging.getLogger(__name__)
+
+# Identifies this process to stock-service and in stock_lease_consumptions.
+HOLDER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+_active = False
+_reconcile_task: asyncio.Task | None = None
+
+
+@dataclass
+class Allotment:
+    lease_id: str
+    item_id: str
+    remaining: int
+    expires_at: float            # time.monotonic() deadline
+    in_flight: int = 0           # units taken by orders not yet committed
+
+
+# item_id → the allotment new orders draw from
+_current: dict[str, Allotment] = {}
+# lease_id → allotments no longer drawn from, waiting to be released
+_retired: dict[str, Allotment] = {}
+_acquire_locks: dict[str, asyncio.Lock] = {}
+# item_id → monotonic time before which we do not ask for a new lease
+_cooldown_until: dict[str, float] = {}
+
+
+def _expiry_margin() -> float:
+    """Stop drawing from a lease this long before it expires."""
+    return max(2 * settings.STOCK_LEASE_RECONCILE_INTERVAL_SECONDS, 2.0)
+
+
+def _usable(allotment: Allotment | None, quantity: int) -> bool:
+    return (
+        allotment is not None
+        and allotment.remaining >= quantity
+        and time.monotonic() < allotment.expires_at - _expiry_margin()
+    )
+
+
+def covers(item_id: str, quantity: int) -> bool:
+    """True when the local allotment for *item_id* can confirm *quantity* units."""
+    return _active and _usable(_current.get(item_id), quantity)
+
+
+def _retire(allotment: Allotment) -> None:
+    if _current.get(allotment.item_id) is allotment:
+        del _current[allotment.item_id]
+    _retired[allotment.lease_id] = allotment
+
+
+async def _acquire(item_id: str) -> Allotment | None:
+    if time.monotonic() < _cooldown_until.get(item_id, 0.0):
+        return None
+    started = time.monotonic()
+    try:
+        lease = await acquire_lease(
+            item_id, settings.STOCK_LEASE_SIZE, HOLDER_ID, settings.STOCK_LEASE_TTL_SECONDS,
+        )
+    except Exception as exc:
+        if not (isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code == 409):
+            logger.warning("Stock lease for item '%s' failed: %s", item_id, exc)
+        _cooldown_until[item_id] = time.monotonic() + settings.STOCK_LEASE_RETRY_SECONDS
+        return None
+
+    allotment = Allotment(
+        lease_id=str(lease["lease_id"]),
+        item_id=item_id,
+        remaining=int(lease["granted"]),
+        expires_at=started + settings.STOCK_LEASE_TTL_SECONDS,
+    )
+    _current[item_id] = allotment
+    if lease.get("remaining_stock") is not None:
+        await set_cached_stock(item_id, int(lease["remaining_stock"]))
+    return allotment
+
+
+async def take(item_id: str, quantity: int) -> Allotment | None:
+    """
+    Reserve *quantity* units of *item_id* from the local allotment, leasing a
+    new block first if needed.  Returns ``None`` when the order must go to
+    ``/stock/deduct`` instead (leasing disabled, sold out, or stock-service
+    unreachable).  Callers must follow up with :func:`hold`.
+    """
+    if not _active or not 0 < quantity <= settings.STOCK_LEASE_SIZE:
+        return None
+
+    allotment = _current.get(item_id)
+    if not _usable(allotment, quantity):
+        # Single-flight: concurrent orders for the same item wait for one lease.
+        async with _acquire_locks.setdefault(item_id, asyncio.Lock()):
+            allotment = _current.get(item_id)
+            if not _usable(allotment, quantity):
+                if allotment is not None:
+                    _retire(allotment)
+                allotment = await _acquire(item_id)
+                if not _usable(allotment, quantity):
+                    return None
+
+    allotment.remaining -= quantity
+    allotment.in_flight += quantity
+    metrics.increment_allotment_orders()
+    return allotment
+
+
+def record_consumption(
+    db: AsyncSession, allotment: Allotment, order_id, quantity: int,
+) -> None:
+    """Queue the consumption for reconciliation in the order's own transaction."""
+    db.add(LeaseConsumption(
+        lease_id=allotment.lease_id,
+        holder=HOLDER_ID,
+        order_id=order_id,
+        item_id=allotment.item_id,
+        quantity=quantity,
+    ))
+
+
+@contextmanager
+def hold(
+    allotment: Allotment | None,
+    quantity: int,
+    committed: Callable[[], bool] | None = None,
+) -> Iterator[None]:
+    """
+    Wrap the order's persistence: on success the units are settled (their
+    LeaseConsumption row is committed); on failure they go back to the
+    allotment so a later order can use them.  *committed* tells a failure
+    after the commit (e.g. the caller was cancelled) from one before it.
+    """
+    if allotment is None:
+        yield
+        return
+    try:
+        yield
+    except BaseException:
+        if committed is None or not committed():
+            allotment.remaining += quantity
+        allotment.in_flight -= quantity
+        raise
+    allotment.in_flight -= quantity
+
+
+# ── Reconciliation ─────────────────────────────────────────────────────────
+
+
+async def _reconcile(db: AsyncSession, lease_id: str, release: bool) -> bool:
+    """
+    Post every queued row of *lease_id*; delete the ones stock-service
+    recorded and mark the ones it refused with ``rejected_at``.
+    """
+    rows = (
+        await db.execute(select(LeaseConsumption).where(
+            LeaseConsumption.lease_id == lease_id,
+            LeaseConsumption.rejected_at.is_(None),
+        ))
+    ).scalars().all()
+    lines = [{"order_id": str(row.order_id), "quantity": row.quantity} for row in rows]
+    try:
+        result = await reconcile_lease(lease_id, lines, release=release)
+    except httpx.HTTPStatusError as exc:
+        if exc.response.status_code >= 500:
+            logger.warning("Reconciling lease %s failed, will retry: %s", lease_id, exc)
+            return False
+        # 404 / 4xx will not succeed on retry — keep the rows for follow-up.
+        logger.error("Lease %s reconciliation refused: %s", lease_id, exc.response.text)
+        refused = list(rows)
+    except Exception as exc:
+        logger.warning("Reconciling lease %s failed, will retry: %s", lease_id, exc)
+        return False
+    else:
+        refused_ids = set(result.get("rejected") or ())
+        refused = [row for row in rows if str(row.order_id) in refused_ids]
+
+    if refused:
+        logger.error(
+            "Stock-service refused %d consumption(s) of lease %s: orders %s",
+            len(refused), lease_id, ", ".join(str(row.order_id) for row in refused),
+        )
+        metrics.increment_lease_consumptions_rejected(len(refused))
+        await db.execute(
+            update(LeaseConsumption)
+            .where(LeaseConsumption.id.in_([row.id for row in refused]))
+            .values(rejected_at=datetime.now(timezone.utc))
+            .execution_options(synchronize_session=False)
+        )
+    recorded = [row.id for row in rows if row not in refused]
+    if recorded:
+        await db.execute(
+            delete(LeaseConsumption)
+            .where(LeaseConsumption.id.in_(recorded))
+            .execution_options(synchronize_session=False)
+        )
+    if rows:
+        await db.commit()
+    return True
+
+
+async def run_reconcile_pass(release_all: bool = False) -> int:
+    """
+    Reconcile queued consumptions and release finished leases once.
+    Returns the number of leases reported to stock-service.
+    """
+    from app.core.database import SessionLocal
+
+    if SessionLocal is None:
+        return 0
+
+    now = time.monotonic()
+    for allotment in list(_current.values()):
+        if release_all or allotment.remaining == 0 or now >= allotment.expires_at - _expiry_margin():
+            _retire(allotment)
+    # Decide what to release BEFORE reading the queue: with no units in
+    # flight, every consumption of a retired lease is already committed.
+    releasable = {lease_id for lease_id, a in _retired.items() if a.in_flight == 0}
+    ours = {a.lease_id for a in _current.values()} | set(_retired)
+
+    # Our own rows, plus rows orphaned by a process that died holding a lease.
+    orphan_cutoff = datetime.now(timezone.utc) - timedelta(
+        seconds=settings.STOCK_LEASE_TTL_SECONDS + _expiry_margin(),
+    )
+    reported = 0
+    async with SessionLocal() as db:
+        queued = set((
+            await db.execute(
+                select(LeaseConsumption.lease_id).distinct().where(
+                    LeaseConsumption.rejected_at.is_(None),
+                    or_(
+                        LeaseConsumption.holder == HOLDER_ID,
+                        LeaseConsumption.created_at < orphan_cutoff,
+                    ),
+                )
+            )
+        ).scalars().all())
+        for lease_id in sorted(queued | releasable):
+            release = lease_id in releasable or lease_id not in ours
+            if await _reconcile(db, lease_id, release):
+                reported += 1
+                if release:
+                    _retired.pop(lease_id, None)
+    return reported
+
+
+async def _reconcile_loop() -> None:
+    while True:
+        try:
+            await asyncio.sleep(settings.STOCK_LEASE_RECONCILE_INTERVAL_SECONDS)
+            await run_reconcile_pass()
+        except asyncio.CancelledError:
+            break
+        except Exception as exc:
+            logger.error("Lease reconciliation failed: %s", exc)
+
+
+def start_allotments() -> None:
+    """Enable lease-backed confirmation and start the reconciler."""
+    if settings.TESTING:
+        logger.info("Stock allotments SKIPPED (TESTING=true)")
+        return
+    if settings.STOCK_LEASE_SIZE <= 0:
+        logger.info("Stock allotments disabled (STOCK_LEASE_SIZE=0)")
+        return
+    global _active, _reconcile_task
+    _active = True
+    _reconcile_task = asyncio.create_task(_reconcile_loop())
+    logger.info(
+        "Stock allotments enabled (lease=%d units ttl=%ss holder=%s)",
+        settings.STOCK_LEASE_SIZE, settings.STOCK_LEASE_TTL_SECONDS, HOLDER_ID,
+    )
+
+
+async def stop_allotments() -> None:
+    """Stop leasing and hand every unused unit back to stock-service."""
+    global _active, _reconcile_task
+    if _reconcile_task is None:
+        return
+    _active = False
+    _reconcile_task.cancel()
+    try:
+        await _reconcile_task
+    except asyncio.CancelledError:
+        pass
+    _reconcile_task = None
+    try:
+        await run_reconcile_pass(release_all=True)
+    except Exception as exc:
+        logger.error("Releasing stock leases on shutdown failed: %s", exc)
@@ -7,9 +7,13 @@ from fastapi.security import HTTPAuthorizationCredentials
 
 from app.core.config import settings
 from app.services.metrics import metrics
+from app.services.token_cache import VerifiedTokenCache
 
 logger = logging.getLogger(__name__)
 
+# Repeat callers skip the signature check (see services/token_cache.py).
+verified_tokens = VerifiedTokenCache(settings.JWT_CACHE_MAX_ENTRIES)
+
 
 def validate_token(
     credentials: HTTPAuthorizationCredentials | None,
@@ -32,6 +36,10 @@ def validate_token(
         )
 
     token = credentials.credentials
+    cached = verified_tokens.get(token)
+    if cached is not None:
+        return cached
+
     try:
         payload: dict[str, Any] = jwt.decode(
             token,
@@ -63,4 +71,5 @@ def validate_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    verified_tokens.put(token, payload)
     return payload
@@ -1,14 +1,51 @@
+"""
+Two-tier stock cache.
+
+L1 is a small in-process dict with a short TTL; L2 is Redis, shared by every
+gateway replica.  Reads try L1 first and only go to Redis on a miss, so the
+sold-out short-circuit for a hot item costs no network round trip.
+
+Whenever a replica writes a new level with :func:`set_cached_stock` it
+publishes the item_id on ``_INVALIDATION_CHANNEL``; every other replica drops
+its L1 entry on receipt.  If the subscription is down, the L1 TTL bounds how
+stale a replica can be.
+
+The refresh task (see ``stock_refresh``) also fills every item in bulk with
+:func:`set_cached_levels`.  Its snapshot may be older than a level an order
+wrote meanwhile, so it only fills keys that are missing (``SET NX``) and
+publishes invalidations for the keys it did write.
+"""
+import asyncio
+import json
 import logging
+import random
+import time
+import uuid
+from collections import OrderedDict
 from typing import Optional
 
 import redis.asyncio as aioredis
 
 from app.core.config import settings
+from app.services.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
 _STOCK_KEY_PREFIX = "stock:"
 _CACHE_TTL_SECONDS = 60
+_INVALIDATION_CHANNEL = "stock:invalidate"
+# Bulk refresh: one replica per period holds the lock; the time of the last
+# refresh is shared so every replica can report the cache age.
+_REFRESH_LOCK_KEY = "stock:refresh:lock"
+_REFRESHED_AT_KEY = "stock:refreshed_at"
+# Bulk-written TTLs are spread over ±20% so keys written together do not all
+# expire together if refreshes stop.
+_TTL_JITTER = 0.2
+_RESUBSCRIBE_DELAY_SECONDS = 1.0
+
+# Identifies this process on the invalidation channel so it can skip its
+# own messages (its L1 already holds the value it just wrote).
+_INSTANCE_ID = uuid.uuid4().hex
 
 # Shared connection pool — avoids creating a new TCP connection per call
 _pool = aioredis.ConnectionPool(
@@ -22,6 +59,59 @@ _pool = aioredis.ConnectionPool(
 )
 
 
+class _LocalCache:
+    """Bounded LRU of ``item_id → (quantity, expires_at)``.
+
+    Each item also carries a version that :meth:`evict` bumps, so a Redis
+    read that raced an invalidation cannot repopulate L1 with the old value
+    (see :meth:`put_if_current`).
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[int, float]] = OrderedDict()
+        self._versions: dict[str, int] = {}
+
+    def get(self, item_id: str) -> Optional[int]:
+        entry = self._entries.get(item_id)
+        if entry is None:
+            return None
+        quantity, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[item_id]
+            return None
+        self._entries.move_to_end(item_id)
+        return quantity
+
+    def put(self, item_id: str, quantity: int) -> None:
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        self._entries[item_id] = (quantity, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(item_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def version(self, item_id: str) -> int:
+        return self._versions.get(item_id, 0)
+
+    def put_if_current(self, item_id: str, quantity: int, version: int) -> None:
+        if self.version(item_id) == version:
+            self.put(item_id, quantity)
+
+    def evict(self, item_id: str) -> None:
+        self._entries.pop(item_id, None)
+        self._versions[item_id] = self.version(item_id) + 1
+
+    def clear(self) -> None:
+        for item_id in list(self._entries):
+            self.evict(item_id)
+
+
+_l1 = _LocalCache(settings.STOCK_L1_TTL_SECONDS, settings.STOCK_L1_MAX_ENTRIES)
+_invalidation_task: asyncio.Task | None = None
+
+
 def _make_key(item_id: str) -> str:
     return f"{_STOCK_KEY_PREFIX}{item_id}"
 
@@ -33,32 +123,203 @@ def _get_client() -> aioredis.Redis:
 async def get_cached_stock(item_id: str) -> Optional[int]:
     """
     Return the cached stock level for *item_id*, or ``None`` when:
-      - The key does not exist in Redis.
+      - The key is in neither the in-process L1 nor Redis.
       - Redis is unavailable (failure is logged, not raised).
     """
+    quantity = _l1.get(item_id)
+    if quantity is not None:
+        metrics.record_stock_cache_lookup("l1", hit=True)
+        return quantity
+    metrics.record_stock_cache_lookup("l1", hit=False)
+
+    version = _l1.version(item_id)
     try:
         client = _get_client()
         value = await client.get(_make_key(item_id))
-        if value is None:
-            return None
-        return int(value)
     except Exception as exc:
         logger.warning("Redis read failed for item '%s': %s", item_id, exc)
+        metrics.record_stock_cache_lookup("l2", hit=False)
+        return None
+    if value is None:
+        metrics.record_stock_cache_lookup("l2", hit=False)
         return None
+    metrics.record_stock_cache_lookup("l2", hit=True)
+    quantity = int(value)
+    _l1.put_if_current(item_id, quantity, version)
+    return quantity
 
 
 async def set_cached_stock(item_id: str, quantity: int) -> None:
     """
-    Write the stock level for *item_id* to Redis with a TTL.
+    Write the stock level for *item_id* to L1 and Redis, then tell the other
+    replicas to drop their L1 entry.
     Failures are logged and swallowed — never propagated to callers.
     """
+    _l1.evict(item_id)
+    _l1.put(item_id, quantity)
     try:
         client = _get_client()
         await client.set(_make_key(item_id), quantity, ex=_CACHE_TTL_SECONDS)
+        await client.publish(
+            _INVALIDATION_CHANNEL,
+            json.dumps({"item_id": item_id, "origin": _INSTANCE_ID}),
+        )
     except Exception as exc:
         logger.warning("Redis write failed for item '%s': %s", item_id, exc)
 
 
+async def set_cached_levels(levels: dict[str, int], refreshed_at: float) -> bool:
+    """
+    Fill the level of every item in *levels* that is missing from Redis, in
+    ONE pipeline with jittered TTLs, and record *refreshed_at* (epoch
+    seconds).  Keys already present were written by an order after the
+    snapshot was taken (or by an earlier refresh that has not expired), so
+    they are left alone.  Returns whether the write succeeded; failures are
+    logged, not raised.
+    """
+    try:
+        client = _get_client()
+        pipe = client.pipeline(transaction=False)
+        for item_id, quantity in levels.items():
+            ttl = _CACHE_TTL_SECONDS * random.uniform(1 - _TTL_JITTER, 1 + _TTL_JITTER)
+            pipe.set(_make_key(item_id), quantity, ex=int(ttl), nx=True)
+        pipe.set(_REFRESHED_AT_KEY, refreshed_at)
+        written = await pipe.execute()
+        filled = {
+            item_id: quantity
+            for (item_id, quantity), ok in zip(levels.items(), written)
+            if ok
+        }
+        if filled:
+            pipe = client.pipeline(transaction=False)
+            for item_id in filled:
+                pipe.publish(
+                    _INVALIDATION_CHANNEL,
+                    json.dumps({"item_id": item_id, "origin": _INSTANCE_ID}),
+                )
+            await pipe.execute()
+    except Exception as exc:
+        logger.warning("Redis bulk write of %d stock levels failed: %s", len(levels), exc)
+        return False
+    for item_id, quantity in filled.items():
+        _l1.evict(item_id)
+        _l1.put(item_id, quantity)
+    return True
+
+
+async def claim_stock_refresh(hold_seconds: float) -> bool:
+    """Take the refresh lock for *hold_seconds*; ``False`` if another replica has it."""
+    try:
+        return bool(await _get_client().set(
+            _REFRESH_LOCK_KEY, _INSTANCE_ID, nx=True, px=max(int(hold_seconds * 1000), 1),
+        ))
+    except Exception as exc:
+        logger.warning("Redis refresh lock failed: %s", exc)
+        return False
+
+
+async def release_stock_refresh() -> None:
+    try:
+        await _get_client().delete(_REFRESH_LOCK_KEY)
+    except Exception as exc:
+        logger.warning("Redis refresh unlock failed: %s", exc)
+
+
+async def stock_refreshed_at() -> Optional[float]:
+    """When any replica last refreshed the stock cache (epoch seconds)."""
+    try:
+        value = await _get_client().get(_REFRESHED_AT_KEY)
+    except Exception as exc:
+        logger.warning("Redis read of %s failed: %s", _REFRESHED_AT_KEY, exc)
+        return None
+    return float(value) if value is not None else None
+
+
+def _handle_invalidation(data: str) -> None:
+    try:
+        message = json.loads(data)
+        item_id = message["item_id"]
+    except (ValueError, KeyError, TypeError):
+        logger.warning("Ignoring malformed stock invalidation: %r", data)
+        return
+    if message.get("origin") != _INSTANCE_ID:
+        _l1.evict(item_id)
+
+
+async def _invalidation_loop() -> None:
+    while True:
+        pubsub = _get_client().pubsub()
+        try:
+            await pubsub.subscribe(_INVALIDATION_CHANNEL)
+            # Anything cached before (re)subscribing may have missed an
+            # invalidation while we were not listening.
+            _l1.clear()
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    _handle_invalidation(message["data"])
+        except asyncio.CancelledError:
+            break
+        except Exception as exc:
+            logger.warning("Stock invalidation subscription lost: %s", exc)
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+        _l1.clear()
+        await asyncio.sleep(_RESUBSCRIBE_DELAY_SECONDS)
+
+
+def start_cache_invalidation() -> None:
+    """Subscribe to L1 invalidations on the running event loop."""
+    if settings.TESTING:
+        logger.info("Stock cache invalidation SKIPPED (TESTING=true)")
+        return
+    global _invalidation_task
+    _invalidation_task = asyncio.create_task(_invalidation_loop())
+    logger.info(
+        "Stock L1 cache enabled (ttl=%ss max_entries=%d)",
+        settings.STOCK_L1_TTL_SECONDS,
+        settings.STOCK_L1_MAX_ENTRIES,
+    )
+
+
+async def stop_cache_invalidation() -> None:
+    global _invalidation_task
+    if _invalidation_task is not None:
+        _invalidation_task.cancel()
+        try:
+            await _invalidation_task
+        except asyncio.CancelledError:
+            pass
+        _invalidation_task = None
+
+
+def _breaker_key(name: str) -> str:
+    return f"breaker:{name}:open_until"
+
+
+async def get_shared_breaker_state(name: str) -> Optional[float]:
+    """Wall-clock time until which another replica opened breaker *name*, if any."""
+    try:
+        value = await _get_client().get(_breaker_key(name))
+        return float(value) if value is not None else None
+    except Exception as exc:
+        logger.warning("Redis read failed for breaker '%s': %s", name, exc)
+        return None
+
+
+async def set_shared_breaker_state(name: str, open_until: float) -> None:
+    """Tell the other replicas breaker *name* is open until *open_until*."""
+    ttl_ms = int((open_until - time.time()) * 1000)
+    if ttl_ms <= 0:
+        return
+    try:
+        await _get_client().set(_breaker_key(name), open_until, px=ttl_ms)
+    except Exception as exc:
+        logger.warning("Redis write failed for breaker '%s': %s", name, exc)
+
+
 async def redis_ping() -> bool:
     """Return ``True`` if Redis is reachable, ``False`` otherwise."""
     try:
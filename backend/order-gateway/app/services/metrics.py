@@ -1,15 +1,217 @@
 import logging
+import math
 import threading
 import time
-from dataclasses import dataclass, field
-from typing import List, Tuple
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List
 
 
 logger = logging.getLogger(__name__)
 
-_ROLLING_WINDOW_SECONDS: float = 30.0
+_ROLLING_WINDOW_SECONDS: int = 30
 _LATENCY_ALERT_THRESHOLD_MS: float = 1000.0
 
+# Latency histogram buckets: bucket k holds (2^((k-1)/4), 2^(k/4)] ms, i.e.
+# four per doubling (~19% wide, so percentiles are within ~10%), from
+# 2^-3 ms (anything faster lands in the first bucket) to 2^17 ms ~ 131 s
+# (anything slower lands in the last).
+_BUCKETS_PER_DOUBLING = 4
+_MIN_EXPONENT = -3 * _BUCKETS_PER_DOUBLING
+_MAX_EXPONENT = 17 * _BUCKETS_PER_DOUBLING
+_BUCKET_COUNT = _MAX_EXPONENT - _MIN_EXPONENT + 1
+PERCENTILES = (50, 95, 99)
+
+# place_order phases, with the backend each one mostly waits on.
+ORDER_PHASES: Dict[str, str] = {
+    "admission": "Redis",
+    "idempotency": "Postgres",
+    "cache": "Redis",
+    "stock": "stock-service",
+    "persist": "Postgres",
+}
+
+
+def _ratio(hits: int, misses: int) -> float:
+    total = hits + misses
+    return round(hits / total, 4) if total else 0.0
+
+
+def bucket_upper_bound(index: int) -> float:
+    """Inclusive upper edge (ms) of histogram bucket *index*."""
+    return 2.0 ** ((index + _MIN_EXPONENT) / _BUCKETS_PER_DOUBLING)
+
+
+def _bucket_index(latency_ms: float) -> int:
+    if latency_ms <= 0:
+        return 0
+    exponent = math.ceil(math.log2(latency_ms) * _BUCKETS_PER_DOUBLING)
+    return min(max(exponent, _MIN_EXPONENT), _MAX_EXPONENT) - _MIN_EXPONENT
+
+
+class _Histogram:
+    """Fixed log-bucketed latency histogram; recording is O(1)."""
+
+    __slots__ = ("counts", "count", "total_ms")
+
+    def __init__(self) -> None:
+        self.counts = [0] * _BUCKET_COUNT
+        self.count = 0
+        self.total_ms = 0.0
+
+    def record(self, latency_ms: float) -> None:
+        self.counts[_bucket_index(latency_ms)] += 1
+        self.count += 1
+        self.total_ms += latency_ms
+
+    def merge(self, other: "_Histogram") -> None:
+        for i, n in enumerate(other.counts):
+            if n:
+                self.counts[i] += n
+        self.count += other.count
+        self.total_ms += other.total_ms
+
+    def mean(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+    def to_state(self) -> dict:
+        return {
+            "counts": {str(i): n for i, n in enumerate(self.counts) if n},
+            "count": self.count,
+            "total_ms": self.total_ms,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "_Histogram":
+        histogram = cls()
+        for i, n in state["counts"].items():
+            histogram.counts[int(i)] = n
+        histogram.count = state["count"]
+        histogram.total_ms = state["total_ms"]
+        return histogram
+
+    def percentile(self, pct: float) -> float:
+        """Geometric midpoint of the bucket holding the *pct*-th percentile."""
+        if not self.count:
+            return 0.0
+        rank = max(math.ceil(self.count * pct / 100), 1)
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return bucket_upper_bound(i) * 2 ** (-0.5 / _BUCKETS_PER_DOUBLING)
+        return bucket_upper_bound(_BUCKET_COUNT - 1)
+
+
+class PhaseTimer:
+    """
+    Splits one request into consecutive phases.  :meth:`begin` closes the
+    running phase and starts the next, so an early return or exception
+    charges the time to the phase it happened in.
+    """
+
+    def __init__(self) -> None:
+        self._started = time.perf_counter()
+        self._phase: str | None = None
+        self._phase_started = self._started
+        self.durations_ms: Dict[str, float] = {}
+        # Set by the handler when the status code alone is ambiguous.
+        self.outcome: str | None = None
+
+    def begin(self, phase: str) -> None:
+        self._close()
+        self._phase = phase
+        self._phase_started = time.perf_counter()
+
+    def _close(self) -> None:
+        if self._phase is not None:
+            elapsed = (time.perf_counter() - self._phase_started) * 1000
+            self.durations_ms[self._phase] = self.durations_ms.get(self._phase, 0.0) + elapsed
+            self._phase = None
+
+    def finish(self) -> Dict[str, float]:
+        """Close the running phase and return ``{phase: ms}``."""
+        self._close()
+        return self.durations_ms
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` header value: every phase so far plus the total."""
+        self._close()
+        entries = [
+            f'{phase};desc="{ORDER_PHASES.get(phase, phase)}";dur={ms:.2f}'
+            for phase, ms in self.durations_ms.items()
+        ]
+        entries.append(f"total;dur={(time.perf_counter() - self._started) * 1000:.2f}")
+        return ", ".join(entries)
+
+
+def _prometheus_edges(histogram: _Histogram) -> List[tuple[float, int]]:
+    """
+    ``[(le_ms, cumulative count), ...]`` at the powers of two, which coincide
+    with bucket boundaries, so the cumulative counts are exact.
+    """
+    edges = []
+    cumulative = 0
+    for index, n in enumerate(histogram.counts[:-1]):
+        cumulative += n
+        if (index + _MIN_EXPONENT) % _BUCKETS_PER_DOUBLING == 0:
+            edges.append((bucket_upper_bound(index), cumulative))
+    return edges
+
+
+class _RollingHistogram:
+    """
+    The last ``window_seconds`` of latencies as a ring of one-second
+    histograms.  A slot is cleared when the ring comes back round to it, so
+    recording stays O(1) and nothing is ever rescanned per request.
+    """
+
+    def __init__(self, window_seconds: int) -> None:
+        self.window_seconds = window_seconds
+        self._slots = [_Histogram() for _ in range(window_seconds)]
+        self._slot_seconds = [-1] * window_seconds
+
+    def record(self, latency_ms: float, now: float) -> None:
+        second = int(now)
+        slot = second % self.window_seconds
+        if self._slot_seconds[slot] != second:
+            self._slots[slot] = _Histogram()
+            self._slot_seconds[slot] = second
+        self._slots[slot].record(latency_ms)
+
+    def merged(self, now: float) -> _Histogram:
+        oldest = int(now) - self.window_seconds + 1
+        merged = _Histogram()
+        for second, slot in zip(self._slot_seconds, self._slots):
+            if second >= oldest:
+                merged.merge(slot)
+        return merged
+
+    def to_state(self) -> dict:
+        return {
+            str(second): slot.to_state()
+            for second, slot in zip(self._slot_seconds, self._slots)
+            if slot.count
+        }
+
+    def merge_state(self, state: dict) -> None:
+        """Add another ring's slots; the monotonic clock is shared by processes."""
+        for key, slot_state in state.items():
+            second = int(key)
+            slot = second % self.window_seconds
+            if self._slot_seconds[slot] < second:
+                self._slots[slot] = _Histogram()
+                self._slot_seconds[slot] = second
+            if self._slot_seconds[slot] == second:
+                self._slots[slot].merge(_Histogram.from_state(slot_state))
+
+
+# Gauges combined across worker processes with max() instead of a sum: every
+# worker measures the same tables / relay backlog.
+_MERGED_BY_MAX = frozenset({
+    "_deduct_queue_delay_ms_max", "_outbox_lag_seconds", "_outbox_rows", "_idempotency_rows",
+    "_stock_cache_items", "_stock_cache_refreshed_at",
+})
+
 
 @dataclass
 class _Metrics:
@@ -20,9 +222,66 @@ class _Metrics:
     _auth_failures: int = 0
     _cache_short_circuits: int = 0
     _downstream_failures: int = 0
-    _latencies_ms: List[float] = field(default_factory=list)
-    # Each entry: (monotonic_timestamp, latency_ms)
-    _rolling_window: List[Tuple[float, float]] = field(default_factory=list)
+    # Orders confirmed against a local stock lease (no stock-service call)
+    _allotment_orders: int = 0
+    # Lease consumptions stock-service refused to record (kept for follow-up)
+    _lease_consumptions_rejected: int = 0
+    # Coalesced /stock/deduct calls: batches sent, lines in them, queueing delay
+    _deduct_batches: int = 0
+    _deduct_batched_lines: int = 0
+    _deduct_queue_delay_ms_total: float = 0.0
+    _deduct_queue_delay_ms_max: float = 0.0
+    # Group-committed orders: commits, orders in them, time spent committing
+    _order_commit_batches: int = 0
+    _order_commit_orders: int = 0
+    _order_commit_ms_total: float = 0.0
+    # Virtual waiting room: tickets handed out, tickets redeemed
+    _waiting_room_tickets: int = 0
+    _waiting_room_admitted: int = 0
+    # PENDING status notifications: confirmed, not confirmed, dropped when full
+    _status_published: int = 0
+    _status_publish_failures: int = 0
+    _status_dropped: int = 0
+    # Orders accepted before their stock was reserved, settled by stock-service
+    _reservations_confirmed: int = 0
+    _reservations_rejected: int = 0
+    # kitchen_events status updates applied to order_status_view
+    _status_events: int = 0
+    # Age of the oldest unpublished outbox row, refreshed by the relay.
+    _outbox_lag_seconds: float = 0.0
+    # Retention: table sizes and purge throughput, refreshed every pass.
+    _outbox_rows: int = 0
+    _idempotency_rows: int = 0
+    _retention_purged_total: int = 0
+    _retention_purge_rate: float = 0.0
+    # Stock cache lookups per tier: {"l1": [hits, misses], "l2": [hits, misses]}
+    _stock_cache_lookups: Dict[str, List[int]] = field(
+        default_factory=lambda: {"l1": [0, 0], "l2": [0, 0]}
+    )
+    # Bulk stock cache refreshes: done here, failed here, items in the last
+    # one, and when any replica last refreshed (epoch seconds, 0 = never)
+    _stock_cache_refreshes: int = 0
+    _stock_cache_refresh_failures: int = 0
+    _stock_cache_items: int = 0
+    _stock_cache_refreshed_at: float = 0.0
+    # GET /orders/{order_id} lookups answered from Redis vs the DB
+    _order_cache_hits: int = 0
+    _order_cache_misses: int = 0
+    # Order latency: since start, and over the last _ROLLING_WINDOW_SECONDS
+    _latency: _Histogram = field(default_factory=_Histogram)
+    _rolling_latency: _RollingHistogram = field(
+        default_factory=lambda: _RollingHistogram(_ROLLING_WINDOW_SECONDS)
+    )
+    # stock-service connection pool: wait for a connection, and new connects
+    _stock_pool_wait: _RollingHistogram = field(
+        default_factory=lambda: _RollingHistogram(_ROLLING_WINDOW_SECONDS)
+    )
+    _stock_pool_connects: _RollingHistogram = field(
+        default_factory=lambda: _RollingHistogram(_ROLLING_WINDOW_SECONDS)
+    )
+    # place_order phases: all-time per (phase, outcome), rolling per phase
+    _phase_latency: Dict[tuple[str, str], _Histogram] = field(default_factory=dict)
+    _rolling_phase_latency: Dict[str, _RollingHistogram] = field(default_factory=dict)
 
     def increment_total_attempts(self) -> None:
         with self._lock:
@@ -48,33 +307,212 @@ class _Metrics:
         with self._lock:
             self._downstream_failures += 1
 
+    def increment_allotment_orders(self) -> None:
+        with self._lock:
+            self._allotment_orders += 1
+
+    def increment_lease_consumptions_rejected(self, count: int = 1) -> None:
+        with self._lock:
+            self._lease_consumptions_rejected += count
+
+    def increment_waiting_room_tickets(self) -> None:
+        with self._lock:
+            self._waiting_room_tickets += 1
+
+    def increment_waiting_room_admitted(self) -> None:
+        with self._lock:
+            self._waiting_room_admitted += 1
+
+    def increment_status_events(self) -> None:
+        with self._lock:
+            self._status_events += 1
+
+    def record_stock_reservation(self, confirmed: bool) -> None:
+        with self._lock:
+            if confirmed:
+                self._reservations_confirmed += 1
+            else:
+                self._reservations_rejected += 1
+
+    def record_status_publish(self, published: int = 0, failed: int = 0, dropped: int = 0) -> None:
+        with self._lock:
+            self._status_published += published
+            self._status_publish_failures += failed
+            self._status_dropped += dropped
+
+    def record_deduction_batch(self, size: int, queue_delays_ms: List[float]) -> None:
+        with self._lock:
+            self._deduct_batches += 1
+            self._deduct_batched_lines += size
+            self._deduct_queue_delay_ms_total += sum(queue_delays_ms)
+            self._deduct_queue_delay_ms_max = max(
+                self._deduct_queue_delay_ms_max, *queue_delays_ms,
+            )
+
+    def record_order_commit_batch(self, size: int, commit_ms: float) -> None:
+        with self._lock:
+            self._order_commit_batches += 1
+            self._order_commit_orders += size
+            self._order_commit_ms_total += commit_ms
+
+    def set_outbox_lag(self, seconds: float) -> None:
+        with self._lock:
+            self._outbox_lag_seconds = max(seconds, 0.0)
+
+    def set_table_sizes(self, outbox_rows: int, idempotency_rows: int) -> None:
+        with self._lock:
+            self._outbox_rows = max(outbox_rows, 0)
+            self._idempotency_rows = max(idempotency_rows, 0)
+
+    def record_retention_pass(self, purged: int, elapsed_seconds: float) -> None:
+        with self._lock:
+            self._retention_purged_total += purged
+            self._retention_purge_rate = (
+                purged / elapsed_seconds if elapsed_seconds > 0 else 0.0
+            )
+
+    def record_stock_cache_lookup(self, tier: str, hit: bool) -> None:
+        with self._lock:
+            self._stock_cache_lookups[tier][0 if hit else 1] += 1
+
+    def record_stock_cache_refresh(self, items: int, refreshed_at: float) -> None:
+        with self._lock:
+            self._stock_cache_refreshes += 1
+            self._stock_cache_items = items
+            self._stock_cache_refreshed_at = max(self._stock_cache_refreshed_at, refreshed_at)
+
+    def increment_stock_cache_refresh_failures(self) -> None:
+        with self._lock:
+            self._stock_cache_refresh_failures += 1
+
+    def set_stock_cache_refreshed_at(self, refreshed_at: float) -> None:
+        """Another replica refreshed the cache at *refreshed_at*."""
+        with self._lock:
+            self._stock_cache_refreshed_at = max(self._stock_cache_refreshed_at, refreshed_at)
+
+    def record_order_cache_lookup(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self._order_cache_hits += 1
+            else:
+                self._order_cache_misses += 1
+
+    def record_stock_pool_acquire(self, wait_ms: float, connect_ms: float | None) -> None:
+        """One stock-service request got a connection; *connect_ms* if it opened one."""
+        with self._lock:
+            now = time.monotonic()
+            self._stock_pool_wait.record(wait_ms, now)
+            if connect_ms is not None:
+                self._stock_pool_connects.record(connect_ms, now)
+
     def record_latency(self, latency_ms: float) -> None:
+        with self._lock:
+            self._latency.record(latency_ms)
+            self._rolling_latency.record(latency_ms, time.monotonic())
+
+    def record_phases(self, outcome: str, durations_ms: Dict[str, float]) -> None:
+        """Record one order's per-phase durations under its *outcome*."""
         with self._lock:
             now = time.monotonic()
-            # All-time list (capped at 1 000 entries)
-            self._latencies_ms.append(latency_ms)
-            if len(self._latencies_ms) > 1000:
-                self._latencies_ms = self._latencies_ms[-1000:]
-            # Rolling 30-second window
-            self._rolling_window.append((now, latency_ms))
-            cutoff = now - _ROLLING_WINDOW_SECONDS
-            self._rolling_window = [
-                (ts, ms) for ts, ms in self._rolling_window if ts >= cutoff
+            for phase, ms in durations_ms.items():
+                histogram = self._phase_latency.get((phase, outcome))
+                if histogram is None:
+                    histogram = self._phase_latency[(phase, outcome)] = _Histogram()
+                histogram.record(ms)
+                rolling = self._rolling_phase_latency.get(phase)
+                if rolling is None:
+                    rolling = self._rolling_phase_latency[phase] = _RollingHistogram(
+                        _ROLLING_WINDOW_SECONDS,
+                    )
+                rolling.record(ms, now)
+
+    def latency_histogram(self) -> tuple[List[tuple[float, int]], int, float]:
+        """All-time ``([(le_ms, cumulative count), ...], count, sum_ms)`` for Prometheus."""
+        with self._lock:
+            return _prometheus_edges(self._latency), self._latency.count, self._latency.total_ms
+
+    def phase_histograms(self) -> List[tuple[str, str, List[tuple[float, int]], int, float]]:
+        """All-time ``(phase, outcome, edges, count, sum_ms)`` for Prometheus."""
+        with self._lock:
+            return [
+                (phase, outcome, _prometheus_edges(h), h.count, h.total_ms)
+                for (phase, outcome), h in sorted(self._phase_latency.items())
             ]
 
+    def state(self) -> Dict[str, Any]:
+        """Raw, JSON-serialisable state, for merging with other worker processes."""
+        with self._lock:
+            state: Dict[str, Any] = {}
+            for f in fields(self):
+                value = getattr(self, f.name)
+                if isinstance(value, (_Histogram, _RollingHistogram)):
+                    state[f.name] = value.to_state()
+                elif f.name == "_phase_latency":
+                    state[f.name] = {f"{p}|{o}": h.to_state() for (p, o), h in value.items()}
+                elif f.name == "_rolling_phase_latency":
+                    state[f.name] = {phase: h.to_state() for phase, h in value.items()}
+                elif f.name == "_stock_cache_lookups":
+                    state[f.name] = {tier: list(counts) for tier, counts in value.items()}
+                elif f.name != "_lock":
+                    state[f.name] = value
+            return state
+
+    def merge_state(self, state: Dict[str, Any]) -> None:
+        """
+        Add another process's :meth:`state` into this one: counters and
+        histograms are summed, gauges in ``_MERGED_BY_MAX`` take the max.
+        """
+        with self._lock:
+            for name, value in state.items():
+                current = getattr(self, name, None)
+                if isinstance(current, _Histogram):
+                    current.merge(_Histogram.from_state(value))
+                elif isinstance(current, _RollingHistogram):
+                    current.merge_state(value)
+                elif name == "_phase_latency":
+                    for key, h in value.items():
+                        phase, outcome = key.split("|", 1)
+                        self._phase_latency.setdefault((phase, outcome), _Histogram()).merge(
+                            _Histogram.from_state(h),
+                        )
+                elif name == "_rolling_phase_latency":
+                    for phase, h in value.items():
+                        self._rolling_phase_latency.setdefault(
+                            phase, _RollingHistogram(_ROLLING_WINDOW_SECONDS),
+                        ).merge_state(h)
+                elif name == "_stock_cache_lookups":
+                    for tier, counts in value.items():
+                        merged = self._stock_cache_lookups.setdefault(tier, [0, 0])
+                        merged[0] += counts[0]
+                        merged[1] += counts[1]
+                elif isinstance(current, (int, float)):
+                    merged = max(current, value) if name in _MERGED_BY_MAX else current + value
+                    setattr(self, name, merged)
+
     def snapshot(self) -> dict:
         with self._lock:
-            avg = (
-                sum(self._latencies_ms) / len(self._latencies_ms)
-                if self._latencies_ms
-                else 0.0
-            )
-            # Rolling-window average (only entries within the last 30 s)
             now = time.monotonic()
-            cutoff = now - _ROLLING_WINDOW_SECONDS
-            recent = [ms for ts, ms in self._rolling_window if ts >= cutoff]
-            rolling_avg = sum(recent) / len(recent) if recent else 0.0
+            rolling = self._rolling_latency.merged(now)
+            rolling_avg = rolling.mean()
             latency_alert = rolling_avg > _LATENCY_ALERT_THRESHOLD_MS
+            latency_percentiles = {
+                f"latency_p{pct}_ms": round(self._latency.percentile(pct), 3)
+                for pct in PERCENTILES
+            }
+            latency_percentiles.update({
+                f"rolling_p{pct}_ms": round(rolling.percentile(pct), 3)
+                for pct in PERCENTILES
+            })
+            phase_latency = {}
+            for phase in ORDER_PHASES:
+                phase_rolling = self._rolling_phase_latency.get(phase)
+                merged = phase_rolling.merged(now) if phase_rolling else _Histogram()
+                phase_latency[f"phase_{phase}_avg_ms"] = round(merged.mean(), 3)
+                phase_latency[f"phase_{phase}_p95_ms"] = round(merged.percentile(95), 3)
+            pool_wait = self._stock_pool_wait.merged(now)
+            pool_connects = self._stock_pool_connects.merged(now)
+            l1_hits, l1_misses = self._stock_cache_lookups["l1"]
+            l2_hits, l2_misses = self._stock_cache_lookups["l2"]
 
             return {
                 "total_orders": self._total_orders,
@@ -83,9 +521,62 @@ class _Metrics:
                 "auth_failures": self._auth_failures,
                 "cache_short_circuits": self._cache_short_circuits,
                 "downstream_failures": self._downstream_failures,
-                "average_response_time_ms": round(avg, 3),
+                "allotment_orders": self._allotment_orders,
+                "lease_consumptions_rejected": self._lease_consumptions_rejected,
+                "deduct_batches": self._deduct_batches,
+                "deduct_batch_avg_size": round(
+                    self._deduct_batched_lines / self._deduct_batches, 3,
+                ) if self._deduct_batches else 0.0,
+                "deduct_queue_delay_avg_ms": round(
+                    self._deduct_queue_delay_ms_total / self._deduct_batched_lines, 3,
+                ) if self._deduct_batched_lines else 0.0,
+                "deduct_queue_delay_max_ms": round(self._deduct_queue_delay_ms_max, 3),
+                "order_commit_batches": self._order_commit_batches,
+                "order_commit_batch_avg_size": round(
+                    self._order_commit_orders / self._order_commit_batches, 3,
+                ) if self._order_commit_batches else 0.0,
+                "order_commit_avg_ms": round(
+                    self._order_commit_ms_total / self._order_commit_batches, 3,
+                ) if self._order_commit_batches else 0.0,
+                "waiting_room_tickets": self._waiting_room_tickets,
+                "waiting_room_admitted": self._waiting_room_admitted,
+                "status_events_applied": self._status_events,
+                "stock_reservations_confirmed": self._reservations_confirmed,
+                "stock_reservations_rejected": self._reservations_rejected,
+                "status_events_published": self._status_published,
+                "status_publish_failures": self._status_publish_failures,
+                "status_events_dropped": self._status_dropped,
+                "average_response_time_ms": round(self._latency.mean(), 3),
                 "rolling_window_avg_ms": round(rolling_avg, 3),
                 "latency_alert": latency_alert,
+                **latency_percentiles,
+                **phase_latency,
+                "stock_pool_wait_avg_ms": round(pool_wait.mean(), 3),
+                "stock_pool_wait_p99_ms": round(pool_wait.percentile(99), 3),
+                "stock_pool_new_connections_per_sec": round(
+                    pool_connects.count / _ROLLING_WINDOW_SECONDS, 3,
+                ),
+                "stock_pool_connect_avg_ms": round(pool_connects.mean(), 3),
+                "outbox_lag_seconds": round(self._outbox_lag_seconds, 3),
+                "outbox_rows": self._outbox_rows,
+                "idempotency_rows": self._idempotency_rows,
+                "retention_purged_total": self._retention_purged_total,
+                "retention_purge_rate_per_sec": round(self._retention_purge_rate, 3),
+                "stock_cache_l1_hits": l1_hits,
+                "stock_cache_l1_misses": l1_misses,
+                "stock_cache_l1_hit_ratio": _ratio(l1_hits, l1_misses),
+                "stock_cache_l2_hits": l2_hits,
+                "stock_cache_l2_misses": l2_misses,
+                "stock_cache_l2_hit_ratio": _ratio(l2_hits, l2_misses),
+                "stock_cache_refreshes": self._stock_cache_refreshes,
+                "stock_cache_refresh_failures": self._stock_cache_refresh_failures,
+                "stock_cache_items": self._stock_cache_items,
+                "stock_cache_age_seconds": round(
+                    max(time.time() - self._stock_cache_refreshed_at, 0.0), 3,
+                ) if self._stock_cache_refreshed_at else 0.0,
+                "order_cache_hits": self._order_cache_hits,
+                "order_cache_misses": self._order_cache_misses,
+                "order_cache_hit_ratio": _ratio(self._order_cache_hits, self._order_cache_misses),
             }
 
 
@@ -1,11 +1,16 @@
+import asyncio
 import logging
 import threading
 import time
+from collections import deque
+from dataclasses import dataclass
 from typing import Any
 
 import httpx
 
 from app.core.config import settings
+from app.services.cache import get_shared_breaker_state, set_shared_breaker_state
+from app.services.metrics import _RollingHistogram, metrics
 
 logger = logging.getLogger(__name__)
 
@@ -13,130 +18,747 @@ logger = logging.getLogger(__name__)
 # ── Circuit Breaker ────────────────────────────────────────────────────────
 
 
+class StockServiceOverloaded(Exception):
+    """Raised instead of calling stock-service when the concurrency limit is full."""
+
+
+@dataclass
+class _Permit:
+    """One admitted call; ``probe`` marks a HALF_OPEN trial request."""
+    probe: bool
+    started: float
+
+
 class _CircuitBreaker:
     """
     Three-state circuit breaker: CLOSED → OPEN → HALF_OPEN → CLOSED.
 
-    While OPEN, requests are rejected immediately without hitting the
-    downstream service, preventing cascade failures.
+    CLOSED trips to OPEN when, over the last ``window_seconds`` and at least
+    ``min_calls`` calls, the failure rate reaches ``failure_rate`` or the
+    share of calls slower than ``slow_call_seconds`` reaches
+    ``slow_call_rate``.  While OPEN, requests are rejected immediately
+    without hitting the downstream service.  After ``recovery_timeout`` the
+    breaker admits at most ``half_open_probes`` trial requests: if they all
+    succeed it closes, and any failure re-opens it.
     """
 
-    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+    def __init__(
+        self,
+        window_seconds: float = 10.0,
+        min_calls: int = 10,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 1.0,
+        slow_call_rate: float = 0.8,
+        recovery_timeout: float = 30.0,
+        half_open_probes: int = 3,
+    ):
         self._lock = threading.Lock()
-        self._failure_threshold = failure_threshold
+        self._window = max(int(window_seconds), 1)
+        self._min_calls = min_calls
+        self._failure_rate = failure_rate
+        self._slow_call_seconds = slow_call_seconds
+        self._slow_call_rate = slow_call_rate
         self._recovery_timeout = recovery_timeout
-        self._failures = 0
+        self._half_open_probes = max(half_open_probes, 1)
+        # One [second, calls, failures, slow_calls] bucket per second.
+        self._buckets: deque[list[int]] = deque()
         self._state = "CLOSED"
-        self._opened_at = 0.0
+        self._open_until = 0.0              # time.monotonic()
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        # Wall-clock end of a local trip not yet shared with other replicas.
+        self._unpublished_trip: float | None = None
+
+    # -- sliding window --------------------------------------------------------
+
+    def _record(self, failed: bool, slow: bool) -> None:
+        second = int(time.monotonic())
+        if not self._buckets or self._buckets[-1][0] != second:
+            self._buckets.append([second, 0, 0, 0])
+        bucket = self._buckets[-1]
+        bucket[1] += 1
+        bucket[2] += int(failed)
+        bucket[3] += int(slow)
+        while self._buckets and self._buckets[0][0] <= second - self._window:
+            self._buckets.popleft()
+
+    def _trip_reason(self) -> str | None:
+        calls = sum(b[1] for b in self._buckets)
+        if calls < self._min_calls:
+            return None
+        if sum(b[2] for b in self._buckets) / calls >= self._failure_rate:
+            return "error rate"
+        if sum(b[3] for b in self._buckets) / calls >= self._slow_call_rate:
+            return "slow calls"
+        return None
+
+    def _record_and_check(self, failed: bool, slow: bool) -> None:
+        self._record(failed, slow)
+        reason = self._trip_reason()
+        if reason is not None:
+            self._trip(reason)
 
     # -- state transitions ---------------------------------------------------
 
-    def record_success(self) -> None:
+    def _open(self, seconds: float) -> None:
+        self._state = "OPEN"
+        self._open_until = time.monotonic() + seconds
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._buckets.clear()
+
+    def _trip(self, reason: str) -> None:
+        self._open(self._recovery_timeout)
+        self._unpublished_trip = time.time() + self._recovery_timeout
+        logger.warning(
+            "Circuit breaker OPEN (%s, recovery in %ds)", reason, self._recovery_timeout,
+        )
+
+    def _advance(self) -> None:
+        if self._state == "OPEN" and time.monotonic() >= self._open_until:
+            self._state = "HALF_OPEN"
+            logger.info("Circuit breaker HALF_OPEN — allowing %d probe(s)", self._half_open_probes)
+
+    def allow_request(self) -> _Permit | None:
+        """Admit a call (returning its permit) or ``None`` to reject it."""
         with self._lock:
-            self._failures = 0
-            self._state = "CLOSED"
+            self._advance()
+            if self._state == "CLOSED":
+                return _Permit(probe=False, started=time.monotonic())
+            if self._state == "HALF_OPEN" and (
+                self._probes_in_flight + self._probe_successes < self._half_open_probes
+            ):
+                self._probes_in_flight += 1
+                return _Permit(probe=True, started=time.monotonic())
+            return None
 
-    def record_failure(self) -> None:
+    def record_success(self, permit: _Permit) -> None:
+        slow = time.monotonic() - permit.started >= self._slow_call_seconds
         with self._lock:
-            self._failures += 1
-            if self._failures >= self._failure_threshold:
-                self._state = "OPEN"
-                self._opened_at = time.monotonic()
-                logger.warning(
-                    "Circuit breaker OPEN after %d failures (recovery in %ds)",
-                    self._failures, self._recovery_timeout,
-                )
+            if permit.probe:
+                if self._state != "HALF_OPEN":
+                    return
+                self._probes_in_flight -= 1
+                if slow:
+                    self._trip("slow probe")
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self._half_open_probes:
+                    self._state = "CLOSED"
+                    self._buckets.clear()
+                    logger.info("Circuit breaker CLOSED")
+                return
+            if self._state == "CLOSED":
+                self._record_and_check(failed=False, slow=slow)
 
-    def allow_request(self) -> bool:
+    def record_failure(self, permit: _Permit) -> None:
         with self._lock:
+            if permit.probe:
+                if self._state == "HALF_OPEN":
+                    self._trip("probe failed")
+                return
             if self._state == "CLOSED":
-                return True
-            if self._state == "OPEN":
-                if time.monotonic() - self._opened_at >= self._recovery_timeout:
-                    self._state = "HALF_OPEN"
-                    logger.info("Circuit breaker HALF_OPEN — allowing probe request")
-                    return True
-                return False
-            # HALF_OPEN — allow one probe request
-            return True
+                self._record_and_check(failed=True, slow=False)
+
+    def cancel(self, permit: _Permit) -> None:
+        """Forget a permit whose call never reached the downstream service."""
+        with self._lock:
+            if permit.probe and self._state == "HALF_OPEN":
+                self._probes_in_flight -= 1
+
+    # -- sharing across replicas ---------------------------------------------
+
+    def take_unpublished_trip(self) -> float | None:
+        """Wall-clock end of a local trip to publish, cleared once taken."""
+        with self._lock:
+            until, self._unpublished_trip = self._unpublished_trip, None
+            return until
+
+    def force_open(self, until: float) -> None:
+        """Open until wall-clock *until* because another replica tripped."""
+        with self._lock:
+            remaining = until - time.time()
+            if remaining > 0 and (
+                self._state != "OPEN" or time.monotonic() + remaining > self._open_until
+            ):
+                self._open(remaining)
+                logger.warning("Circuit breaker OPEN (tripped by another replica)")
 
     @property
     def state(self) -> str:
         with self._lock:
-            if (
-                self._state == "OPEN"
-                and time.monotonic() - self._opened_at >= self._recovery_timeout
-            ):
-                self._state = "HALF_OPEN"
+            self._advance()
             return self._state
 
 
-_breaker = _CircuitBreaker(failure_threshold=5, recovery_timeout=30)
+class _ConcurrencyLimiter:
+    """
+    AIMD limit on in-flight stock-service calls.
+
+    Every fast success raises the limit by ``1 / limit`` (about +1 per
+    round trip's worth of calls); a failure or a call slower than
+    ``slow_call_seconds`` multiplies it by ``backoff``.  Calls beyond the
+    limit are rejected at once instead of queueing until the timeout.
+    """
+
+    def __init__(
+        self,
+        initial: int = 50,
+        minimum: int = 4,
+        maximum: int = 200,
+        slow_call_seconds: float = 1.0,
+        backoff: float = 0.9,
+    ):
+        self._lock = threading.Lock()
+        self._min = minimum
+        self._max = max(maximum, minimum)
+        self._limit = float(min(max(initial, minimum), self._max))
+        self._slow_call_seconds = slow_call_seconds
+        self._backoff = backoff
+        self._in_flight = 0
+        self._shed = 0
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self._in_flight >= int(self._limit):
+                self._shed += 1
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self, latency_seconds: float, overloaded: bool) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if overloaded or latency_seconds >= self._slow_call_seconds:
+                self._limit = max(self._min, self._limit * self._backoff)
+            else:
+                self._limit = min(self._max, self._limit + 1.0 / self._limit)
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            return {
+                "stock_concurrency_limit": round(self._limit, 2),
+                "stock_in_flight": self._in_flight,
+                "stock_shed_total": self._shed,
+            }
+
+
+class _HedgePolicy:
+    """
+    When to hedge a deduction, and a retry budget that pays for it.
+
+    The hedge delay is the recent ``percentile`` latency of the endpoint
+    (refreshed once a second; ``None`` until ``min_samples`` calls have been
+    seen).  Every call adds ``budget_ratio`` of a token, up to
+    ``max_tokens``, and every hedge spends a whole one, so hedging adds at
+    most ``budget_ratio`` extra load even when stock-service is slow for
+    everyone.
+    """
+
+    def __init__(
+        self,
+        budget_ratio: float = 0.1,
+        percentile: float = 95.0,
+        min_delay_seconds: float = 0.01,
+        min_samples: int = 20,
+        max_tokens: float = 10.0,
+        window_seconds: int = 30,
+    ):
+        self._lock = threading.Lock()
+        self._budget_ratio = budget_ratio
+        self._percentile = percentile
+        self._min_delay = min_delay_seconds
+        self._min_samples = min_samples
+        self._max_tokens = max_tokens
+        self._window_seconds = window_seconds
+        self._tokens = 0.0
+        # Successful attempt latencies and the cached delay, per endpoint.
+        self._latency: dict[str, _RollingHistogram] = {}
+        self._delays: dict[str, tuple[float, float | None]] = {}
+        self._calls = 0
+        self._hedges = 0
+        self._wins = 0
+
+    def observe(self, path: str, latency_seconds: float) -> None:
+        with self._lock:
+            histogram = self._latency.get(path)
+            if histogram is None:
+                histogram = self._latency[path] = _RollingHistogram(self._window_seconds)
+            histogram.record(latency_seconds * 1000, time.monotonic())
+
+    def delay(self, path: str) -> float | None:
+        """Seconds to wait before hedging a call to *path*, or ``None``."""
+        if self._budget_ratio <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            refreshed, delay = self._delays.get(path, (0.0, None))
+            if now - refreshed >= 1.0:
+                histogram = self._latency.get(path)
+                merged = histogram.merged(now) if histogram else None
+                delay = None
+                if merged is not None and merged.count >= self._min_samples:
+                    delay = max(self._min_delay, merged.percentile(self._percentile) / 1000)
+                self._delays[path] = (now, delay)
+            return delay
+
+    def on_call(self) -> None:
+        with self._lock:
+            self._calls += 1
+            self._tokens = min(self._max_tokens, self._tokens + self._budget_ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            self._hedges += 1
+            return True
+
+    def record_win(self) -> None:
+        with self._lock:
+            self._wins += 1
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            return {
+                "stock_hedges_total": self._hedges,
+                "stock_hedge_wins_total": self._wins,
+                "stock_hedge_rate": round(self._hedges / self._calls, 4) if self._calls else 0.0,
+                "stock_hedge_win_rate": round(self._wins / self._hedges, 4) if self._hedges else 0.0,
+            }
+
+
+_breaker = _CircuitBreaker(
+    window_seconds=settings.BREAKER_WINDOW_SECONDS,
+    min_calls=settings.BREAKER_MIN_CALLS,
+    failure_rate=settings.BREAKER_FAILURE_RATE,
+    slow_call_seconds=settings.BREAKER_SLOW_CALL_MS / 1000.0,
+    slow_call_rate=settings.BREAKER_SLOW_CALL_RATE,
+    recovery_timeout=settings.BREAKER_RECOVERY_SECONDS,
+    half_open_probes=settings.BREAKER_HALF_OPEN_PROBES,
+)
+_limiter = _ConcurrencyLimiter(
+    initial=settings.STOCK_CONCURRENCY_INITIAL,
+    minimum=settings.STOCK_CONCURRENCY_MIN,
+    maximum=settings.STOCK_CONCURRENCY_MAX,
+    slow_call_seconds=settings.BREAKER_SLOW_CALL_MS / 1000.0,
+)
+_hedger = _HedgePolicy(
+    budget_ratio=settings.STOCK_HEDGE_BUDGET_RATIO,
+    percentile=settings.STOCK_HEDGE_PERCENTILE,
+    min_delay_seconds=settings.STOCK_HEDGE_MIN_DELAY_MS / 1000.0,
+)
+
+# Shared breaker state (BREAKER_SHARED): how often we look at Redis.
+_SHARED_SYNC_SECONDS = 1.0
+_last_shared_sync = 0.0
+_BREAKER_NAME = "stock-service"
+
+
+async def _sync_shared_breaker() -> None:
+    """Publish a local trip to Redis, or adopt one made by another replica."""
+    global _last_shared_sync
+    if not settings.BREAKER_SHARED:
+        return
+    until = _breaker.take_unpublished_trip()
+    if until is not None:
+        await set_shared_breaker_state(_BREAKER_NAME, until)
+        return
+    now = time.monotonic()
+    if now - _last_shared_sync < _SHARED_SYNC_SECONDS:
+        return
+    _last_shared_sync = now
+    remote = await get_shared_breaker_state(_BREAKER_NAME)
+    if remote is not None:
+        _breaker.force_open(remote)
+
+
+def stock_client_stats() -> dict[str, float]:
+    """Breaker, concurrency-limit, hedging and connection-pool figures for /metrics."""
+    return {
+        "stock_breaker_open": int(_breaker.state != "CLOSED"),
+        **_limiter.stats(),
+        **_hedger.stats(),
+        **_stock_pool_stats(),
+    }
 
 
 # ── HTTP client ────────────────────────────────────────────────────────────
 
 
 def _timeout() -> httpx.Timeout:
-    seconds = settings.GATEWAY_TIMEOUT_MS / 1000.0
-    return httpx.Timeout(seconds)
+    return httpx.Timeout(
+        settings.GATEWAY_TIMEOUT_MS / 1000.0,
+        connect=settings.STOCK_CONNECT_TIMEOUT_MS / 1000.0,
+        pool=settings.STOCK_POOL_TIMEOUT_MS / 1000.0,
+    )
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.STOCK_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.STOCK_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=settings.STOCK_POOL_KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+class _PoolTracingTransport(httpx.AsyncHTTPTransport):
+    """
+    Transport that reports, through httpcore's ``trace`` extension, how long
+    each request waited for a pooled connection and how long new connections
+    took to open.
+    """
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        connect_started: float | None = None
+
+        async def trace(event_name: str, info: dict[str, Any]) -> None:
+            nonlocal connect_started
+            if event_name == "connection.connect_tcp.started":
+                connect_started = time.perf_counter()
+            elif event_name.endswith(".send_request_headers.started"):
+                # The request has its connection: everything before the
+                # connect (or before now, on a reused one) was pool wait.
+                now = time.perf_counter()
+                acquired = connect_started if connect_started is not None else now
+                metrics.record_stock_pool_acquire(
+                    (acquired - started) * 1000,
+                    (now - connect_started) * 1000 if connect_started is not None else None,
+                )
+
+        request.extensions = {**request.extensions, "trace": trace}
+        return await super().handle_async_request(request)
+
+    def pool_stats(self) -> dict[str, int]:
+        # ``_pool`` / ``connections`` are httpcore internals: report zeros
+        # rather than fail /metrics if a release moves them.
+        connections = getattr(getattr(self, "_pool", None), "connections", None)
+        if connections is None:
+            return {"stock_pool_connections": 0, "stock_pool_in_use": 0}
+        return {
+            "stock_pool_connections": len(connections),
+            "stock_pool_in_use": sum(1 for c in connections if not c.is_idle()),
+        }
+
+
+def _transport() -> _PoolTracingTransport:
+    http2 = settings.STOCK_HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("STOCK_HTTP2 is set but the h2 package is missing — using HTTP/1.1")
+            http2 = False
+    return _PoolTracingTransport(limits=_limits(), http2=http2)
 
 
 # Shared connection-pool client — created lazily, reused across requests.
 _client: httpx.AsyncClient | None = None
+_pool_transport: _PoolTracingTransport | None = None
 
 
 def _get_client() -> httpx.AsyncClient:
-    global _client
+    global _client, _pool_transport
     if _client is None or _client.is_closed:
+        _pool_transport = _transport()
         _client = httpx.AsyncClient(
+            transport=_pool_transport,
             timeout=_timeout(),
             headers={"X-Internal-Key": settings.INTERNAL_API_KEY},
         )
     return _client
 
 
+def _stock_pool_stats() -> dict[str, int]:
+    """Open and busy stock-service connections, for /metrics."""
+    if _client is None or _client.is_closed or _pool_transport is None:
+        return {"stock_pool_connections": 0, "stock_pool_in_use": 0}
+    return _pool_transport.pool_stats()
+
+
 async def close_http_client() -> None:
-    global _client
+    global _client, _pool_transport
     if _client and not _client.is_closed:
         await _client.aclose()
     _client = None
+    _pool_transport = None
 
 
-async def deduct_stock(order_id: str, item_id: str, quantity: int) -> dict[str, Any]:
+async def _post_deduction(path: str, payload: dict[str, Any]) -> dict[str, Any]:
     """
-    Call stock-service to atomically verify and decrement stock.
-
-    The circuit breaker rejects requests immediately when the downstream
-    service has been failing, preventing connection-pool exhaustion.
-
-    Raises:
-        httpx.HTTPStatusError  — for any 4xx / 5xx response from stock-service.
-        httpx.TimeoutException — when the call exceeds GATEWAY_TIMEOUT_MS.
-        httpx.ConnectError     — when the circuit breaker is OPEN.
+    POST a deduction to stock-service through the circuit breaker and the
+    adaptive concurrency limit.
     """
-    if not _breaker.allow_request():
+    await _sync_shared_breaker()
+    permit = _breaker.allow_request()
+    if permit is None:
         raise httpx.ConnectError("Circuit breaker OPEN — stock service unavailable")
+    if not _limiter.try_acquire():
+        _breaker.cancel(permit)
+        raise StockServiceOverloaded("Too many stock-service calls in flight")
 
-    url = f"{settings.STOCK_SERVICE_URL.rstrip('/')}/stock/deduct"
-    payload = {"order_id": order_id, "item_id": item_id, "quantity": quantity}
-
+    url = f"{settings.STOCK_SERVICE_URL.rstrip('/')}{path}"
+    overloaded = True
     try:
         client = _get_client()
         response = await client.post(url, json=payload)
         response.raise_for_status()
-        _breaker.record_success()
+        overloaded = False
+        _breaker.record_success(permit)
         return response.json()
+    except httpx.PoolTimeout as exc:
+        # Our own pool is exhausted — says nothing about stock-service health.
+        _breaker.cancel(permit)
+        raise StockServiceOverloaded("No free stock-service connection") from exc
     except (httpx.TimeoutException, httpx.ConnectError, OSError) as exc:
-        _breaker.record_failure()
+        _breaker.record_failure(permit)
         raise
     except httpx.HTTPStatusError as exc:
         # Only trip the breaker on server errors (5xx), not client errors (4xx)
         if exc.response.status_code >= 500:
-            _breaker.record_failure()
+            _breaker.record_failure(permit)
         else:
-            _breaker.record_success()
+            overloaded = False
+            _breaker.record_success(permit)
         raise
+    finally:
+        _limiter.release(time.monotonic() - permit.started, overloaded)
+        await _sync_shared_breaker()
+
+
+# ── Hedged deductions ──────────────────────────────────────────────────────
+
+
+def _is_final(exc: BaseException) -> bool:
+    """A 4xx is stock-service's answer; a hedge would only repeat it."""
+    return isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code < 500
+
+
+def _discard(task: asyncio.Future) -> None:
+    if not task.cancelled():
+        task.exception()
+
+
+async def _timed_deduction(path: str, payload: dict[str, Any]) -> dict[str, Any]:
+    started = time.monotonic()
+    result = await _post_deduction(path, payload)
+    _hedger.observe(path, time.monotonic() - started)
+    return result
+
+
+async def _post_hedged(path: str, payload: dict[str, Any]) -> dict[str, Any]:
+    """
+    :func:`_post_deduction` with a hedge: if stock-service has not answered
+    within the hedge delay and the retry budget allows, the same deduction
+    is sent again and the first success (or 4xx) is returned.  Deductions
+    are idempotent on ``(order_id, item_id)``, so both may land safely; the
+    slower attempt is left to finish in the background.
+    """
+    delay = _hedger.delay(path)
+    _hedger.on_call()
+    if delay is None:
+        return await _timed_deduction(path, payload)
+
+    primary = asyncio.ensure_future(_timed_deduction(path, payload))
+    attempts = [primary]
+    try:
+        done, _ = await asyncio.wait(attempts, timeout=delay)
+        if done or not _hedger.try_spend():
+            return await primary
+        hedge = asyncio.ensure_future(_timed_deduction(path, payload))
+        attempts.append(hedge)
+
+        pending: set[asyncio.Future] = set(attempts)
+        first_error: BaseException | None = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in attempts:
+                if task not in done:
+                    continue
+                exc = task.exception()
+                if exc is None or _is_final(exc):
+                    if task is hedge:
+                        _hedger.record_win()
+                    return task.result()
+                first_error = first_error or exc
+        raise first_error
+    finally:
+        for task in attempts:
+            if not task.done():
+                task.add_done_callback(_discard)
+
+
+# ── Deduction coalescer ────────────────────────────────────────────────────
+
+
+def _line_error(line: dict[str, Any], request: httpx.Request) -> httpx.HTTPStatusError:
+    """Turn a failed batch line into the error a direct /stock/deduct would raise."""
+    response = httpx.Response(
+        line["status_code"], json={"detail": line.get("detail")}, request=request,
+    )
+    return httpx.HTTPStatusError(
+        f"Stock deduction failed with {line['status_code']}", request=request, response=response,
+    )
+
+
+# Most lines stock-service accepts in one /stock/deduct/batch call.
+_BATCH_MAX_LINES = 100
+
+
+class _DeductionCoalescer:
+    """
+    Buffer single-order deductions for up to ``window_ms`` (or until
+    ``max_size`` are waiting) and send them as ONE non-atomic
+    ``/stock/deduct/batch`` call.  Each caller gets its own line's result,
+    or the same exception ``/stock/deduct`` would have raised.
+    """
+
+    def __init__(self, window_ms: float, max_size: int):
+        self._window = window_ms / 1000.0
+        self._max_size = min(max_size, _BATCH_MAX_LINES)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        # (payload, future, time.perf_counter() when queued)
+        self._pending: list[tuple[dict[str, Any], asyncio.Future, float]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        # The loop only keeps weak references to tasks; hold the sends here.
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, payload: dict[str, Any]) -> dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop, self._pending, self._timer, self._tasks = loop, [], None, set()
+        future = loop.create_future()
+        self._pending.append((payload, future, time.perf_counter()))
+        if len(self._pending) >= self._max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: list[tuple[dict[str, Any], asyncio.Future, float]]) -> None:
+        sent_at = time.perf_counter()
+        metrics.record_deduction_batch(
+            len(batch), [(sent_at - queued) * 1000 for _, _, queued in batch],
+        )
+        try:
+            if len(batch) == 1:
+                results = [await _post_hedged("/stock/deduct", batch[0][0])]
+            else:
+                body = await _post_hedged(
+                    "/stock/deduct/batch",
+                    {"lines": [payload for payload, _, _ in batch], "atomic": False},
+                )
+                results = body["results"]
+        except Exception as exc:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        request = httpx.Request("POST", f"{settings.STOCK_SERVICE_URL.rstrip('/')}/stock/deduct")
+        for (_, future, _), line in zip(batch, results):
+            if future.done():       # caller went away (e.g. request cancelled)
+                continue
+            if line.get("status_code", 200) >= 400:
+                future.set_exception(_line_error(line, request))
+            else:
+                future.set_result(line)
+        # A short ``results`` list must not leave callers waiting forever.
+        missing = {"status_code": 502, "detail": "Stock service returned no result for this order"}
+        for _, future, _ in batch[len(results):]:
+            if not future.done():
+                future.set_exception(_line_error(missing, request))
+
+
+_coalescer = _DeductionCoalescer(
+    settings.DEDUCT_BATCH_WINDOW_MS, settings.DEDUCT_BATCH_MAX_SIZE,
+)
+
+
+async def deduct_stock(order_id: str, item_id: str, quantity: int) -> dict[str, Any]:
+    """
+    Call stock-service to atomically verify and decrement stock.
+
+    Concurrent calls are coalesced into one batched request (see
+    :class:`_DeductionCoalescer`) unless DEDUCT_BATCH_WINDOW_MS is 0, and a
+    call slower than usual is hedged (see :func:`_post_hedged`).
+
+    The circuit breaker rejects requests immediately when the downstream
+    service has been failing, preventing connection-pool exhaustion.
+
+    Raises:
+        httpx.HTTPStatusError  — for any 4xx / 5xx response from stock-service.
+        httpx.TimeoutException — when the call exceeds GATEWAY_TIMEOUT_MS.
+        httpx.ConnectError     — when the circuit breaker is OPEN.
+    """
+    payload = {"order_id": order_id, "item_id": item_id, "quantity": quantity}
+    if settings.DEDUCT_BATCH_WINDOW_MS <= 0 or settings.DEDUCT_BATCH_MAX_SIZE <= 1:
+        return await _post_hedged("/stock/deduct", payload)
+    return await _coalescer.submit(payload)
+
+
+async def deduct_stock_batch(
+    order_id: str, lines: list[dict[str, Any]],
+) -> dict[str, Any]:
+    """
+    Deduct every ``{"item_id", "quantity"}`` line of a cart in ONE call to
+    stock-service (all-or-nothing, see ``POST /stock/deduct/batch``).
+
+    Returns the stock-service body, whose ``results`` list carries one entry
+    (with ``remaining_stock``) per line.  Raises like :func:`deduct_stock`.
+    """
+    return await _post_hedged(
+        "/stock/deduct/batch",
+        {"lines": [{"order_id": order_id, **line} for line in lines]},
+    )
+
+
+async def acquire_lease(
+    item_id: str, quantity: int, holder: str, ttl_seconds: int,
+) -> dict[str, Any]:
+    """
+    Lease up to *quantity* units of *item_id* (``POST /stock/leases``).
+
+    Returns the stock-service body with ``lease_id``, ``granted`` and
+    ``remaining_stock``.  Raises like :func:`deduct_stock`; 409 = sold out.
+    """
+    return await _post_deduction(
+        "/stock/leases",
+        {"item_id": item_id, "holder": holder, "quantity": quantity, "ttl_seconds": ttl_seconds},
+    )
+
+
+async def reconcile_lease(
+    lease_id: str, lines: list[dict[str, Any]], release: bool = False,
+) -> dict[str, Any]:
+    """
+    Report the ``{"order_id", "quantity"}`` lines confirmed against a lease;
+    with *release*, close it and return the unconsumed units to inventory.
+    """
+    return await _post_deduction(
+        f"/stock/leases/{lease_id}/reconcile",
+        {"lines": lines, "release": release},
+    )
+
+
+async def fetch_stock_levels() -> dict[str, int]:
+    """``{item_id: quantity}`` for every stocked item, in ONE stock-service call."""
+    url = f"{settings.STOCK_SERVICE_URL.rstrip('/')}/stock/levels"
+    response = await _get_client().get(url)
+    response.raise_for_status()
+    return {str(item_id): int(quantity) for item_id, quantity in response.json()["levels"].items()}
 
 
 async def stock_health_ping() -> bool:
@@ -0,0 +1,155 @@
+"""
+Gateway-owned order status projection.
+
+Consumes ``order.status`` events from the ``kitchen_events`` exchange (the
+same events the notification-service pushes to students) on a queue of its
+own, and keeps the latest pipeline status of each order in
+``order_status_view``.  ``GET /orders`` joins that table instead of reading
+another service's schema, and every change is pushed to the single-order
+cache (see ``order_tracking``).
+
+Every gateway replica consumes from the one durable queue, so each event is
+applied once; applying one twice is harmless anyway, because a status only
+replaces a lower-ranked one (see ``PIPELINE_STATUS_RANK``).
+
+Stock-service's STOCK_VERIFIED / REJECTED events also settle orders that were
+accepted before their stock was reserved (see ``reservation``), in the same
+transaction as the projection.
+"""
+import asyncio
+import json
+import logging
+import uuid
+from datetime import datetime, timezone
+
+import aio_pika
+from aio_pika.abc import AbstractIncomingMessage
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.order_status import PIPELINE_STATUS_RANK, OrderStatusView
+from app.services import reservation
+from app.services.metrics import metrics
+from app.services.order_tracking import record_status_change
+
+logger = logging.getLogger(__name__)
+
+EXCHANGE_NAME = "kitchen_events"
+QUEUE_NAME = "gateway_status_queue"
+ROUTING_KEY = "order.status"
+_PREFETCH_COUNT = 50
+_RECONNECT_DELAY_SECONDS = 5.0
+
+_connection: aio_pika.abc.AbstractRobustConnection | None = None
+_consumer_task: asyncio.Task | None = None
+
+
+async def apply_status(db: AsyncSession, order_id: uuid.UUID, status: str) -> bool:
+    """
+    Record *status* for *order_id* unless a later pipeline status is already
+    stored.  Unknown statuses rank lowest, so they only fill an empty slot.
+    Returns whether the stored status changed; the caller commits.
+    """
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    stmt = insert(OrderStatusView).values(
+        order_id=order_id,
+        status=status,
+        status_rank=PIPELINE_STATUS_RANK.get(status, 0),
+        updated_at=datetime.now(timezone.utc),
+    )
+    result = await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[OrderStatusView.order_id],
+            set_={
+                "status": stmt.excluded.status,
+                "status_rank": stmt.excluded.status_rank,
+                "updated_at": stmt.excluded.updated_at,
+            },
+            where=OrderStatusView.status_rank < stmt.excluded.status_rank,
+        )
+    )
+    return result.rowcount > 0
+
+
+async def _on_message(message: AbstractIncomingMessage) -> None:
+    from app.core.database import SessionLocal
+
+    try:
+        data = json.loads(message.body.decode())
+        order_id = uuid.UUID(str(data["order_id"]))
+        status = str(data["status"])
+    except (ValueError, KeyError, TypeError):
+        logger.warning("Dropping malformed status event: %r", message.body[:200])
+        await message.ack()
+        return
+
+    try:
+        async with SessionLocal() as db:
+            changed = await apply_status(db, order_id, status)
+            settled = await reservation.apply_result(db, order_id, status, data)
+            await db.commit()
+    except Exception as exc:
+        logger.warning("Failed to record status for order %s: %s — requeueing", order_id, exc)
+        await message.nack(requeue=True)
+        return
+    metrics.increment_status_events()
+    await message.ack()
+    if settled:
+        await reservation.update_cached_stock(data)
+    if changed:
+        await record_status_change(order_id, status)
+
+
+async def _consume() -> None:
+    """Connect (retrying until RabbitMQ is up) and start consuming."""
+    global _connection
+    while True:
+        try:
+            _connection = await aio_pika.connect_robust(settings.RABBITMQ_URL)
+            break
+        except Exception as exc:
+            logger.warning("Status consumer cannot reach RabbitMQ, retrying: %s", exc)
+            await asyncio.sleep(_RECONNECT_DELAY_SECONDS)
+
+    channel = await _connection.channel()
+    await channel.set_qos(prefetch_count=_PREFETCH_COUNT)
+    exchange = await channel.declare_exchange(
+        EXCHANGE_NAME, aio_pika.ExchangeType.TOPIC, durable=True,
+    )
+    queue = await channel.declare_queue(QUEUE_NAME, durable=True)
+    await queue.bind(exchange, routing_key=ROUTING_KEY)
+    await queue.consume(_on_message)
+    logger.info(
+        "Order status consumer started — queue=%s exchange=%s key=%s",
+        QUEUE_NAME, EXCHANGE_NAME, ROUTING_KEY,
+    )
+
+
+def start_status_consumer() -> None:
+    """Start projecting pipeline status events on the running event loop."""
+    if settings.TESTING:
+        logger.info("Order status consumer SKIPPED (TESTING=true)")
+        return
+    from app.core.database import SessionLocal
+
+    if SessionLocal is None:
+        logger.warning("Order status consumer disabled: no DATABASE_URL")
+        return
+    global _consumer_task
+    _consumer_task = asyncio.create_task(_consume())
+
+
+async def stop_status_consumer() -> None:
+    global _connection, _consumer_task
+    if _consumer_task is not None:
+        _consumer_task.cancel()
+        try:
+            await _consumer_task
+        except asyncio.CancelledError:
+            pass
+        _consumer_task = None
+    if _connection is not None and not _connection.is_closed:
+        await _connection.close()
+    _connection = None
@@ -0,0 +1,231 @@
+"""
+Single-order status lookups for ``GET /orders/{order_id}``.
+
+Each order is cached in a Redis hash ``order:{order_id}``:
+
+  ``summary``  the immutable order fields (JSON), filled from the DB on a miss
+  ``status`` / ``rank``  latest pipeline status, written by the status consumer
+
+Both writers go through one Lua script that only replaces ``status`` with a
+higher-ranked one, so a DB read racing a status event can never put an older
+status back.  A lookup is answered from Redis when both parts are present and
+from the DB otherwise.
+
+Status changes are also announced on ``_CHANGED_CHANNEL``; every replica
+listens and wakes its long-polling requests for that order.  Long polls
+re-check every ``_RECHECK_SECONDS`` anyway, so a missed announcement only
+delays an answer, it never loses one.
+"""
+import asyncio
+import json
+import logging
+import uuid
+from typing import Any, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.models.order import GatewayOrder
+from app.models.order_status import PIPELINE_STATUS_RANK, OrderStatusView
+from app.services.cache import _get_client
+from app.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_ORDER_KEY_PREFIX = "order:"
+_ORDER_TTL_SECONDS = 3600
+_CHANGED_CHANNEL = "order:status:changed"
+_RECHECK_SECONDS = 5.0
+_RESUBSCRIBE_DELAY_SECONDS = 1.0
+
+# KEYS: order hash
+# ARGV: status ("" = leave as is), rank, ttl (s), summary JSON ("" = leave as is)
+# Returns {summary or false, status or false}
+_MERGE_SCRIPT = """
+if ARGV[1] ~= '' then
+  local current = tonumber(redis.call('HGET', KEYS[1], 'rank') or '-1')
+  if tonumber(ARGV[2]) > current then
+    redis.call('HSET', KEYS[1], 'status', ARGV[1], 'rank', ARGV[2])
+  end
+end
+if ARGV[4] ~= '' then
+  redis.call('HSET', KEYS[1], 'summary', ARGV[4])
+end
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[3]))
+return redis.call('HMGET', KEYS[1], 'summary', 'status')
+"""
+
+# order_id → events of the long polls waiting on it (this process only)
+_waiters: dict[str, set[asyncio.Event]] = {}
+_listener_task: asyncio.Task | None = None
+
+
+def _make_key(order_id: uuid.UUID) -> str:
+    return f"{_ORDER_KEY_PREFIX}{order_id}"
+
+
+def etag(status: str) -> str:
+    """Entity tag of an order; only its status ever changes."""
+    return f'"{status}"'
+
+
+def _merge(summary_json: Optional[str], status: Optional[str]) -> Optional[dict[str, Any]]:
+    if not summary_json or not status:
+        return None
+    return {**json.loads(summary_json), "status": status}
+
+
+async def _merge_entry(
+    order_id: uuid.UUID, status: Optional[str], summary: Optional[dict[str, Any]] = None,
+) -> Optional[dict[str, Any]]:
+    summary_json, cached_status = await _get_client().eval(
+        _MERGE_SCRIPT,
+        1,
+        _make_key(order_id),
+        status or "",
+        PIPELINE_STATUS_RANK.get(status, 0) if status else 0,
+        _ORDER_TTL_SECONDS,
+        json.dumps(summary) if summary is not None else "",
+    )
+    return _merge(summary_json, cached_status)
+
+
+async def _read_entry(order_id: uuid.UUID) -> Optional[dict[str, Any]]:
+    summary_json, status = await _get_client().hmget(_make_key(order_id), "summary", "status")
+    return _merge(summary_json, status)
+
+
+async def _read_db(
+    db_factory: async_sessionmaker[AsyncSession], order_id: uuid.UUID,
+) -> Optional[tuple[dict[str, Any], str]]:
+    db = db_factory()
+    try:
+        row = (
+            await db.execute(
+                select(GatewayOrder, OrderStatusView.status)
+                .outerjoin(OrderStatusView, OrderStatusView.order_id == GatewayOrder.order_id)
+                .where(GatewayOrder.order_id == order_id)
+            )
+        ).first()
+    finally:
+        await db.close()
+    if row is None:
+        return None
+    order, status = row
+    summary = {
+        "order_id": str(order.order_id),
+        "student_id": order.student_id,
+        "item_id": order.item_id,
+        "quantity": order.quantity,
+        "items": order.items,
+        "created_at": order.created_at.isoformat(),
+    }
+    return summary, status or "PENDING"
+
+
+async def load_order(
+    db_factory: async_sessionmaker[AsyncSession], order_id: uuid.UUID,
+) -> Optional[dict[str, Any]]:
+    """
+    The order with its latest pipeline status (plus ``student_id``), or
+    ``None`` when it does not exist.  Redis first; on a miss the DB row is
+    read in a short-lived session and cached.
+    """
+    try:
+        cached = await _read_entry(order_id)
+    except Exception as exc:
+        logger.warning("Redis read failed for order %s: %s", order_id, exc)
+        cached = None
+    metrics.record_order_cache_lookup(hit=cached is not None)
+    if cached is not None:
+        return cached
+
+    found = await _read_db(db_factory, order_id)
+    if found is None:
+        return None
+    summary, status = found
+    try:
+        # The cached status wins when a newer event has already landed.
+        merged = await _merge_entry(order_id, status, summary)
+        if merged is not None:
+            return merged
+    except Exception as exc:
+        logger.warning("Redis write failed for order %s: %s", order_id, exc)
+    return {**summary, "status": status}
+
+
+async def record_status_change(order_id: uuid.UUID, status: str) -> None:
+    """
+    Refresh the cached status of *order_id* and wake long polls on every
+    replica.  Called by the status consumer after the DB projection moved.
+    Failures are logged and swallowed.
+    """
+    _wake(str(order_id))
+    try:
+        await _merge_entry(order_id, status)
+        await _get_client().publish(_CHANGED_CHANNEL, str(order_id))
+    except Exception as exc:
+        logger.warning("Redis update failed for order %s: %s", order_id, exc)
+
+
+def _wake(order_id: str) -> None:
+    for event in _waiters.get(order_id, ()):
+        event.set()
+
+
+async def wait_for_change(order_id: uuid.UUID, timeout: float) -> None:
+    """Return when *order_id*'s status may have changed, or after *timeout*."""
+    key = str(order_id)
+    event = asyncio.Event()
+    _waiters.setdefault(key, set()).add(event)
+    try:
+        await asyncio.wait_for(event.wait(), timeout=min(timeout, _RECHECK_SECONDS))
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        waiters = _waiters.get(key)
+        if waiters is not None:
+            waiters.discard(event)
+            if not waiters:
+                del _waiters[key]
+
+
+async def _listen_loop() -> None:
+    while True:
+        pubsub = _get_client().pubsub()
+        try:
+            await pubsub.subscribe(_CHANGED_CHANNEL)
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    _wake(message["data"])
+        except asyncio.CancelledError:
+            break
+        except Exception as exc:
+            logger.warning("Order status subscription lost: %s", exc)
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+        await asyncio.sleep(_RESUBSCRIBE_DELAY_SECONDS)
+
+
+def start_order_tracking() -> None:
+    """Listen for status-change announcements on the running event loop."""
+    if settings.TESTING:
+        logger.info("Order status listener SKIPPED (TESTING=true)")
+        return
+    global _listener_task
+    _listener_task = asyncio.create_task(_listen_loop())
+
+
+async def stop_order_tracking() -> None:
+    global _listener_task
+    if _listener_task is not None:
+        _listener_task.cancel()
+        try:
+            await _listener_task
+        except asyncio.CancelledError:
+            pass
+        _listener_task = None
@@ -0,0 +1,253 @@
+"""
+Persistence of confirmed orders (phase 4 of ``place_order``).
+
+A confirmed order is one ``gateway_orders`` row, the CONFIRMED update of its
+idempotency key, its ``order.placed`` outbox row and, when it was served
+from a stock lease, a ``stock_lease_consumptions`` row — all in one
+transaction.  An order accepted before its stock is reserved (see
+``services/reservation.py``) is written the same way, as RECEIVED and with an
+``order.received`` event for stock-service instead.
+
+By default every order commits on its own.  With ORDER_GROUP_COMMIT_LINGER_MS
+> 0 orders are handed to a group-commit writer instead: it waits that long
+(or until ORDER_GROUP_COMMIT_MAX_BATCH orders are queued) and commits the
+whole batch in ONE transaction with multi-row statements, so a burst costs
+one commit instead of one per order.  Each caller returns only once its
+batch has committed; if a batch fails, its orders are retried one by one so
+a single bad row cannot fail its neighbours.  A caller cancelled while its
+order is queued still waits for the batch to settle, then sees the
+cancellation — with ``committed`` telling whether the order was saved.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.models.idempotency import IdempotencyKey, IdempotencyStatus
+from app.models.order import GatewayOrder, OrderStatus
+from app.services import allotment
+from app.services.metrics import metrics
+from app.services.queue import RESERVE_ROUTING_KEY, ROUTING_KEY, order_events_insert
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ConfirmedOrder:
+    order_id: uuid.UUID
+    student_id: str
+    # For carts item_id / quantity describe the first line; ``items`` has all.
+    item_id: str
+    quantity: int
+    items: list[dict[str, Any]] | None = None
+    lease: allotment.Allotment | None = None
+    # RECEIVED while stock-service has yet to reserve the stock.
+    status: str = OrderStatus.CONFIRMED.value
+    # Set once the order's transaction has committed.
+    committed: bool = False
+
+    @property
+    def event_type(self) -> str:
+        return ROUTING_KEY if self.status == OrderStatus.CONFIRMED.value else RESERVE_ROUTING_KEY
+
+    def order_row(self, now: datetime) -> dict[str, Any]:
+        # Python-side column defaults are not applied inside a CTE or a
+        # multi-row VALUES, so every defaulted column is set here.
+        return {
+            "id": uuid.uuid4(),
+            "order_id": self.order_id,
+            "student_id": self.student_id,
+            "item_id": self.item_id,
+            "quantity": self.quantity,
+            "items": self.items,
+            "status": self.status,
+            "created_at": now,
+        }
+
+    def response_payload(self) -> dict[str, str]:
+        return {"order_id": str(self.order_id), "status": self.status}
+
+    def event(self) -> dict[str, Any]:
+        event = {
+            "order_id": str(self.order_id),
+            "item_id": self.item_id,
+            "quantity": self.quantity,
+            "student_id": self.student_id,
+        }
+        if self.items is not None:
+            event["items"] = self.items
+        return event
+
+
+async def persist(db: AsyncSession, order: ConfirmedOrder) -> None:
+    """
+    Write one confirmed order in the caller's transaction.  On PostgreSQL
+    the order, idempotency and outbox writes go out as ONE statement
+    (data-modifying CTEs); other dialects run them back to back.  The
+    caller commits.
+    """
+    now = datetime.now(timezone.utc)
+    order_stmt = insert(GatewayOrder).values(order.order_row(now))
+    idem_stmt = (
+        update(IdempotencyKey)
+        .where(IdempotencyKey.order_id == order.order_id)
+        .values(
+            status=IdempotencyStatus.CONFIRMED.value,
+            response_payload=order.response_payload(),
+            updated_at=now,
+        )
+    )
+    # Outbox: event is written in the SAME transaction as the order
+    outbox_stmt = order_events_insert(db, [order.event()], order.event_type)
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(
+            outbox_stmt.add_cte(order_stmt.cte("new_order"), idem_stmt.cte("confirmed_key"))
+        )
+    else:
+        for stmt in (order_stmt, idem_stmt, outbox_stmt):
+            await db.execute(stmt)
+    if order.lease is not None:
+        allotment.record_consumption(db, order.lease, order.order_id, order.quantity)
+
+
+async def persist_batch(db: AsyncSession, orders: list[ConfirmedOrder]) -> None:
+    """Write *orders* with one multi-row statement per table.  The caller commits."""
+    now = datetime.now(timezone.utc)
+    await db.execute(insert(GatewayOrder).values([order.order_row(now) for order in orders]))
+    await db.execute(
+        update(IdempotencyKey.__table__)
+        .where(IdempotencyKey.__table__.c.order_id == bindparam("b_order_id"))
+        .values(
+            status=IdempotencyStatus.CONFIRMED.value,
+            response_payload=bindparam("b_payload"),
+            updated_at=now,
+        ),
+        [{"b_order_id": order.order_id, "b_payload": order.response_payload()} for order in orders],
+    )
+    for event_type in {order.event_type for order in orders}:
+        events = [order.event() for order in orders if order.event_type == event_type]
+        await db.execute(order_events_insert(db, events, event_type))
+    for order in orders:
+        if order.lease is not None:
+            allotment.record_consumption(db, order.lease, order.order_id, order.quantity)
+
+
+async def _commit_one(
+    db_factory: async_sessionmaker[AsyncSession], order: ConfirmedOrder,
+) -> None:
+    db = db_factory()
+    try:
+        await persist(db, order)
+        await db.commit()
+        order.committed = True
+    finally:
+        await db.close()
+
+
+class _GroupCommitWriter:
+    """
+    Queue confirmed orders for up to ``linger_ms`` (or until ``max_batch``
+    are waiting) and commit them together; shaped like the deduction
+    coalescer in ``services/order.py``.
+    """
+
+    def __init__(self, linger_ms: float, max_batch: int):
+        self._linger = linger_ms / 1000.0
+        self._max_batch = max_batch
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._factory: async_sessionmaker[AsyncSession] | None = None
+        self._pending: list[tuple[ConfirmedOrder, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        # The loop only keeps weak references to tasks; hold the commits here.
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(
+        self, db_factory: async_sessionmaker[AsyncSession], order: ConfirmedOrder,
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop, self._pending, self._timer, self._tasks = loop, [], None, set()
+        if db_factory is not self._factory:
+            self._flush()
+            self._factory = db_factory
+        future = loop.create_future()
+        self._pending.append((order, future))
+        if len(self._pending) >= self._max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._linger, self._flush)
+        # Once queued the order commits with its batch whether or not the
+        # caller still waits.  On cancellation, wait for the batch to settle
+        # (so ``order.committed`` is final for allotment.hold()), then
+        # re-raise the cancellation.
+        cancelled = False
+        while not future.done():
+            try:
+                await asyncio.shield(future)
+            except asyncio.CancelledError:
+                cancelled = True
+        if cancelled:
+            future.exception()          # consumed: the cancellation wins
+            raise asyncio.CancelledError
+        future.result()
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._commit(self._factory, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _commit(
+        self,
+        db_factory: async_sessionmaker[AsyncSession],
+        batch: list[tuple[ConfirmedOrder, asyncio.Future]],
+    ) -> None:
+        started = time.perf_counter()
+        db = db_factory()
+        try:
+            await persist_batch(db, [order for order, _ in batch])
+            await db.commit()
+        except Exception as exc:
+            await db.rollback()
+            if len(batch) > 1:
+                logger.warning(
+                    "Group commit of %d orders failed, retrying one by one: %s", len(batch), exc,
+                )
+                await asyncio.gather(*(self._commit(db_factory, [entry]) for entry in batch))
+                return
+            _, future = batch[0]
+            if not future.done():
+                future.set_exception(exc)
+            return
+        finally:
+            await db.close()
+
+        metrics.record_order_commit_batch(len(batch), (time.perf_counter() - started) * 1000)
+        for order, future in batch:
+            order.committed = True
+            if not future.done():       # caller went away (e.g. request cancelled)
+                future.set_result(None)
+
+
+_writer = _GroupCommitWriter(
+    settings.ORDER_GROUP_COMMIT_LINGER_MS, settings.ORDER_GROUP_COMMIT_MAX_BATCH,
+)
+
+
+async def write(db_factory: async_sessionmaker[AsyncSession], order: ConfirmedOrder) -> None:
+    """Persist *order* and return once it has committed."""
+    if settings.ORDER_GROUP_COMMIT_LINGER_MS <= 0 or settings.ORDER_GROUP_COMMIT_MAX_BATCH <= 1:
+        await _commit_one(db_factory, order)
+        return
+    await _writer.submit(db_factory, order)
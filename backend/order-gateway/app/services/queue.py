@@ -3,17 +3,34 @@ Transactional outbox for reliable order event delivery.
 
 During order placement the event is written to the ``outbox_events`` table
 in the **same** DB transaction as the order itself.  A background relay task
-polls unpublished rows and publishes them to RabbitMQ, giving at-least-once
-delivery with zero fire-and-forget message loss.
+publishes unpublished rows to RabbitMQ, giving at-least-once delivery with
+zero fire-and-forget message loss.
+
+The relay is woken the moment an outbox row is committed (falling back to a
+slow poll for rows committed by other replicas), and claims rows with
+``FOR UPDATE SKIP LOCKED`` so any number of gateway replicas can relay in
+parallel without publishing the same row twice.
+
+PENDING status notifications go through a bounded in-process queue drained
+by a few worker tasks, which publish them in batches.  When the queue is
+full new notifications are dropped and counted: they only light up the live
+tracker early, and the kitchen's own status events follow anyway.
+
+The relay and the status workers publish over ONE AMQP connection, through a
+shared pool of publisher-confirm channels.
 """
 import asyncio
 import json
 import logging
+import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, AsyncIterator
 
 import aio_pika
-from sqlalchemy.orm import Session
+from aio_pika.pool import Pool
+from sqlalchemy import Insert, event as sa_event, false, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.models.outbox import OutboxEvent
@@ -21,30 +38,42 @@ from app.services.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
-# Module-level connection / channel — initialised lazily.
+# Module-level connection and channel pool — initialised lazily.
 _connection: aio_pika.abc.AbstractRobustConnection | None = None
-_channel: aio_pika.abc.AbstractChannel | None = None
-_exchange: aio_pika.abc.AbstractExchange | None = None
+_connection_lock: asyncio.Lock | None = None
+_channel_pool: Pool | None = None
 _relay_task: asyncio.Task | None = None
+# Set after a transaction containing an outbox row commits.
+_relay_wakeup: asyncio.Event | None = None
 
 EXCHANGE_NAME = "order_events"
 ROUTING_KEY = "order.placed"
-_RELAY_INTERVAL_SECONDS = 1
-_RELAY_BATCH_SIZE = 50
+# Orders waiting for stock-service to reserve their stock (async reservation).
+RESERVE_ROUTING_KEY = "order.received"
+# Fallback poll — only matters for rows whose committing replica died
+# before relaying them; local commits wake the relay immediately.
+_RELAY_INTERVAL_SECONDS = 5
+# The relay batch size adapts to the backlog between these bounds.
+_RELAY_BATCH_MIN = 50
+_RELAY_BATCH_MAX = 1000
+# Max publishes awaiting a broker confirm at once.
+_RELAY_MAX_IN_FLIGHT = 200
+_relay_batch_size = _RELAY_BATCH_MIN
 
 NOTIFY_EXCHANGE_NAME = "kitchen_events"
 NOTIFY_ROUTING_KEY = "order.status"
 
-# Separate connection for direct status notifications to kitchen_events
-_notify_connection: aio_pika.abc.AbstractRobustConnection | None = None
-_notify_channel: aio_pika.abc.AbstractChannel | None = None
-_notify_exchange: aio_pika.abc.AbstractExchange | None = None
+# Status notifications waiting for a worker; None until the workers start.
+_status_queue: asyncio.Queue | None = None
+_status_workers: list[asyncio.Task] = []
+# Max notifications a worker publishes per channel checkout.
+_STATUS_BATCH_MAX = 100
 
 
 # ── Outbox write — called INSIDE the caller's transaction ──────────────────
 
 
-def publish_order_event(db: Session, event: dict[str, Any]) -> None:
+def publish_order_event(db: AsyncSession, event: dict[str, Any]) -> None:
     """
     Write an order event to the outbox table.
 
@@ -57,106 +86,237 @@ def publish_order_event(db: Session, event: dict[str, Any]) -> None:
         payload=event,
     )
     db.add(outbox)
+    sa_event.listen(db.sync_session, "after_commit", _wake_relay, once=True)
+
+
+def order_events_insert(
+    db: AsyncSession, events: list[dict[str, Any]], event_type: str = ROUTING_KEY,
+) -> Insert:
+    """
+    Like :func:`publish_order_event`, but return ONE multi-row outbox
+    ``INSERT`` for the caller to execute with its own statements (it may run
+    inside a CTE, so every defaulted column is set).  The relay is woken on
+    commit, and publishes the rows with *event_type* as routing key.
+    """
+    sa_event.listen(db.sync_session, "after_commit", _wake_relay, once=True)
+    now = datetime.now(timezone.utc)
+    return insert(OutboxEvent).values([
+        {
+            "id": uuid.uuid4(),
+            "aggregate_id": str(event.get("order_id", "")),
+            "event_type": event_type,
+            "payload": event,
+            "created_at": now,
+            "published": False,
+        }
+        for event in events
+    ])
+
+
+def _wake_relay(_session: Any = None) -> None:
+    """Wake the relay loop (runs as an ``after_commit`` hook)."""
+    if _relay_wakeup is not None:
+        _relay_wakeup.set()
 
 
 # ── RabbitMQ connection management ─────────────────────────────────────────
 
 
-async def _ensure_channel() -> aio_pika.abc.AbstractExchange:
-    """Return (or create) a durable topic exchange on a persistent connection."""
-    global _connection, _channel, _exchange
+async def _get_connection() -> aio_pika.abc.AbstractRobustConnection:
+    """Return (or open) the shared connection, declaring both exchanges."""
+    global _connection, _connection_lock
+    if _connection_lock is None:
+        _connection_lock = asyncio.Lock()
+    async with _connection_lock:
+        if _connection is None or _connection.is_closed:
+            _connection = await aio_pika.connect_robust(settings.RABBITMQ_URL)
+            channel = await _connection.channel()
+            for name in (EXCHANGE_NAME, NOTIFY_EXCHANGE_NAME):
+                await channel.declare_exchange(name, aio_pika.ExchangeType.TOPIC, durable=True)
+            await channel.close()
+            logger.info("RabbitMQ exchanges '%s', '%s' ready", EXCHANGE_NAME, NOTIFY_EXCHANGE_NAME)
+    return _connection
 
-    if _exchange is not None and _connection is not None and not _connection.is_closed:
-        return _exchange
 
-    _connection = await aio_pika.connect_robust(settings.RABBITMQ_URL)
-    _channel = await _connection.channel()
-    _exchange = await _channel.declare_exchange(
-        EXCHANGE_NAME, aio_pika.ExchangeType.TOPIC, durable=True,
-    )
-    logger.info("RabbitMQ exchange '%s' ready", EXCHANGE_NAME)
-    return _exchange
+async def _new_channel() -> aio_pika.abc.AbstractChannel:
+    connection = await _get_connection()
+    return await connection.channel(publisher_confirms=True)
+
+
+@asynccontextmanager
+async def _exchange(name: str) -> AsyncIterator[aio_pika.abc.AbstractExchange]:
+    """Borrow a publisher-confirm channel from the pool, as exchange *name*."""
+    global _channel_pool
+    if _channel_pool is None:
+        _channel_pool = Pool(_new_channel, max_size=settings.AMQP_CHANNEL_POOL_SIZE)
+    async with _channel_pool.acquire() as channel:
+        # Declared when the connection opened — no round trip here.
+        yield await channel.get_exchange(name, ensure=False)
 
 
 async def close_rabbitmq() -> None:
-    """Gracefully stop relay and close the RabbitMQ connection."""
-    global _connection, _channel, _exchange, _relay_task, _notify_connection, _notify_channel, _notify_exchange
-    if _relay_task is not None:
-        _relay_task.cancel()
+    """Gracefully stop the relay and status workers and close the connection."""
+    global _connection, _channel_pool, _relay_task, _status_queue
+    tasks = ([_relay_task] if _relay_task is not None else []) + _status_workers
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
         try:
-            await _relay_task
+            await task
         except asyncio.CancelledError:
             pass
-        _relay_task = None
+    _relay_task = None
+    _status_workers.clear()
+    _status_queue = None
+    if _channel_pool is not None:
+        await _channel_pool.close()
+    _channel_pool = None
     if _connection and not _connection.is_closed:
         await _connection.close()
-    _connection = _channel = _exchange = None
-    if _notify_connection and not _notify_connection.is_closed:
-        await _notify_connection.close()
-    _notify_connection = _notify_channel = _notify_exchange = None
+    _connection = None
     logger.info("RabbitMQ connection closed")
 
 
 # ── Outbox relay (background task) ─────────────────────────────────────────
 
 
+def _next_batch_size(limit: int, claimed: int) -> int:
+    """Grow the batch while the outbox is backlogged, shrink it when idle."""
+    if claimed >= limit:
+        return min(limit * 2, _RELAY_BATCH_MAX)
+    if claimed < limit // 4:
+        return max(limit // 2, _RELAY_BATCH_MIN)
+    return limit
+
+
+async def _publish_confirmed(
+    exchange: aio_pika.abc.AbstractExchange, events: list[OutboxEvent],
+) -> list[uuid.UUID]:
+    """
+    Publish *events* concurrently and return the IDs the broker confirmed.
+
+    The channel runs in publisher-confirm mode, so each ``publish`` resolves
+    only once RabbitMQ has taken responsibility for the message; issuing
+    them concurrently pipelines the confirms instead of paying one broker
+    round trip per event.
+    """
+    in_flight = asyncio.Semaphore(min(len(events), _RELAY_MAX_IN_FLIGHT))
+
+    async def _publish(event: OutboxEvent) -> uuid.UUID:
+        async with in_flight:
+            await exchange.publish(
+                aio_pika.Message(
+                    body=json.dumps(event.payload).encode(),
+                    content_type="application/json",
+                    delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                ),
+                routing_key=event.event_type,
+            )
+        return event.id
+
+    results = await asyncio.gather(*(_publish(e) for e in events), return_exceptions=True)
+    confirmed = [r for r in results if not isinstance(r, BaseException)]
+    failed = len(results) - len(confirmed)
+    if failed:
+        metrics.increment_downstream_failures()
+        logger.error(
+            "Outbox relay: %d of %d publish(es) not confirmed — will retry",
+            failed, len(results),
+        )
+    return confirmed
+
+
 async def _relay_batch() -> int:
     """Publish one batch of pending outbox events.  Returns count published."""
+    global _relay_batch_size
     from app.core.database import SessionLocal
 
     if SessionLocal is None:
         return 0
 
+    limit = _relay_batch_size
     db = SessionLocal()
     try:
-        pending = (
-            db.query(OutboxEvent)
-            .filter(OutboxEvent.published.is_(False))
+        # Rows stay locked until commit; other replicas skip them instead of
+        # waiting or publishing them a second time.
+        result = await db.execute(
+            select(OutboxEvent)
+            .where(OutboxEvent.published == false())
             .order_by(OutboxEvent.created_at)
-            .limit(_RELAY_BATCH_SIZE)
-            .all()
+            .limit(limit)
+            .with_for_update(skip_locked=True)
         )
+        pending = result.scalars().all()
+        _relay_batch_size = _next_batch_size(limit, len(pending))
         if not pending:
             return 0
 
-        exchange = await _ensure_channel()
-        published = 0
-        for event in pending:
-            body = json.dumps(event.payload).encode()
-            await exchange.publish(
-                aio_pika.Message(
-                    body=body,
-                    content_type="application/json",
-                    delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
-                ),
-                routing_key=ROUTING_KEY,
+        async with _exchange(EXCHANGE_NAME) as exchange:
+            confirmed = await _publish_confirmed(exchange, pending)
+        if confirmed:
+            # One bulk UPDATE for the whole batch instead of one per row.
+            await db.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id.in_(confirmed))
+                .values(published=True, published_at=datetime.now(timezone.utc))
+                .execution_options(synchronize_session=False)
             )
-            event.published = True
-            event.published_at = datetime.now(timezone.utc)
-            published += 1
-        db.commit()
-        if published:
-            logger.info("Outbox relay published %d event(s)", published)
-        return published
+        await db.commit()
+        if confirmed:
+            logger.info("Outbox relay published %d event(s)", len(confirmed))
+        return len(confirmed)
     except Exception as exc:
-        db.rollback()
+        await db.rollback()
         metrics.increment_downstream_failures()
         logger.error("Outbox relay error: %s", exc)
         return 0
     finally:
-        db.close()
+        await db.close()
+
+
+async def _record_outbox_lag() -> None:
+    """Publish the age of the oldest unpublished outbox row as a metric."""
+    from app.core.database import SessionLocal
+
+    if SessionLocal is None:
+        return
+
+    async with SessionLocal() as db:
+        oldest = (
+            await db.execute(
+                select(func.min(OutboxEvent.created_at))
+                .where(OutboxEvent.published == false())
+            )
+        ).scalar()
+    if oldest is None:
+        metrics.set_outbox_lag(0.0)
+        return
+    if oldest.tzinfo is None:
+        oldest = oldest.replace(tzinfo=timezone.utc)
+    metrics.set_outbox_lag((datetime.now(timezone.utc) - oldest).total_seconds())
 
 
 async def _relay_loop() -> None:
-    """Continuously poll the outbox and publish pending events to RabbitMQ."""
+    """Publish pending events whenever woken (or every poll interval)."""
+    assert _relay_wakeup is not None
     while True:
+        # Clear BEFORE relaying so a commit that lands mid-batch re-wakes us.
+        _relay_wakeup.clear()
+        limit = _relay_batch_size
+        published = 0
         try:
-            await _relay_batch()
+            published = await _relay_batch()
+            await _record_outbox_lag()
         except asyncio.CancelledError:
             break
         except Exception as exc:
             logger.error("Outbox relay loop error: %s", exc)
-        await asyncio.sleep(_RELAY_INTERVAL_SECONDS)
+        if published >= limit:
+            continue  # backlog — keep draining without waiting
+        try:
+            await asyncio.wait_for(_relay_wakeup.wait(), timeout=_RELAY_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
 
 
 def start_outbox_relay() -> None:
@@ -164,56 +324,80 @@ def start_outbox_relay() -> None:
     if settings.TESTING:
         logger.info("Outbox relay SKIPPED (TESTING=true)")
         return
-    global _relay_task
+    global _relay_task, _relay_wakeup
+    _relay_wakeup = asyncio.Event()
     _relay_task = asyncio.create_task(_relay_loop())
-    logger.info("Outbox relay started (interval=%ds)", _RELAY_INTERVAL_SECONDS)
-
-
-# ── Direct status notification publisher ───────────────────────────────────
+    logger.info("Outbox relay started (push-driven, fallback poll=%ds)", _RELAY_INTERVAL_SECONDS)
 
 
-async def _ensure_notify_exchange() -> aio_pika.abc.AbstractExchange:
-    """Return (or create) a connection to the ``kitchen_events`` exchange."""
-    global _notify_connection, _notify_channel, _notify_exchange
-    if (
-        _notify_exchange is not None
-        and _notify_connection is not None
-        and not _notify_connection.is_closed
-    ):
-        return _notify_exchange
-    _notify_connection = await aio_pika.connect_robust(settings.RABBITMQ_URL)
-    _notify_channel = await _notify_connection.channel()
-    _notify_exchange = await _notify_channel.declare_exchange(
-        NOTIFY_EXCHANGE_NAME, aio_pika.ExchangeType.TOPIC, durable=True,
-    )
-    logger.info("RabbitMQ exchange '%s' ready", NOTIFY_EXCHANGE_NAME)
-    return _notify_exchange
+# ── Status notification publisher ──────────────────────────────────────────
 
 
-async def publish_status_event(payload: dict[str, Any]) -> None:
-    """Publish a pipeline status notification directly to ``kitchen_events``.
+def publish_status_event(payload: dict[str, Any]) -> None:
+    """Queue a pipeline status notification for ``kitchen_events``.
 
     Used by the gateway to emit PENDING immediately after an order is persisted,
     so the frontend live tracker can light up step 1 without waiting for
-    the kitchen service to consume the order.
+    the kitchen service to consume the order.  Never blocks: when the queue
+    is full the notification is dropped and counted.
     """
-    if settings.TESTING:
+    if _status_queue is None:
         return
+    try:
+        _status_queue.put_nowait(payload)
+    except asyncio.QueueFull:
+        metrics.record_status_publish(dropped=1)
+
 
+def status_queue_depth() -> int:
+    return _status_queue.qsize() if _status_queue is not None else 0
+
+
+async def _publish_status_batch(payloads: list[dict[str, Any]]) -> int:
+    """Publish *payloads* on one pooled channel; returns how many the broker confirmed."""
     try:
-        exchange = await _ensure_notify_exchange()
-        body = json.dumps(payload).encode()
-        await exchange.publish(
-            aio_pika.Message(
-                body=body,
-                content_type="application/json",
-                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
-            ),
-            routing_key=NOTIFY_ROUTING_KEY,
-        )
-        logger.info(
-            "Status event published: order_id=%s status=%s",
-            payload.get("order_id"), payload.get("status"),
-        )
+        async with _exchange(NOTIFY_EXCHANGE_NAME) as exchange:
+            results = await asyncio.gather(
+                *(
+                    exchange.publish(
+                        aio_pika.Message(
+                            body=json.dumps(payload).encode(),
+                            content_type="application/json",
+                            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                        ),
+                        routing_key=NOTIFY_ROUTING_KEY,
+                    )
+                    for payload in payloads
+                ),
+                return_exceptions=True,
+            )
     except Exception as exc:
-        logger.warning("Failed to publish status event: %s", exc)
+        logger.warning("Failed to publish %d status event(s): %s", len(payloads), exc)
+        return 0
+    return sum(1 for r in results if not isinstance(r, BaseException))
+
+
+async def _status_worker(status_queue: asyncio.Queue) -> None:
+    while True:
+        batch = [await status_queue.get()]
+        while len(batch) < _STATUS_BATCH_MAX and not status_queue.empty():
+            batch.append(status_queue.get_nowait())
+        confirmed = await _publish_status_batch(batch)
+        metrics.record_status_publish(published=confirmed, failed=len(batch) - confirmed)
+
+
+def start_status_publisher() -> None:
+    """Start the status notification workers on the running event loop."""
+    if settings.TESTING:
+        logger.info("Status publisher SKIPPED (TESTING=true)")
+        return
+    global _status_queue
+    _status_queue = asyncio.Queue(maxsize=settings.STATUS_PUBLISH_QUEUE_SIZE)
+    _status_workers.extend(
+        asyncio.create_task(_status_worker(_status_queue))
+        for _ in range(settings.STATUS_PUBLISH_WORKERS)
+    )
+    logger.info(
+        "Status publisher started — workers=%d queue=%d",
+        settings.STATUS_PUBLISH_WORKERS, settings.STATUS_PUBLISH_QUEUE_SIZE,
+    )
@@ -0,0 +1,91 @@
+"""
+Asynchronous stock reservation.
+
+With STOCK_RESERVATION_ASYNC, ``POST /order`` does not wait for
+stock-service: an order that cannot be served from a stock lease is stored
+as RECEIVED together with an ``order.received`` outbox event, and the client
+gets its 202 at once.  Stock-service consumes that event, deducts the stock
+and publishes the outcome on ``kitchen_events``:
+
+  STOCK_VERIFIED  the order is CONFIRMED (stock-service also hands it on to
+                  the kitchen as ``order.placed``)
+  REJECTED        the order is REJECTED, and replays of its order_id get
+                  the 409 a synchronous rejection would have given
+
+The status consumer (``services/order_status.py``) applies these results
+here.  Only RECEIVED orders change, so a redelivered result — or the
+kitchen's own STOCK_VERIFIED for an order that was confirmed synchronously —
+is a no-op.
+"""
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.idempotency import IdempotencyKey, IdempotencyStatus
+from app.models.order import GatewayOrder, OrderStatus
+from app.services.cache import set_cached_stock
+from app.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Pipeline status published by stock-service → resulting gateway order status.
+_ORDER_STATUS_BY_RESULT = {
+    "STOCK_VERIFIED": OrderStatus.CONFIRMED,
+    "REJECTED": OrderStatus.REJECTED,
+}
+
+
+async def apply_result(
+    db: AsyncSession, order_id: uuid.UUID, status: str, event: dict[str, Any],
+) -> bool:
+    """
+    Settle a RECEIVED order from a stock-service result event.  Returns
+    whether the order changed; the caller commits.
+    """
+    order_status = _ORDER_STATUS_BY_RESULT.get(status)
+    if order_status is None:
+        return False
+    settled = await db.execute(
+        update(GatewayOrder)
+        .where(
+            GatewayOrder.order_id == order_id,
+            GatewayOrder.status == OrderStatus.RECEIVED.value,
+        )
+        .values(status=order_status.value)
+    )
+    if settled.rowcount == 0:
+        return False
+
+    if order_status is OrderStatus.CONFIRMED:
+        key_status = IdempotencyStatus.CONFIRMED
+        payload = {"order_id": str(order_id), "status": OrderStatus.CONFIRMED.value}
+    else:
+        key_status = IdempotencyStatus.FAILED
+        payload = {"detail": str(event.get("reason") or "Item is out of stock")}
+    await db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.order_id == order_id)
+        .values(
+            status=key_status.value,
+            response_payload=payload,
+            updated_at=datetime.now(timezone.utc),
+        )
+    )
+    metrics.record_stock_reservation(confirmed=order_status is OrderStatus.CONFIRMED)
+    return True
+
+
+async def update_cached_stock(event: dict[str, Any]) -> None:
+    """Refresh the stock cache from the ``stock_levels`` of a result event."""
+    levels = event.get("stock_levels")
+    if not isinstance(levels, dict):
+        return
+    for item_id, remaining in levels.items():
+        try:
+            await set_cached_stock(str(item_id), int(remaining))
+        except (TypeError, ValueError):
+            logger.warning("Ignoring bad stock level %r for item %s", remaining, item_id)
@@ -0,0 +1,135 @@
+"""
+Retention for the gateway's bookkeeping tables.
+
+``outbox_events`` rows are only needed until the relay has published them,
+and ``idempotency_keys`` rows only while a client might still retry the same
+``order_id``.  A background task deletes published outbox rows older than
+``OUTBOX_RETENTION_HOURS`` and idempotency keys untouched for
+``IDEMPOTENCY_RETENTION_HOURS``, in small batches with one short transaction
+each so it never holds long locks against the order path.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, select, text
+
+from app.core.config import settings
+from app.models.idempotency import IdempotencyKey
+from app.models.outbox import OutboxEvent
+from app.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on batches per table per pass, so one pass stays short even
+# when a large backlog has built up; the next pass carries on.
+_MAX_BATCHES_PER_PASS = 20
+
+_retention_task: asyncio.Task | None = None
+
+
+def _cutoff(hours: float) -> datetime:
+    return datetime.now(timezone.utc) - timedelta(hours=hours)
+
+
+async def _delete_in_batches(model, *criteria) -> int:
+    """Delete rows of *model* matching *criteria*, one small batch per transaction."""
+    from app.core.database import SessionLocal
+
+    deleted = 0
+    for _ in range(_MAX_BATCHES_PER_PASS):
+        batch = select(model.id).where(*criteria).limit(settings.RETENTION_BATCH_SIZE)
+        async with SessionLocal() as db:
+            result = await db.execute(
+                delete(model)
+                .where(model.id.in_(batch))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        deleted += result.rowcount
+        if result.rowcount < settings.RETENTION_BATCH_SIZE:
+            break
+        await asyncio.sleep(0)  # let request handlers run between batches
+    return deleted
+
+
+async def _table_rows(table_name: str, model) -> int:
+    """Row count — the planner estimate on PostgreSQL, an exact count elsewhere."""
+    from app.core.database import SessionLocal
+
+    async with SessionLocal() as db:
+        if db.get_bind().dialect.name == "postgresql":
+            estimate = (
+                await db.execute(
+                    text("SELECT reltuples::bigint FROM pg_class WHERE relname = :t"),
+                    {"t": table_name},
+                )
+            ).scalar()
+            if estimate is not None and estimate >= 0:
+                return int(estimate)
+        return int((await db.execute(select(func.count()).select_from(model))).scalar())
+
+
+async def run_retention_pass() -> int:
+    """Purge expired rows once and refresh the retention metrics.  Returns rows purged."""
+    from app.core.database import SessionLocal
+
+    if SessionLocal is None:
+        return 0
+
+    start = time.perf_counter()
+    purged = await _delete_in_batches(
+        OutboxEvent,
+        OutboxEvent.published.is_(True),
+        OutboxEvent.published_at < _cutoff(settings.OUTBOX_RETENTION_HOURS),
+    )
+    purged += await _delete_in_batches(
+        IdempotencyKey,
+        IdempotencyKey.updated_at < _cutoff(settings.IDEMPOTENCY_RETENTION_HOURS),
+    )
+    metrics.record_retention_pass(purged, time.perf_counter() - start)
+    metrics.set_table_sizes(
+        await _table_rows("outbox_events", OutboxEvent),
+        await _table_rows("idempotency_keys", IdempotencyKey),
+    )
+    if purged:
+        logger.info("Retention purged %d row(s)", purged)
+    return purged
+
+
+async def _retention_loop() -> None:
+    while True:
+        try:
+            await run_retention_pass()
+        except asyncio.CancelledError:
+            break
+        except Exception as exc:
+            logger.error("Retention pass failed: %s", exc)
+        await asyncio.sleep(settings.RETENTION_INTERVAL_SECONDS)
+
+
+def start_retention() -> None:
+    """Launch the retention background task on the running event loop."""
+    if settings.TESTING:
+        logger.info("Retention SKIPPED (TESTING=true)")
+        return
+    global _retention_task
+    _retention_task = asyncio.create_task(_retention_loop())
+    logger.info(
+        "Retention started (outbox=%sh idempotency=%sh interval=%ss)",
+        settings.OUTBOX_RETENTION_HOURS,
+        settings.IDEMPOTENCY_RETENTION_HOURS,
+        settings.RETENTION_INTERVAL_SECONDS,
+    )
+
+
+async def stop_retention() -> None:
+    global _retention_task
+    if _retention_task is not None:
+        _retention_task.cancel()
+        try:
+            await _retention_task
+        except asyncio.CancelledError:
+            pass
+        _retention_task = None
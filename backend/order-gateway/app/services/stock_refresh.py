@@ -0,0 +1,94 @@
+"""
+Warm-up and periodic bulk refresh of the stock cache.
+
+Cached levels normally only appear after an order for the item went to
+stock-service, and each expires on its own 60 s TTL, so after a deploy or
+restart the first wave of orders all reaches stock-service.  This task reads
+every item's level with ONE ``GET /stock/levels`` at startup, and again about
+every STOCK_CACHE_REFRESH_SECONDS, and fills the ones missing from the cache
+with :func:`cache.set_cached_levels` (levels orders wrote meanwhile win).
+
+To avoid stampedes:
+  - a Redis lock lets one replica refresh per period; the others only read
+    when the last refresh happened, for the cache-age metric
+  - each replica's period is jittered, so replicas do not wake together
+  - the bulk-written TTLs are jittered (see ``cache``)
+"""
+import asyncio
+import logging
+import random
+import time
+
+from app.core.config import settings
+from app.services import cache
+from app.services.metrics import metrics
+from app.services.order import fetch_stock_levels
+
+logger = logging.getLogger(__name__)
+
+# Refresh periods are drawn from ±_PERIOD_JITTER around the setting.
+_PERIOD_JITTER = 0.2
+# After a failed refresh (stock-service still starting, say) retry this soon.
+_RETRY_DELAY_SECONDS = 2.0
+
+_refresh_task: asyncio.Task | None = None
+
+
+async def refresh_stock_cache() -> bool:
+    """
+    Refresh every item's cached level unless another replica holds the
+    refresh lock.  Returns whether the cache is known to be fresh.
+    """
+    period = settings.STOCK_CACHE_REFRESH_SECONDS
+    if not await cache.claim_stock_refresh(period * (1 - _PERIOD_JITTER)):
+        refreshed_at = await cache.stock_refreshed_at()
+        if refreshed_at is not None:
+            metrics.set_stock_cache_refreshed_at(refreshed_at)
+        return True
+
+    try:
+        levels = await fetch_stock_levels()
+    except Exception as exc:
+        logger.warning("Stock cache refresh failed: %s", exc)
+        metrics.increment_stock_cache_refresh_failures()
+        await cache.release_stock_refresh()
+        return False
+
+    refreshed_at = time.time()
+    if not await cache.set_cached_levels(levels, refreshed_at):
+        metrics.increment_stock_cache_refresh_failures()
+        await cache.release_stock_refresh()
+        return False
+    metrics.record_stock_cache_refresh(len(levels), refreshed_at)
+    return True
+
+
+async def _refresh_loop() -> None:
+    while True:
+        fresh = await refresh_stock_cache()
+        period = settings.STOCK_CACHE_REFRESH_SECONDS
+        await asyncio.sleep(
+            period * random.uniform(1 - _PERIOD_JITTER, 1 + _PERIOD_JITTER)
+            if fresh else _RETRY_DELAY_SECONDS
+        )
+
+
+def start_stock_refresh() -> None:
+    """Warm the stock cache now and keep refreshing it on the running event loop."""
+    if settings.TESTING or settings.STOCK_CACHE_REFRESH_SECONDS <= 0:
+        logger.info("Stock cache refresh SKIPPED")
+        return
+    global _refresh_task
+    _refresh_task = asyncio.create_task(_refresh_loop())
+    logger.info("Stock cache refresh started — every ~%ss", settings.STOCK_CACHE_REFRESH_SECONDS)
+
+
+async def stop_stock_refresh() -> None:
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
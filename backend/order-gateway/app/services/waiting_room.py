@@ -0,0 +1,177 @@
+"""
+Virtual waiting room for order admission.
+
+While this replica has fewer than ``ADMISSION_MAX_IN_FLIGHT`` orders in
+progress and nobody is queued, ``POST /order`` is admitted straight away.
+Once it passes that mark, new arrivals get a numbered ticket instead of
+competing for the DB pool and stock-service.  The queue lives in Redis and is
+shared by every replica:
+
+  ``waitroom:tail``    last ticket issued
+  ``waitroom:head``    every ticket <= head is admitted
+  ``waitroom:stamp``   when head last moved (ms, Redis clock)
+  ``waitroom:ticket:N``  owner of ticket N, expires after the ticket TTL
+
+Head advances at ``ADMISSION_RATE_PER_SECOND`` — lazily, inside the same Lua
+script that issues and redeems tickets, so there is no leader or timer to
+keep alive.  Arrivals queue while anybody is waiting, even on a quiet
+replica, so nobody jumps the line.  An admitted holder resubmits the order
+with ``X-Queue-Ticket`` and is let through regardless of load.
+
+If Redis is unavailable the room fails open: requests are admitted as before.
+"""
+import logging
+import math
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from app.core.config import settings
+from app.services.cache import _get_client
+from app.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_HEAD_KEY = "waitroom:head"
+_TAIL_KEY = "waitroom:tail"
+_STAMP_KEY = "waitroom:stamp"
+_TICKET_KEY_PREFIX = "waitroom:ticket:"
+
+# KEYS: head, tail, stamp
+# ARGV: mode ("admit" | "status"), rate/s, overloaded ("1"/"0"), ticket or "",
+#       owner, ticket ttl (s), ticket key prefix
+# Returns {admitted (0/1), ticket (0 = none), position, issued (0/1)}
+_SCRIPT = """
+local rate = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local head = tonumber(redis.call('GET', KEYS[1]) or '0')
+local tail = tonumber(redis.call('GET', KEYS[2]) or '0')
+local stamp = tonumber(redis.call('GET', KEYS[3]) or tostring(now))
+
+local credit = math.floor((now - stamp) * rate / 1000)
+if head + credit >= tail then
+  -- Queue drained: do not bank admissions for later arrivals.
+  head = tail
+  stamp = now
+elseif credit > 0 then
+  head = head + credit
+  stamp = stamp + math.floor(credit * 1000 / rate)
+end
+redis.call('SET', KEYS[1], head)
+redis.call('SET', KEYS[3], stamp)
+
+local ticket = ARGV[4]
+if ticket ~= '' then
+  local n = tonumber(ticket)
+  local key = ARGV[7] .. ticket
+  if n and redis.call('GET', key) == ARGV[5] then
+    if n <= head then
+      if ARGV[1] == 'admit' then
+        redis.call('DEL', key)
+      end
+      return {1, n, 0, 0}
+    end
+    return {0, n, n - head, 0}
+  end
+end
+if ARGV[1] == 'status' then
+  return {0, 0, 0, 0}
+end
+
+if tail > head or ARGV[3] == '1' then
+  tail = redis.call('INCR', KEYS[2])
+  redis.call('SET', ARGV[7] .. tail, ARGV[5], 'EX', tonumber(ARGV[6]))
+  return {0, tail, tail - head, 1}
+end
+return {1, 0, 0, 0}
+"""
+
+_in_flight = 0
+
+
+@dataclass
+class Admission:
+    admitted: bool
+    ticket: Optional[int] = None
+    position: int = 0
+
+    @property
+    def estimated_wait_seconds(self) -> float:
+        if self.admitted or settings.ADMISSION_RATE_PER_SECOND <= 0:
+            return 0.0
+        return round(self.position / settings.ADMISSION_RATE_PER_SECOND, 1)
+
+    @property
+    def retry_after(self) -> int:
+        """Suggested polling interval, in whole seconds."""
+        return min(max(math.ceil(self.estimated_wait_seconds), 1), 30)
+
+
+def enabled() -> bool:
+    return settings.ADMISSION_MAX_IN_FLIGHT > 0 and settings.ADMISSION_RATE_PER_SECOND > 0
+
+
+def in_flight() -> int:
+    return _in_flight
+
+
+@contextmanager
+def occupy() -> Iterator[None]:
+    """Count an admitted order as in progress on this replica until it finishes."""
+    global _in_flight
+    _in_flight += 1
+    try:
+        yield
+    finally:
+        _in_flight -= 1
+
+
+async def _run(mode: str, owner: str, ticket: Optional[str], overloaded: bool) -> list:
+    return await _get_client().eval(
+        _SCRIPT,
+        3,
+        _HEAD_KEY,
+        _TAIL_KEY,
+        _STAMP_KEY,
+        mode,
+        settings.ADMISSION_RATE_PER_SECOND,
+        "1" if overloaded else "0",
+        ticket or "",
+        owner,
+        settings.ADMISSION_TICKET_TTL_SECONDS,
+        _TICKET_KEY_PREFIX,
+    )
+
+
+async def admit(owner: str, ticket: Optional[str] = None) -> Admission:
+    """
+    Decide whether *owner* may place an order now.
+
+    Redeems *ticket* when it belongs to *owner* and its turn has come; an
+    unknown or expired ticket is ignored and a new one issued if needed.
+    """
+    if not enabled():
+        return Admission(admitted=True)
+    overloaded = _in_flight >= settings.ADMISSION_MAX_IN_FLIGHT
+    try:
+        admitted, number, position, issued = await _run("admit", owner, ticket, overloaded)
+    except Exception as exc:
+        logger.warning("Waiting room unavailable, admitting request: %s", exc)
+        return Admission(admitted=True)
+
+    if admitted:
+        if number:
+            metrics.increment_waiting_room_admitted()
+        return Admission(admitted=True, ticket=int(number) or None)
+    if issued:
+        metrics.increment_waiting_room_tickets()
+    return Admission(admitted=False, ticket=int(number), position=int(position))
+
+
+async def ticket_status(owner: str, ticket: int) -> Optional[Admission]:
+    """Position of *owner*'s *ticket*, or ``None`` when it is unknown or expired."""
+    admitted, number, position, _ = await _run("status", owner, str(ticket), False)
+    if not number:
+        return None
+    return Admission(admitted=bool(admitted), ticket=int(number), position=int(position))
@@ -0,0 +1,141 @@
+"""
+Metrics across uvicorn worker processes.
+
+``metrics`` and the other in-process figures only describe the process that
+answers ``/metrics``.  With METRICS_MULTIPROC_DIR set, every worker writes
+its raw state — counters and histogram buckets, not finished percentiles —
+to ``<dir>/<pid>.json`` every METRICS_EXPORT_INTERVAL_SECONDS (atomically,
+via a rename).  A scrape merges every worker's file with the answering
+worker's live state, so totals and percentiles cover the whole gateway;
+the other workers' share is at most one interval old.
+
+Counters of workers that have exited stay in the totals.  Their gauges
+(in-flight requests, pool connections, ...) are dropped once their file
+has not been refreshed for ``_STALE_INTERVALS`` intervals.  Empty the
+directory before starting the gateway.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+from app.core.config import settings
+from app.services import auth, waiting_room
+from app.services.metrics import _Metrics, metrics
+from app.services.order import stock_client_stats
+from app.services.queue import status_queue_depth
+
+logger = logging.getLogger(__name__)
+
+_STALE_INTERVALS = 5
+# Process figures combined with max() / averaged instead of summed.
+_PROCESS_MAX = frozenset({"stock_breaker_open"})
+_PROCESS_MEAN_SUFFIX = "_rate"
+
+_export_task: asyncio.Task | None = None
+
+
+def process_stats() -> dict[str, float]:
+    """This process's figures kept outside ``metrics``."""
+    return {
+        **auth.verified_tokens.stats(),
+        **stock_client_stats(),
+        "orders_in_flight": waiting_room.in_flight(),
+        "status_publish_queue_depth": status_queue_depth(),
+    }
+
+
+def _state_file(directory: str, pid: int) -> Path:
+    return Path(directory) / f"{pid}.json"
+
+
+def _write_state(path: Path, state: dict[str, Any]) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state))
+    os.replace(tmp, path)
+
+
+def _capture() -> dict[str, Any]:
+    return {"written_at": time.time(), "metrics": metrics.state(), "process": process_stats()}
+
+
+def _merge_process_stats(per_worker: list[dict[str, float]]) -> dict[str, float]:
+    merged: dict[str, float] = {}
+    for key in {key for stats in per_worker for key in stats}:
+        values = [stats[key] for stats in per_worker if key in stats]
+        if key in _PROCESS_MAX:
+            merged[key] = max(values)
+        elif key.endswith(_PROCESS_MEAN_SUFFIX):
+            merged[key] = round(sum(values) / len(values), 4)
+        else:
+            merged[key] = sum(values)
+    return merged
+
+
+def collect() -> tuple[_Metrics, dict[str, float]]:
+    """
+    ``(metrics, process stats)`` for ``/metrics``: this process's own, or
+    with METRICS_MULTIPROC_DIR the merge of every worker's.
+    """
+    directory = settings.METRICS_MULTIPROC_DIR
+    if not directory:
+        return metrics, process_stats()
+
+    merged = _Metrics()
+    merged.merge_state(metrics.state())
+    per_worker = [process_stats()]
+    fresh_after = time.time() - _STALE_INTERVALS * settings.METRICS_EXPORT_INTERVAL_SECONDS
+    own = _state_file(directory, os.getpid())
+    for path in Path(directory).glob("*.json"):
+        if path == own:
+            continue
+        try:
+            state = json.loads(path.read_text())
+        except (OSError, ValueError) as exc:
+            logger.warning("Skipping unreadable metrics file %s: %s", path, exc)
+            continue
+        merged.merge_state(state["metrics"])
+        if state["written_at"] >= fresh_after:
+            per_worker.append(state["process"])
+    return merged, _merge_process_stats(per_worker)
+
+
+async def _export_loop(path: Path) -> None:
+    while True:
+        try:
+            await asyncio.to_thread(_write_state, path, _capture())
+        except Exception as exc:
+            logger.warning("Metrics export to %s failed: %s", path, exc)
+        await asyncio.sleep(settings.METRICS_EXPORT_INTERVAL_SECONDS)
+
+
+def start_metrics_export() -> None:
+    """Start writing this worker's metrics state, if METRICS_MULTIPROC_DIR is set."""
+    directory = settings.METRICS_MULTIPROC_DIR
+    if not directory:
+        return
+    global _export_task
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    _export_task = asyncio.create_task(_export_loop(_state_file(directory, os.getpid())))
+    logger.info("Metrics export started — dir=%s pid=%d", directory, os.getpid())
+
+
+async def stop_metrics_export() -> None:
+    """Stop the export and write the final state, so no counts are lost."""
+    global _export_task
+    if _export_task is None:
+        return
+    _export_task.cancel()
+    try:
+        await _export_task
+    except asyncio.CancelledError:
+        pass
+    _export_task = None
+    path = _state_file(settings.METRICS_MULTIPROC_DIR, os.getpid())
+    try:
+        _write_state(path, {**_capture(), "written_at": 0.0})
+    except OSError as exc:
+        logger.warning("Final metrics export to %s failed: %s", path, exc)
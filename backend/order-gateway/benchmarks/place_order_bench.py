@@ -0,0 +1,106 @@
+"""
+Concurrency benchmark for ``POST /order`` — requests/sec for ONE gateway worker.
+
+Run the gateway with a single uvicorn worker against the real stack
+(``docker compose up``), then point this script at it:
+
+    python benchmarks/place_order_bench.py --url http://localhost:8000 \\
+        --requests 2000 --concurrency 100
+
+To compare the sync-session build with the async-engine build, run the same
+command against each checkout and compare the ``req/s`` lines.  Every request
+uses a fresh ``order_id``, so each one exercises the full pipeline
+(idempotency insert, stock deduction, order + outbox commit).  Keep the stock
+high enough (``PUT /inventory/{item_id}`` on stock-service) that orders are
+not short-circuited by the out-of-stock cache.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uuid
+
+import httpx
+import jwt
+
+# Seeded by stock-service/seed_fixed_items.py ("Burger").
+_DEFAULT_ITEM_ID = "550e8400-e29b-41d4-a716-446655440001"
+
+
+def _make_token(secret: str, algorithm: str) -> str:
+    payload = {"student_id": "bench-student", "exp": int(time.time()) + 3600}
+    return jwt.encode(payload, secret, algorithm=algorithm)
+
+
+async def _worker(
+    client: httpx.AsyncClient,
+    queue: asyncio.Queue,
+    item_id: str,
+    latencies_ms: list[float],
+    statuses: dict[int, int],
+) -> None:
+    while True:
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        body = {"order_id": str(uuid.uuid4()), "item_id": item_id, "quantity": 1}
+        start = time.perf_counter()
+        try:
+            resp = await client.post("/order", json=body)
+            code = resp.status_code
+        except httpx.HTTPError:
+            code = 0
+        latencies_ms.append((time.perf_counter() - start) * 1000)
+        statuses[code] = statuses.get(code, 0) + 1
+
+
+async def run(args: argparse.Namespace) -> None:
+    token = _make_token(args.jwt_secret, args.jwt_algorithm)
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(args.requests):
+        queue.put_nowait(None)
+
+    latencies_ms: list[float] = []
+    statuses: dict[int, int] = {}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=args.url,
+        headers={"Authorization": f"Bearer {token}"},
+        limits=limits,
+        timeout=30.0,
+    ) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            _worker(client, queue, args.item_id, latencies_ms, statuses)
+            for _ in range(args.concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+
+    latencies_ms.sort()
+    p95 = latencies_ms[int(len(latencies_ms) * 0.95) - 1] if latencies_ms else 0.0
+    print(f"requests      {len(latencies_ms)}")
+    print(f"concurrency   {args.concurrency}")
+    print(f"elapsed       {elapsed:.2f} s")
+    print(f"req/s         {len(latencies_ms) / elapsed:.1f}")
+    print(f"p50 latency   {statistics.median(latencies_ms) if latencies_ms else 0.0:.1f} ms")
+    print(f"p95 latency   {p95:.1f} ms")
+    print(f"status codes  {dict(sorted(statuses.items()))}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--item-id", default=_DEFAULT_ITEM_ID)
+    parser.add_argument(
+        "--jwt-secret", default=os.getenv("JWT_SECRET", "super-secret-hackathon-key"),
+    )
+    parser.add_argument("--jwt-algorithm", default=os.getenv("JWT_ALGORITHM", "HS256"))
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
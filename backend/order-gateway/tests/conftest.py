@@ -20,35 +20,45 @@ os.environ.setdefault("GATEWAY_TIMEOUT_MS", "2000")
 os.environ.setdefault("TESTING", "true")
 os.environ.setdefault("DATABASE_URL", "sqlite:///")  # in-memory
 
+import tempfile
+
 import pytest
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
 from app.core.database import Base, get_db, get_session_factory
 from app.main import app
 
-# In-memory SQLite — shared across a single test so the same connection is reused.
+# File-backed SQLite so the async engine used by the handlers and the sync
+# engine used by test assertions see the same database.
+_db_path = os.path.join(tempfile.mkdtemp(prefix="order-gateway-tests-"), "test.db")
+
 _test_engine = create_engine(
-    "sqlite://",
+    f"sqlite:///{_db_path}",
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
 )
 _TestSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=_test_engine)
 
+_test_async_engine = create_async_engine(
+    f"sqlite+aiosqlite:///{_db_path}",
+    poolclass=NullPool,
+)
+_TestAsyncSessionLocal = async_sessionmaker(
+    _test_async_engine, autoflush=False, expire_on_commit=False,
+)
+
 
-def _override_get_db():
-    db = _TestSessionLocal()
-    try:
+async def _override_get_db():
+    async with _TestAsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 def _override_session_factory():
     """Return the test-local session factory so short-lived sessions
-    in the handler use the same in-memory SQLite database."""
-    return _TestSessionLocal
+    in the handler use the same SQLite database."""
+    return _TestAsyncSessionLocal
 
 
 app.dependency_overrides[get_db] = _override_get_db
@@ -62,6 +72,8 @@ def _reset_tables():
     import app.models.order  # noqa: F401
     import app.models.idempotency  # noqa: F401
     import app.models.outbox  # noqa: F401
+    import app.models.lease  # noqa: F401
+    import app.models.order_status  # noqa: F401
 
     Base.metadata.create_all(bind=_test_engine)
     yield
@@ -0,0 +1,227 @@
+"""
+Tests for stock allotment leases.
+
+Covers:
+  - Single-item orders are confirmed from one lease without /stock/deduct
+  - Each lease-backed order queues a LeaseConsumption row with the order
+  - A sold-out cache entry does not short-circuit an order the lease covers
+  - Sold-out / unreachable stock-service falls back to /stock/deduct
+  - Failed persistence hands the units back to the allotment
+  - Reconciliation reports and deletes queued rows and releases finished leases
+  - Consumptions stock-service refuses are kept, marked rejected and counted
+"""
+import asyncio
+import time
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.main import app
+from app.services import allotment
+from tests.conftest import _TestAsyncSessionLocal, _TestSessionLocal
+
+_JWT_SECRET = "test-secret-for-pytest-at-least-32-bytes!"
+
+
+def _auth() -> dict:
+    token = jwt.encode({"student_id": "stu-001", "exp": int(time.time()) + 3600}, _JWT_SECRET, algorithm="HS256")
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _order(quantity: int = 1) -> dict:
+    return {"order_id": str(uuid.uuid4()), "item_id": "burger", "quantity": quantity}
+
+
+def _lease(granted: int = 20) -> dict:
+    return {"lease_id": str(uuid.uuid4()), "granted": granted, "remaining_stock": 30}
+
+
+@pytest.fixture(autouse=True)
+def _allotments_enabled():
+    with patch.object(allotment, "_active", True), \
+            patch.object(settings, "STOCK_LEASE_SIZE", 20), \
+            patch.dict(allotment._current, clear=True), \
+            patch.dict(allotment._retired, clear=True), \
+            patch.dict(allotment._cooldown_until, clear=True):
+        yield
+
+
+@pytest.fixture()
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+def _consumption_count() -> int:
+    db = _TestSessionLocal()
+    try:
+        return db.execute(text("SELECT COUNT(*) FROM stock_lease_consumptions")).scalar()
+    finally:
+        db.close()
+
+
+@patch("app.services.allotment.set_cached_stock", new_callable=AsyncMock)
+@patch("app.services.allotment.acquire_lease", new_callable=AsyncMock)
+@patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
+@patch("app.routers.order.deduct_stock", new_callable=AsyncMock)
+def test_orders_are_confirmed_from_one_lease(mock_deduct, mock_get, mock_acquire, mock_set, client):
+    mock_acquire.return_value = _lease()
+
+    for _ in range(5):
+        resp = client.post("/order", json=_order(), headers=_auth())
+        assert resp.status_code == 202
+
+    mock_deduct.assert_not_called()
+    mock_acquire.assert_awaited_once()
+    assert _consumption_count() == 5
+    current = allotment._current["burger"]
+    assert (current.remaining, current.in_flight) == (15, 0)
+    mock_set.assert_awaited_once_with("burger", 30)
+
+
+@patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=0)
+@patch("app.routers.order.deduct_stock", new_callable=AsyncMock)
+def test_sold_out_cache_does_not_block_a_covered_order(mock_deduct, mock_get, client):
+    allotment._current["burger"] = allotment.Allotment(
+        lease_id=str(uuid.uuid4()), item_id="burger", remaining=3,
+        expires_at=time.monotonic() + 60,
+    )
+
+    resp = client.post("/order", json=_order(), headers=_auth())
+
+    assert resp.status_code == 202
+    mock_deduct.assert_not_called()
+
+
+@patch("app.services.allotment.acquire_lease", new_callable=AsyncMock)
+@patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
+@patch("app.routers.order.set_cached_stock", new_callable=AsyncMock)
+@patch("app.routers.order.deduct_stock", new_callable=AsyncMock)
+def test_failed_lease_falls_back_to_direct_deduction(mock_deduct, mock_set, mock_get, mock_acquire, client):
+    response = MagicMock(status_code=409)
+    mock_acquire.side_effect = httpx.HTTPStatusError("409", request=MagicMock(), response=response)
+    mock_deduct.return_value = {"status": "success", "remaining_stock": 0}
+
+    for _ in range(2):
+        assert client.post("/order", json=_order(), headers=_auth()).status_code == 202
+
+    assert mock_deduct.await_count == 2
+    mock_acquire.assert_awaited_once()      # cooled down after the 409
+    assert _consumption_count() == 0
+
+
+def test_hold_returns_units_when_persistence_fails():
+    lease = allotment.Allotment(
+        lease_id="l-1", item_id="burger", remaining=5, expires_at=time.monotonic() + 60,
+    )
+    allotment._current["burger"] = lease
+    taken = asyncio.run(allotment.take("burger", 2))
+    assert taken is lease and (lease.remaining, lease.in_flight) == (3, 2)
+
+    with pytest.raises(RuntimeError):
+        with allotment.hold(taken, 2):
+            raise RuntimeError("db down")
+
+    assert (lease.remaining, lease.in_flight) == (5, 0)
+
+
+@patch("app.core.database.SessionLocal", _TestAsyncSessionLocal)
+@patch("app.services.allotment.reconcile_lease", new_callable=AsyncMock)
+def test_reconcile_pass_reports_rows_and_releases_finished_leases(mock_reconcile):
+    mock_reconcile.return_value = {"rejected": []}
+    live = allotment.Allotment(
+        lease_id="live", item_id="burger", remaining=4, expires_at=time.monotonic() + 60,
+    )
+    spent = allotment.Allotment(
+        lease_id="spent", item_id="fries", remaining=0, expires_at=time.monotonic() + 60,
+    )
+    allotment._current.update({"burger": live, "fries": spent})
+
+    async def _queue() -> None:
+        async with _TestAsyncSessionLocal() as db:
+            for lease, qty in ((live, 1), (live, 2), (spent, 1)):
+                allotment.record_consumption(db, lease, uuid.uuid4(), qty)
+            await db.commit()
+
+    asyncio.run(_queue())
+    assert asyncio.run(allotment.run_reconcile_pass()) == 2
+
+    calls = {c.args[0]: c for c in mock_reconcile.await_args_list}
+    assert sorted(line["quantity"] for line in calls["live"].args[1]) == [1, 2]
+    assert calls["live"].kwargs["release"] is False
+    assert calls["spent"].kwargs["release"] is True
+    assert _consumption_count() == 0
+    assert "fries" not in allotment._current and not allotment._retired
+
+    # Shutdown releases everything that is left.
+    mock_reconcile.reset_mock()
+    asyncio.run(allotment.run_reconcile_pass(release_all=True))
+    mock_reconcile.assert_awaited_once_with("live", [], release=True)
+    assert not allotment._current and not allotment._retired
+
+
+@patch("app.core.database.SessionLocal", _TestAsyncSessionLocal)
+@patch("app.services.allotment.reconcile_lease", new_callable=AsyncMock)
+def test_reconcile_keeps_rows_when_stock_service_is_down(mock_reconcile):
+    mock_reconcile.side_effect = httpx.ConnectError("down")
+    lease = allotment.Allotment(
+        lease_id="live", item_id="burger", remaining=4, expires_at=time.monotonic() + 60,
+    )
+    allotment._current["burger"] = lease
+
+    async def _queue() -> None:
+        async with _TestAsyncSessionLocal() as db:
+            allotment.record_consumption(db, lease, uuid.uuid4(), 1)
+            await db.commit()
+
+    asyncio.run(_queue())
+    assert asyncio.run(allotment.run_reconcile_pass()) == 0
+    assert _consumption_count() == 1
+
+
+@patch("app.core.database.SessionLocal", _TestAsyncSessionLocal)
+@patch("app.services.allotment.reconcile_lease", new_callable=AsyncMock)
+def test_reconcile_keeps_rows_stock_service_refuses(mock_reconcile):
+    lease = allotment.Allotment(
+        lease_id="live", item_id="burger", remaining=4, expires_at=time.monotonic() + 60,
+    )
+    allotment._current["burger"] = lease
+    recorded, refused = uuid.uuid4(), uuid.uuid4()
+
+    async def _queue() -> None:
+        async with _TestAsyncSessionLocal() as db:
+            allotment.record_consumption(db, lease, recorded, 1)
+            allotment.record_consumption(db, lease, refused, 5)
+            await db.commit()
+
+    asyncio.run(_queue())
+    mock_reconcile.return_value = {"recorded": 1, "rejected": [str(refused)]}
+    with patch.object(allotment.metrics, "_lease_consumptions_rejected", 0):
+        assert asyncio.run(allotment.run_reconcile_pass()) == 1
+        assert allotment.metrics.snapshot()["lease_consumptions_rejected"] == 1
+
+    db = _TestSessionLocal()
+    try:
+        rows = db.execute(text(
+            "SELECT order_id, rejected_at FROM stock_lease_consumptions"
+        )).all()
+    finally:
+        db.close()
+    assert len(rows) == 1
+    assert uuid.UUID(str(rows[0][0])) == refused and rows[0][1] is not None
+
+    # A rejected row is not posted again; a whole-batch 4xx keeps rows too.
+    mock_reconcile.reset_mock()
+    mock_reconcile.side_effect = httpx.HTTPStatusError(
+        "gone", request=httpx.Request("POST", "http://stock"),
+        response=httpx.Response(404, text="Lease not found"),
+    )
+    asyncio.run(allotment.run_reconcile_pass())
+    assert not mock_reconcile.await_args_list or mock_reconcile.await_args.args[1] == []
+    assert _consumption_count() == 1
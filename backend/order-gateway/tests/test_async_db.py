@@ -0,0 +1,90 @@
+"""
+Tests for the async database engine used by the order hot path.
+
+Covers:
+  - Sync DATABASE_URLs are rewritten to their async drivers
+  - Concurrent orders are all persisted through AsyncSession
+  - GET /orders reads through the async request-scoped session
+"""
+import asyncio
+import time
+import uuid
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.core.database import to_async_url
+from app.main import app
+
+_JWT_SECRET = "test-secret-for-pytest-at-least-32-bytes!"
+
+
+def _make_token(student_id: str = "stu-001") -> str:
+    payload = {"student_id": student_id, "exp": int(time.time()) + 3600}
+    return jwt.encode(payload, _JWT_SECRET, algorithm="HS256")
+
+
+@pytest.fixture()
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("postgresql://u:p@db:5432/x", "postgresql+asyncpg://u:p@db:5432/x"),
+        ("postgres://u:p@db:5432/x", "postgresql+asyncpg://u:p@db:5432/x"),
+        ("sqlite:///", "sqlite+aiosqlite:///"),
+        ("postgresql+asyncpg://u:p@db/x", "postgresql+asyncpg://u:p@db/x"),
+    ],
+)
+def test_to_async_url(url, expected):
+    assert to_async_url(url) == expected
+
+
+@patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
+@patch("app.routers.order.set_cached_stock", new_callable=AsyncMock)
+@patch("app.routers.order.deduct_stock", new_callable=AsyncMock)
+def test_concurrent_orders_all_persisted(mock_deduct, mock_set, mock_get, client):
+    """Many in-flight orders on one event loop must all commit."""
+    from tests.conftest import _TestSessionLocal
+
+    mock_deduct.return_value = {"remaining_stock": 50}
+    headers = {"Authorization": f"Bearer {_make_token()}"}
+
+    async def _fire(n: int) -> list[int]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            responses = await asyncio.gather(*(
+                ac.post(
+                    "/order",
+                    json={"order_id": str(uuid.uuid4()), "item_id": "burger", "quantity": 1},
+                    headers=headers,
+                )
+                for _ in range(n)
+            ))
+        return [r.status_code for r in responses]
+
+    codes = asyncio.run(_fire(10))
+    assert codes == [202] * 10
+
+    db = _TestSessionLocal()
+    try:
+        assert db.execute(text("SELECT COUNT(*) FROM gateway_orders")).scalar() == 10
+        assert db.execute(text("SELECT COUNT(*) FROM outbox_events")).scalar() == 10
+    finally:
+        db.close()
+
+
+def test_list_orders_empty_for_new_student(client):
+    resp = client.get(
+        "/orders",
+        headers={"Authorization": f"Bearer {_make_token('stu-new')}"},
+    )
+    assert resp.status_code == 200
+    assert resp.json() == {"orders": [], "next_cursor": None}
@@ -0,0 +1,140 @@
+"""
+Tests for asynchronous stock reservation (STOCK_RESERVATION_ASYNC).
+
+Redis and stock-service are mocked.
+
+Covers:
+  - An order is stored as RECEIVED and acknowledged without calling stock-service
+  - Its outbox event is an ``order.received`` for stock-service
+  - A replay before the result is answered RECEIVED
+  - STOCK_VERIFIED confirms the order and refreshes the stock cache
+  - REJECTED rejects the order, and replays then get 409
+  - Results for orders that are not RECEIVED change nothing
+"""
+import asyncio
+import json
+import time
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.models.idempotency import IdempotencyKey
+from app.models.order import GatewayOrder
+from app.models.outbox import OutboxEvent
+from app.services import order_status
+from tests.conftest import _TestAsyncSessionLocal, _TestSessionLocal
+
+_JWT_SECRET = "test-secret-for-pytest-at-least-32-bytes!"
+
+
+def _auth() -> dict:
+    token = jwt.encode(
+        {"student_id": "stu-001", "exp": int(time.time()) + 3600}, _JWT_SECRET, algorithm="HS256",
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture()
+def client():
+    with patch.object(settings, "STOCK_RESERVATION_ASYNC", True), TestClient(app) as c:
+        yield c
+
+
+def _place(client, order_id: str):
+    return client.post(
+        "/order",
+        json={"order_id": order_id, "item_id": "burger", "quantity": 1},
+        headers=_auth(),
+    )
+
+
+def _order_status(order_id: str) -> str:
+    db = _TestSessionLocal()
+    try:
+        return db.query(GatewayOrder).filter_by(order_id=uuid.UUID(order_id)).one().status
+    finally:
+        db.close()
+
+
+def _deliver(event: dict) -> MagicMock:
+    message = MagicMock()
+    message.body = json.dumps(event).encode()
+    message.ack = AsyncMock()
+    message.nack = AsyncMock()
+    with patch("app.core.database.SessionLocal", _TestAsyncSessionLocal):
+        asyncio.run(order_status._on_message(message))
+    return message
+
+
+@patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
+@patch("app.routers.order.deduct_stock", new_callable=AsyncMock)
+def test_order_is_received_without_calling_stock_service(mock_deduct, mock_get, client):
+    order_id = str(uuid.uuid4())
+
+    resp = _place(client, order_id)
+
+    assert resp.status_code == 202
+    assert resp.json()["status"] == "RECEIVED"
+    mock_deduct.assert_not_called()
+    assert _order_status(order_id) == "RECEIVED"
+    db = _TestSessionLocal()
+    event = db.query(OutboxEvent).one()
+    db.close()
+    assert event.event_type == "order.received"
+    assert event.payload["order_id"] == order_id
+
+    replay = _place(client, order_id)
+    assert replay.status_code == 202
+    assert replay.json()["status"] == "RECEIVED"
+
+
+@patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
+@patch("app.services.reservation.set_cached_stock", new_callable=AsyncMock)
+def test_stock_verified_confirms_the_order(mock_set, mock_get, client):
+    order_id = str(uuid.uuid4())
+    _place(client, order_id)
+
+    message = _deliver({
+        "order_id": order_id, "status": "STOCK_VERIFIED", "stock_levels": {"burger": 4},
+    })
+
+    message.ack.assert_awaited_once()
+    assert _order_status(order_id) == "CONFIRMED"
+    mock_set.assert_awaited_once_with("burger", 4)
+    assert _place(client, order_id).json()["status"] == "CONFIRMED"
+
+
+@patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
+@patch("app.services.reservation.set_cached_stock", new_callable=AsyncMock)
+def test_rejected_order_replays_as_409(mock_set, mock_get, client):
+    order_id = str(uuid.uuid4())
+    _place(client, order_id)
+
+    _deliver({"order_id": order_id, "status": "REJECTED", "reason": "Insufficient stock"})
+
+    assert _order_status(order_id) == "REJECTED"
+    replay = _place(client, order_id)
+    assert replay.status_code == 409
+    assert replay.json()["detail"] == "Insufficient stock"
+
+
+@patch("app.services.reservation.set_cached_stock", new_callable=AsyncMock)
+def test_result_for_settled_order_changes_nothing(mock_set):
+    order_id = uuid.uuid4()
+    db = _TestSessionLocal()
+    db.add(GatewayOrder(
+        order_id=order_id, student_id="stu-001", item_id="burger", quantity=1, status="CONFIRMED",
+    ))
+    db.add(IdempotencyKey(order_id=order_id, request_hash="x" * 64, status="CONFIRMED"))
+    db.commit()
+    db.close()
+
+    _deliver({"order_id": str(order_id), "status": "REJECTED", "stock_levels": {"burger": 0}})
+
+    assert _order_status(str(order_id)) == "CONFIRMED"
+    mock_set.assert_not_called()
@@ -75,9 +75,8 @@ def test_cache_short_circuit_increments_counter(mock_deduct, mock_get, client):
 @patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=5)
 @patch("app.routers.order.set_cached_stock", new_callable=AsyncMock)
 @patch("app.routers.order.deduct_stock", new_callable=AsyncMock)
-@patch("app.routers.order.publish_order_event")
 def test_cache_positive_stock_calls_stock_service(
-    mock_publish, mock_deduct, mock_set, mock_get, client
+    mock_deduct, mock_set, mock_get, client
 ):
     mock_deduct.return_value = {"remaining_stock": 4}
 
@@ -99,9 +98,8 @@ def test_cache_positive_stock_calls_stock_service(
 @patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
 @patch("app.routers.order.set_cached_stock", new_callable=AsyncMock)
 @patch("app.routers.order.deduct_stock", new_callable=AsyncMock)
-@patch("app.routers.order.publish_order_event")
 def test_cache_miss_calls_stock_service(
-    mock_publish, mock_deduct, mock_set, mock_get, client
+    mock_deduct, mock_set, mock_get, client
 ):
     mock_deduct.return_value = {"remaining_stock": 10}
 
@@ -123,9 +121,8 @@ def test_cache_miss_calls_stock_service(
 @patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
 @patch("app.routers.order.set_cached_stock", new_callable=AsyncMock)
 @patch("app.routers.order.deduct_stock", new_callable=AsyncMock)
-@patch("app.routers.order.publish_order_event")
 def test_cache_updated_after_successful_deduction(
-    mock_publish, mock_deduct, mock_set, mock_get, client
+    mock_deduct, mock_set, mock_get, client
 ):
     mock_deduct.return_value = {"remaining_stock": 7}
     body = _order_body("soda")
@@ -0,0 +1,127 @@
+"""
+Tests for multi-item cart orders (``items`` list under one order_id).
+
+Covers:
+  - One batched stock call, one GatewayOrder row and one outbox event per cart
+  - Cache short-circuit when any cart line is known to be sold out
+  - Batch 409 marks the named item as sold out in the cache
+  - Validation: single-item and cart fields are mutually exclusive
+"""
+import time
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.main import app
+
+_JWT_SECRET = "test-secret-for-pytest-at-least-32-bytes!"
+
+
+def _make_token(student_id: str = "stu-001") -> str:
+    payload = {"student_id": student_id, "exp": int(time.time()) + 3600}
+    return jwt.encode(payload, _JWT_SECRET, algorithm="HS256")
+
+
+def _cart_body(order_id: str | None = None) -> dict:
+    return {
+        "order_id": order_id or str(uuid.uuid4()),
+        "items": [
+            {"item_id": "burger", "quantity": 1},
+            {"item_id": "fries", "quantity": 2},
+            {"item_id": "soda", "quantity": 1},
+        ],
+    }
+
+
+@pytest.fixture()
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
+@patch("app.routers.order.set_cached_stock", new_callable=AsyncMock)
+@patch("app.routers.order.deduct_stock", new_callable=AsyncMock)
+@patch("app.routers.order.deduct_stock_batch", new_callable=AsyncMock)
+def test_cart_order_uses_one_batched_deduction(mock_batch, mock_single, mock_set, mock_get, client):
+    from tests.conftest import _TestSessionLocal
+
+    body = _cart_body()
+    mock_batch.return_value = {
+        "status": "success",
+        "results": [
+            {"item_id": "burger", "remaining_stock": 9},
+            {"item_id": "fries", "remaining_stock": 8},
+            {"item_id": "soda", "remaining_stock": 7},
+        ],
+    }
+
+    resp = client.post("/order", json=body, headers={"Authorization": f"Bearer {_make_token()}"})
+
+    assert resp.status_code == 202
+    assert resp.json() == {"order_id": body["order_id"], "status": "CONFIRMED"}
+    mock_single.assert_not_called()
+    mock_batch.assert_awaited_once_with(body["order_id"], body["items"])
+    assert sorted(c.args for c in mock_set.await_args_list) == [
+        ("burger", 9), ("fries", 8), ("soda", 7),
+    ]
+
+    db = _TestSessionLocal()
+    try:
+        assert db.execute(text("SELECT COUNT(*) FROM gateway_orders")).scalar() == 1
+        assert db.execute(text("SELECT COUNT(*) FROM idempotency_keys")).scalar() == 1
+        payloads = db.execute(text("SELECT payload FROM outbox_events")).fetchall()
+        assert len(payloads) == 1
+        assert '"items"' in payloads[0][0]
+    finally:
+        db.close()
+
+
+@patch("app.routers.order.get_cached_stock", new_callable=AsyncMock)
+@patch("app.routers.order.deduct_stock_batch", new_callable=AsyncMock)
+def test_cart_short_circuits_when_any_line_sold_out(mock_batch, mock_get, client):
+    mock_get.side_effect = lambda item_id: 0 if item_id == "fries" else 5
+
+    resp = client.post("/order", json=_cart_body(), headers={"Authorization": f"Bearer {_make_token()}"})
+
+    assert resp.status_code == 409
+    mock_batch.assert_not_called()
+
+
+@patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
+@patch("app.routers.order.set_cached_stock", new_callable=AsyncMock)
+@patch("app.routers.order.deduct_stock_batch", new_callable=AsyncMock)
+def test_cart_409_caches_the_named_item_as_sold_out(mock_batch, mock_set, mock_get, client):
+    mock_response = MagicMock()
+    mock_response.status_code = 409
+    mock_response.json.return_value = {
+        "detail": {"order_id": "x", "item_id": "soda", "message": "Insufficient stock"},
+    }
+    mock_batch.side_effect = httpx.HTTPStatusError("409", request=MagicMock(), response=mock_response)
+
+    resp = client.post("/order", json=_cart_body(), headers={"Authorization": f"Bearer {_make_token()}"})
+
+    assert resp.status_code == 409
+    mock_set.assert_awaited_once_with("soda", 0)
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"order_id": str(uuid.uuid4()), "item_id": "burger", "quantity": 1,
+         "items": [{"item_id": "fries", "quantity": 1}]},
+        {"order_id": str(uuid.uuid4()), "items": []},
+        {"order_id": str(uuid.uuid4()), "items": [
+            {"item_id": "fries", "quantity": 1}, {"item_id": "fries", "quantity": 2},
+        ]},
+        {"order_id": str(uuid.uuid4()), "items": [{"item_id": "fries", "quantity": 0}]},
+    ],
+)
+def test_invalid_cart_returns_422(body, client):
+    resp = client.post("/order", json=body, headers={"Authorization": f"Bearer {_make_token()}"})
+    assert resp.status_code == 422
@@ -0,0 +1,173 @@
+"""
+Tests for the stock-service circuit breaker and adaptive concurrency limit.
+
+Covers:
+  - Sliding-window trips on error rate and on slow calls, not on a few errors
+  - HALF_OPEN admits a bounded number of probes; they close or re-open it
+  - AIMD limit grows on fast successes, backs off on overload, sheds excess
+  - A shed order returns 503 and can be retried with the same order_id
+  - Trips are shared through Redis when BREAKER_SHARED is on
+"""
+import asyncio
+import time
+import uuid
+from unittest.mock import AsyncMock, patch
+
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.services import order as order_service
+from app.services.order import StockServiceOverloaded, _CircuitBreaker, _ConcurrencyLimiter
+
+_JWT_SECRET = "test-secret-for-pytest-at-least-32-bytes!"
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture()
+def clock():
+    fake = _Clock()
+    with patch("app.services.order.time.monotonic", fake):
+        yield fake
+
+
+def _breaker(**overrides) -> _CircuitBreaker:
+    options = dict(window_seconds=10, min_calls=4, failure_rate=0.5, slow_call_seconds=1.0,
+                   slow_call_rate=0.8, recovery_timeout=30, half_open_probes=2)
+    options.update(overrides)
+    return _CircuitBreaker(**options)
+
+
+def test_breaker_needs_min_calls_then_trips_on_error_rate(clock):
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record_failure(breaker.allow_request())
+    assert breaker.state == "CLOSED"
+
+    breaker.record_success(breaker.allow_request())     # 3 of 4 failed
+    assert breaker.state == "OPEN"
+    assert breaker.allow_request() is None
+
+
+def test_old_failures_slide_out_of_the_window(clock):
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record_failure(breaker.allow_request())
+    clock.now += 11
+    for _ in range(3):
+        breaker.record_success(breaker.allow_request())
+    breaker.record_failure(breaker.allow_request())
+    assert breaker.state == "CLOSED"
+
+
+def test_breaker_trips_on_slow_calls(clock):
+    breaker = _breaker()
+    for _ in range(4):
+        permit = breaker.allow_request()
+        clock.now += 1.5
+        breaker.record_success(permit)
+    assert breaker.state == "OPEN"
+
+
+def test_half_open_admits_bounded_probes(clock):
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record_failure(breaker.allow_request())
+    clock.now += 31
+
+    probes = [breaker.allow_request(), breaker.allow_request()]
+    assert all(p is not None and p.probe for p in probes)
+    assert breaker.allow_request() is None               # backlog still held off
+
+    for probe in probes:
+        breaker.record_success(probe)
+    assert breaker.state == "CLOSED"
+
+
+def test_failed_probe_reopens(clock):
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record_failure(breaker.allow_request())
+    clock.now += 31
+
+    breaker.record_failure(breaker.allow_request())
+    assert breaker.state == "OPEN"
+    clock.now += 29
+    assert breaker.allow_request() is None
+
+
+def test_limiter_is_additive_increase_multiplicative_decrease():
+    limiter = _ConcurrencyLimiter(initial=2, minimum=1, maximum=10, slow_call_seconds=1.0, backoff=0.5)
+    assert limiter.try_acquire() and limiter.try_acquire()
+    assert not limiter.try_acquire()                     # shed at the limit
+    assert limiter.stats()["stock_shed_total"] == 1
+
+    limiter.release(0.01, overloaded=False)
+    limiter.release(0.01, overloaded=False)
+    assert limiter.stats()["stock_concurrency_limit"] > 2
+
+    for _ in range(2):
+        limiter.try_acquire()
+    limiter.release(5.0, overloaded=False)               # slow call
+    limiter.release(0.01, overloaded=True)               # failed call
+    assert limiter.stats()["stock_concurrency_limit"] < 1.5
+    assert limiter.stats()["stock_in_flight"] == 0
+
+
+@patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
+@patch("app.routers.order.deduct_stock", new_callable=AsyncMock)
+def test_shed_order_returns_503_and_can_be_retried(mock_deduct, mock_get):
+    token = jwt.encode({"student_id": "stu-001", "exp": int(time.time()) + 3600}, _JWT_SECRET, algorithm="HS256")
+    headers = {"Authorization": f"Bearer {token}"}
+    body = {"order_id": str(uuid.uuid4()), "item_id": "burger", "quantity": 1}
+    mock_deduct.side_effect = StockServiceOverloaded("full")
+
+    with TestClient(app) as client, patch("app.routers.order.set_cached_stock", new_callable=AsyncMock):
+        resp = client.post("/order", json=body, headers=headers)
+        assert resp.status_code == 503
+        assert resp.headers["Retry-After"] == "1"
+
+        mock_deduct.side_effect = None
+        mock_deduct.return_value = {"status": "success", "remaining_stock": 3}
+        assert client.post("/order", json=body, headers=headers).status_code == 202
+
+
+def test_post_deduction_sheds_without_calling_stock_service():
+    limiter = _ConcurrencyLimiter(initial=1, minimum=1, maximum=1)
+    limiter.try_acquire()
+    client = AsyncMock()
+    with patch.object(order_service, "_limiter", limiter), \
+            patch.object(order_service, "_breaker", _breaker()), \
+            patch.object(order_service, "_get_client", return_value=client):
+        with pytest.raises(StockServiceOverloaded):
+            asyncio.run(order_service._post_deduction("/stock/deduct", {}))
+    client.post.assert_not_called()
+
+
+@patch("app.services.order.get_shared_breaker_state", new_callable=AsyncMock)
+@patch("app.services.order.set_shared_breaker_state", new_callable=AsyncMock)
+def test_trips_are_shared_through_redis(mock_set, mock_get):
+    local = _breaker()
+    with patch.object(settings, "BREAKER_SHARED", True), \
+            patch.object(order_service, "_breaker", local), \
+            patch.object(order_service, "_last_shared_sync", 0.0):
+        for _ in range(4):
+            local.record_failure(local.allow_request())
+        asyncio.run(order_service._sync_shared_breaker())
+        mock_set.assert_awaited_once()
+        assert mock_set.await_args.args[1] > time.time()
+
+        other = _breaker()
+        mock_get.return_value = time.time() + 20
+        with patch.object(order_service, "_breaker", other):
+            asyncio.run(order_service._sync_shared_breaker())
+        assert other.state == "OPEN"
@@ -0,0 +1,115 @@
+"""
+Tests for coalescing concurrent /stock/deduct calls into batched requests.
+
+Covers:
+  - Concurrent deductions go out as ONE non-atomic batch call
+  - Each caller gets its own result, or the HTTP error its line failed with
+  - A lone deduction still uses /stock/deduct; transport errors reach every caller
+  - Batch size and queueing delay are recorded
+  - Callers missing from a short result list fail instead of hanging
+  - The batch size is capped at what stock-service accepts
+"""
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+
+from app.services import order as order_service
+from app.services.metrics import metrics
+
+
+@pytest.fixture()
+def coalescer():
+    c = order_service._DeductionCoalescer(window_ms=5, max_size=10)
+    with patch.object(order_service, "_coalescer", c):
+        yield c
+
+
+def _line(n: int, **extra) -> dict:
+    return {"order_id": f"o-{n}", "item_id": "burger", "quantity": 1, **extra}
+
+
+async def _deduct_all(count: int) -> list:
+    return await asyncio.gather(
+        *(order_service.deduct_stock(f"o-{n}", "burger", 1) for n in range(count)),
+        return_exceptions=True,
+    )
+
+
+@patch("app.services.order._post_deduction", new_callable=AsyncMock)
+def test_concurrent_deductions_share_one_batch(mock_post, coalescer):
+    mock_post.return_value = {"status": "success", "results": [
+        _line(0, status_code=200, remaining_stock=2),
+        _line(1, status_code=409, detail="Insufficient stock"),
+        _line(2, status_code=200, remaining_stock=1),
+    ]}
+    before = metrics.snapshot()["deduct_batches"]
+
+    first, second, third = asyncio.run(_deduct_all(3))
+
+    mock_post.assert_awaited_once()
+    path, payload = mock_post.await_args.args
+    assert path == "/stock/deduct/batch"
+    assert payload["atomic"] is False
+    assert [line["order_id"] for line in payload["lines"]] == ["o-0", "o-1", "o-2"]
+    assert first["remaining_stock"] == 2 and third["remaining_stock"] == 1
+    assert isinstance(second, httpx.HTTPStatusError)
+    assert second.response.status_code == 409
+    assert second.response.json() == {"detail": "Insufficient stock"}
+
+    snap = metrics.snapshot()
+    assert snap["deduct_batches"] == before + 1
+    assert snap["deduct_batch_avg_size"] > 0
+    assert snap["deduct_queue_delay_max_ms"] >= 0
+
+
+@patch("app.services.order._post_deduction", new_callable=AsyncMock)
+def test_full_batch_is_sent_without_waiting_for_the_window(mock_post, coalescer):
+    coalescer._window = 60.0
+    mock_post.side_effect = lambda path, payload: {
+        "results": [{**line, "status_code": 200} for line in payload["lines"]],
+    }
+
+    results = asyncio.run(asyncio.wait_for(_deduct_all(10), timeout=2))
+
+    assert len(results) == 10 and all(r["status_code"] == 200 for r in results)
+    mock_post.assert_awaited_once()
+
+
+@patch("app.services.order._post_deduction", new_callable=AsyncMock)
+def test_single_deduction_uses_plain_endpoint(mock_post, coalescer):
+    mock_post.return_value = {"status": "success", "remaining_stock": 4}
+
+    result = asyncio.run(order_service.deduct_stock("o-1", "burger", 1))
+
+    assert result["remaining_stock"] == 4
+    assert mock_post.await_args.args == (
+        "/stock/deduct", {"order_id": "o-1", "item_id": "burger", "quantity": 1},
+    )
+
+
+@patch("app.services.order._post_deduction", new_callable=AsyncMock)
+def test_transport_error_fails_every_caller(mock_post, coalescer):
+    mock_post.side_effect = httpx.ReadTimeout("slow")
+
+    results = asyncio.run(_deduct_all(4))
+
+    assert all(isinstance(r, httpx.ReadTimeout) for r in results)
+
+
+@patch("app.services.order._post_deduction", new_callable=AsyncMock)
+def test_callers_missing_from_results_fail(mock_post, coalescer):
+    mock_post.return_value = {"results": [{**_line(0), "status_code": 200}]}
+
+    results = asyncio.run(asyncio.wait_for(_deduct_all(3), timeout=2))
+
+    assert results[0]["status_code"] == 200
+    assert all(
+        isinstance(r, httpx.HTTPStatusError) and r.response.status_code == 502
+        for r in results[1:]
+    )
+
+
+def test_batch_size_is_capped_at_stock_service_limit():
+    assert order_service._DeductionCoalescer(window_ms=5, max_size=500)._max_size == 100
@@ -5,8 +5,12 @@ Covers:
   - Stock service returns 409 Conflict (insufficient stock)
   - Stock service returns unexpected errors → 502 Bad Gateway
   - Failed idempotency key returns 409 with stored detail
+  - A duplicate still in flight returns 409 instead of a unique violation
+  - A stale RECEIVED claim left by a dead request is taken over by a retry
+  - A long-running request renews its claim, and backs off if it was taken over
+  - A failed persist releases the claim so the same order_id can be retried
   - Order record persisted in DB after success
-  - Kitchen publish receives correct payload
+  - The outbox event carries the correct payload
   - Metrics counters for downstream failures and rejected orders
 """
 import time
@@ -155,6 +159,139 @@ def test_failed_idempotency_returns_409(mock_deduct, mock_set, mock_get, client)
     mock_deduct.assert_not_called()
 
 
+@patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
+@patch("app.routers.order.deduct_stock", new_callable=AsyncMock)
+def test_in_flight_duplicate_returns_409(mock_deduct, mock_get, client):
+    """
+    A duplicate arriving while the first request still holds the RECEIVED
+    claim loses the INSERT ... ON CONFLICT and is told to retry.
+    """
+    from tests.conftest import _TestSessionLocal
+    from app.models.idempotency import IdempotencyKey
+
+    oid = uuid.uuid4()
+    db = _TestSessionLocal()
+    db.add(IdempotencyKey(order_id=oid, request_hash="x" * 64))
+    db.commit()
+    db.close()
+
+    resp = client.post(
+        "/order",
+        json={"order_id": str(oid), "item_id": "burger", "quantity": 1},
+        headers={"Authorization": f"Bearer {_make_token()}"},
+    )
+
+    assert resp.status_code == 409
+    assert resp.json()["detail"] == "Order is already being processed"
+    assert resp.headers["Retry-After"] == "1"
+    mock_deduct.assert_not_called()
+
+
+@patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
+@patch("app.routers.order.set_cached_stock", new_callable=AsyncMock)
+@patch("app.routers.order.deduct_stock", new_callable=AsyncMock)
+def test_stale_claim_is_taken_over(mock_deduct, mock_set, mock_get, client):
+    """A RECEIVED claim nobody has touched for longer than the timeout is reclaimed."""
+    from datetime import datetime, timedelta, timezone
+    from tests.conftest import _TestSessionLocal
+    from app.models.idempotency import IdempotencyKey
+
+    mock_deduct.return_value = {"status": "success", "remaining_stock": 5}
+    oid = uuid.uuid4()
+    db = _TestSessionLocal()
+    db.add(IdempotencyKey(
+        order_id=oid, request_hash="x" * 64,
+        updated_at=datetime.now(timezone.utc) - timedelta(minutes=5),
+    ))
+    db.commit()
+    db.close()
+
+    resp = client.post(
+        "/order",
+        json={"order_id": str(oid), "item_id": "burger", "quantity": 1},
+        headers={"Authorization": f"Bearer {_make_token()}"},
+    )
+
+    assert resp.status_code == 202, resp.text
+    assert resp.json()["status"] == "CONFIRMED"
+    mock_deduct.assert_awaited_once()
+
+
+@patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
+@patch("app.routers.order.set_cached_stock", new_callable=AsyncMock)
+@patch("app.routers.order.deduct_stock", new_callable=AsyncMock)
+def test_slow_request_renews_its_claim(mock_deduct, mock_set, mock_get, client):
+    """Past half the claim timeout the request renews its claim and still persists."""
+    from app.core.config import settings
+
+    mock_deduct.return_value = {"status": "success", "remaining_stock": 5}
+    with patch.object(settings, "IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS", 0):
+        resp = client.post(
+            "/order", json=_order_body(), headers={"Authorization": f"Bearer {_make_token()}"},
+        )
+
+    assert resp.status_code == 202, resp.text
+    assert resp.json()["status"] == "CONFIRMED"
+
+
+@patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
+@patch("app.routers.order.set_cached_stock", new_callable=AsyncMock)
+@patch("app.routers.order.deduct_stock", new_callable=AsyncMock)
+def test_request_whose_claim_was_taken_over_does_not_persist(mock_deduct, mock_set, mock_get, client):
+    """If a retry took the claim over meanwhile, the slow request backs off with 409."""
+    from datetime import datetime, timezone
+    from app.core.config import settings
+    from tests.conftest import _TestSessionLocal
+    from app.models.idempotency import IdempotencyKey
+    from app.models.order import GatewayOrder
+
+    body = _order_body()
+
+    async def _taken_over(**kwargs):
+        db = _TestSessionLocal()
+        key = db.query(IdempotencyKey).one()
+        key.updated_at = datetime.now(timezone.utc)     # the retry's claim
+        db.commit()
+        db.close()
+        return {"status": "success", "remaining_stock": 5}
+
+    mock_deduct.side_effect = _taken_over
+    with patch.object(settings, "IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS", 0):
+        resp = client.post("/order", json=body, headers={"Authorization": f"Bearer {_make_token()}"})
+
+    assert resp.status_code == 409
+    assert resp.json()["detail"] == "Order is already being processed"
+    db = _TestSessionLocal()
+    assert db.query(GatewayOrder).count() == 0
+    assert db.query(IdempotencyKey).one().status == "RECEIVED"
+    db.close()
+
+
+@patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
+@patch("app.routers.order.set_cached_stock", new_callable=AsyncMock)
+@patch("app.routers.order.deduct_stock", new_callable=AsyncMock)
+@patch("app.services.order_writer.write", new_callable=AsyncMock)
+def test_persist_failure_releases_claim(mock_write, mock_deduct, mock_set, mock_get, client):
+    """When the order cannot be saved the claim is dropped and a retry goes through."""
+    from tests.conftest import _TestSessionLocal
+    from app.models.idempotency import IdempotencyKey
+
+    mock_deduct.return_value = {"status": "success", "remaining_stock": 5}
+    mock_write.side_effect = RuntimeError("database is down")
+    body = _order_body()
+    headers = {"Authorization": f"Bearer {_make_token()}"}
+
+    resp = client.post("/order", json=body, headers=headers)
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "1"
+    db = _TestSessionLocal()
+    assert db.query(IdempotencyKey).count() == 0
+    db.close()
+
+    mock_write.side_effect = None
+    assert client.post("/order", json=body, headers=headers).status_code == 202
+
+
 # ---------------------------------------------------------------------------
 # Order record persisted in DB
 # ---------------------------------------------------------------------------
@@ -163,8 +300,7 @@ def test_failed_idempotency_returns_409(mock_deduct, mock_set, mock_get, client)
 @patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
 @patch("app.routers.order.set_cached_stock", new_callable=AsyncMock)
 @patch("app.routers.order.deduct_stock", new_callable=AsyncMock)
-@patch("app.routers.order.publish_order_event")
-def test_successful_order_persisted_in_db(mock_publish, mock_deduct, mock_set, mock_get, client):
+def test_successful_order_persisted_in_db(mock_deduct, mock_set, mock_get, client):
     """After a successful order, GatewayOrder and IdempotencyKey rows should exist."""
     from tests.conftest import _TestSessionLocal
     from app.models.order import GatewayOrder
@@ -210,8 +346,7 @@ def test_successful_order_persisted_in_db(mock_publish, mock_deduct, mock_set, m
 @patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
 @patch("app.routers.order.set_cached_stock", new_callable=AsyncMock)
 @patch("app.routers.order.deduct_stock", new_callable=AsyncMock)
-@patch("app.routers.order.publish_order_event")
-def test_kitchen_publish_contains_correct_data(mock_publish, mock_deduct, mock_set, mock_get, client):
+def test_kitchen_publish_contains_correct_data(mock_deduct, mock_set, mock_get, client):
     mock_deduct.return_value = {"remaining_stock": 3}
     oid = str(uuid.uuid4())
 
@@ -221,9 +356,15 @@ def test_kitchen_publish_contains_correct_data(mock_publish, mock_deduct, mock_s
         headers={"Authorization": f"Bearer {_make_token()}"},
     )
 
-    mock_publish.assert_called_once()
-    # First arg is the db session, second is the event dict
-    event = mock_publish.call_args[0][1]
+    from tests.conftest import _TestSessionLocal
+    from app.models.outbox import OutboxEvent
+
+    db = _TestSessionLocal()
+    events = db.query(OutboxEvent).filter(OutboxEvent.aggregate_id == oid).all()
+    db.close()
+    assert len(events) == 1
+    assert events[0].event_type == "order.placed"
+    event = events[0].payload
     assert event["order_id"] == oid
     assert event["item_id"] == "pasta"
     assert event["quantity"] == 1
@@ -276,8 +417,7 @@ def test_rejected_order_increments_rejected_counter(mock_deduct, mock_set, mock_
 @patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
 @patch("app.routers.order.set_cached_stock", new_callable=AsyncMock)
 @patch("app.routers.order.deduct_stock", new_callable=AsyncMock)
-@patch("app.routers.order.publish_order_event")
-def test_latency_recorded_on_success(mock_publish, mock_deduct, mock_set, mock_get, client):
+def test_latency_recorded_on_success(mock_deduct, mock_set, mock_get, client):
     from app.services.metrics import metrics
 
     mock_deduct.return_value = {"remaining_stock": 1}
@@ -0,0 +1,166 @@
+"""
+Tests for group-committed order persistence.
+
+Covers:
+  - Concurrent orders within the linger time commit as ONE batch
+  - Every order in the batch gets its row, CONFIRMED key and outbox event
+  - A full batch commits without waiting for the linger time
+  - A failing order does not fail the rest of its batch
+  - With the linger time at 0 each order commits on its own
+  - A cancelled caller waits for its batch, so its lease units settle, and
+    still sees the cancellation (timeouts keep firing)
+"""
+import asyncio
+import time
+import uuid
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.models.idempotency import IdempotencyKey
+from app.models.order import GatewayOrder
+from app.models.outbox import OutboxEvent
+from app.services import allotment, order_writer
+from app.services.metrics import _Metrics
+from tests.conftest import _TestAsyncSessionLocal, _TestSessionLocal
+
+
+def _received_orders(count: int) -> list[order_writer.ConfirmedOrder]:
+    orders = [
+        order_writer.ConfirmedOrder(
+            order_id=uuid.uuid4(), student_id="stu-001", item_id="burger", quantity=1,
+        )
+        for _ in range(count)
+    ]
+    db = _TestSessionLocal()
+    db.add_all(IdempotencyKey(order_id=o.order_id, request_hash="x" * 64) for o in orders)
+    db.commit()
+    db.close()
+    return orders
+
+
+@pytest.fixture()
+def fresh_metrics():
+    fresh = _Metrics()
+    with patch.object(order_writer, "metrics", fresh):
+        yield fresh
+
+
+def _write_all(orders, linger_ms: float = 20, max_batch: int = 10) -> list:
+    writer = order_writer._GroupCommitWriter(linger_ms, max_batch)
+
+    async def _run():
+        return await asyncio.gather(
+            *(order_writer.write(_TestAsyncSessionLocal, o) for o in orders),
+            return_exceptions=True,
+        )
+
+    with patch.object(order_writer, "_writer", writer), \
+            patch.object(settings, "ORDER_GROUP_COMMIT_LINGER_MS", linger_ms), \
+            patch.object(settings, "ORDER_GROUP_COMMIT_MAX_BATCH", max_batch):
+        return asyncio.run(_run())
+
+
+def test_concurrent_orders_share_one_commit(fresh_metrics):
+    orders = _received_orders(5)
+
+    assert _write_all(orders) == [None] * 5
+
+    snap = fresh_metrics.snapshot()
+    assert snap["order_commit_batches"] == 1
+    assert snap["order_commit_batch_avg_size"] == 5
+    db = _TestSessionLocal()
+    assert db.query(GatewayOrder).count() == 5
+    assert {k.status for k in db.query(IdempotencyKey)} == {"CONFIRMED"}
+    payloads = {e.payload["order_id"] for e in db.query(OutboxEvent)}
+    db.close()
+    assert payloads == {str(o.order_id) for o in orders}
+
+
+def test_full_batch_does_not_wait_for_linger(fresh_metrics):
+    orders = _received_orders(4)
+
+    started = time.monotonic()
+    _write_all(orders, linger_ms=5000, max_batch=4)
+
+    assert time.monotonic() - started < 2
+    assert fresh_metrics.snapshot()["order_commit_batches"] == 1
+
+
+def test_failing_order_does_not_fail_its_batch(fresh_metrics):
+    orders = _received_orders(3)
+    # Already persisted — its insert violates the unique order_id.
+    db = _TestSessionLocal()
+    db.add(GatewayOrder(order_id=orders[1].order_id, student_id="stu-001", item_id="burger", quantity=1))
+    db.commit()
+    db.close()
+
+    results = _write_all(orders)
+
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], IntegrityError)
+    db = _TestSessionLocal()
+    assert db.query(OutboxEvent).count() == 2
+    db.close()
+
+
+def test_without_linger_each_order_commits_alone(fresh_metrics):
+    orders = _received_orders(2)
+
+    assert _write_all(orders, linger_ms=0) == [None, None]
+
+    assert fresh_metrics.snapshot()["order_commit_batches"] == 0
+    db = _TestSessionLocal()
+    assert db.query(GatewayOrder).count() == 2
+    db.close()
+
+
+def test_cancelled_caller_keeps_its_lease_units_settled(fresh_metrics):
+    order = _received_orders(1)[0]
+    order.lease = allotment.Allotment(
+        lease_id="live", item_id="burger", remaining=4, expires_at=time.monotonic() + 60,
+    )
+    order.lease.remaining, order.lease.in_flight = 3, 1
+    writer = order_writer._GroupCommitWriter(50, 10)
+
+    async def _place() -> None:
+        with allotment.hold(order.lease, 1, committed=lambda: order.committed):
+            await order_writer.write(_TestAsyncSessionLocal, order)
+
+    async def _run() -> asyncio.Task:
+        task = asyncio.create_task(_place())
+        await asyncio.sleep(0.01)
+        task.cancel()                      # e.g. the client disconnected
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return task
+
+    with patch.object(order_writer, "_writer", writer), \
+            patch.object(settings, "ORDER_GROUP_COMMIT_LINGER_MS", 50), \
+            patch.object(settings, "ORDER_GROUP_COMMIT_MAX_BATCH", 10):
+        task = asyncio.run(_run())
+
+    assert task.cancelled()
+    assert order.committed
+    assert (order.lease.remaining, order.lease.in_flight) == (3, 0)
+    db = _TestSessionLocal()
+    assert db.query(GatewayOrder).count() == 1
+    db.close()
+
+
+def test_timeout_still_fires_while_the_batch_settles(fresh_metrics):
+    order = _received_orders(1)[0]
+    writer = order_writer._GroupCommitWriter(300, 10)
+
+    async def _run() -> None:
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(order_writer.write(_TestAsyncSessionLocal, order), 0.05)
+
+    with patch.object(order_writer, "_writer", writer), \
+            patch.object(settings, "ORDER_GROUP_COMMIT_LINGER_MS", 300), \
+            patch.object(settings, "ORDER_GROUP_COMMIT_MAX_BATCH", 10):
+        asyncio.run(_run())
+
+    assert order.committed
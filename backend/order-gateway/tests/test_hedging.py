@@ -0,0 +1,109 @@
+"""
+Tests for hedged stock deductions.
+
+Covers:
+  - No hedging until enough latencies are known; then the delay is the p95
+  - A slow deduction is hedged and the faster attempt wins
+  - A 4xx answer is returned at once, without a hedge
+  - Hedges stop once the retry budget is spent
+  - A failed attempt falls back to the other one
+"""
+import asyncio
+import time
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.services import order as order_service
+from app.services.order import _HedgePolicy
+
+
+def _policy(**overrides) -> _HedgePolicy:
+    options = dict(budget_ratio=1.0, percentile=95.0, min_delay_seconds=0.01, min_samples=5)
+    options.update(overrides)
+    policy = _HedgePolicy(**options)
+    for _ in range(10):
+        policy.observe("/stock/deduct", 0.02)
+    return policy
+
+
+class _Stock:
+    """Stand-in for _post_deduction that answers each attempt in turn."""
+
+    def __init__(self, *answers):
+        self._answers = list(answers)
+        self.calls = 0
+
+    async def __call__(self, path, payload):
+        delay, answer = self._answers[self.calls]
+        self.calls += 1
+        await asyncio.sleep(delay)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+def _status_error(code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://stock/stock/deduct")
+    return httpx.HTTPStatusError(
+        "failed", request=request, response=httpx.Response(code, request=request),
+    )
+
+
+def _hedged(policy: _HedgePolicy, stock: _Stock):
+    with patch.object(order_service, "_hedger", policy), \
+            patch.object(order_service, "_post_deduction", stock):
+        return asyncio.run(order_service._post_hedged("/stock/deduct", {}))
+
+
+def test_delay_follows_recent_p95():
+    policy = _HedgePolicy(budget_ratio=0.1, min_samples=20)
+    assert policy.delay("/stock/deduct") is None
+
+    for ms in range(1, 101):
+        policy.observe("/stock/deduct", ms / 1000)
+    with patch("app.services.order.time.monotonic", return_value=time.monotonic() + 1.5):
+        assert policy.delay("/stock/deduct") == pytest.approx(0.095, rel=0.1)
+    assert _HedgePolicy(budget_ratio=0.0).delay("/stock/deduct") is None
+
+
+def test_slow_deduction_is_hedged_and_hedge_wins():
+    policy = _policy()
+    stock = _Stock((1.0, {"attempt": "primary"}), (0.0, {"attempt": "hedge"}))
+
+    started = time.monotonic()
+    assert _hedged(policy, stock) == {"attempt": "hedge"}
+
+    assert time.monotonic() - started < 0.5
+    assert stock.calls == 2
+    stats = policy.stats()
+    assert stats["stock_hedges_total"] == 1
+    assert stats["stock_hedge_win_rate"] == 1.0
+
+
+def test_client_error_is_returned_without_hedge():
+    policy = _policy()
+    stock = _Stock((0.0, _status_error(409)))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        _hedged(policy, stock)
+    assert stock.calls == 1
+    assert policy.stats()["stock_hedges_total"] == 0
+
+
+def test_budget_limits_hedges():
+    policy = _policy(budget_ratio=0.1)
+    stock = _Stock((0.05, {"attempt": "primary"}))
+
+    assert _hedged(policy, stock) == {"attempt": "primary"}
+    assert stock.calls == 1
+    assert policy.stats()["stock_hedge_rate"] == 0.0
+
+
+def test_failed_attempt_falls_back_to_the_other():
+    policy = _policy()
+    stock = _Stock((0.05, httpx.ReadTimeout("slow")), (0.1, {"attempt": "hedge"}))
+
+    assert _hedged(policy, stock) == {"attempt": "hedge"}
+    assert policy.stats()["stock_hedge_wins_total"] == 1
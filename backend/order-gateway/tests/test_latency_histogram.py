@@ -0,0 +1,79 @@
+"""
+Tests for the latency histograms behind /metrics.
+
+Covers:
+  - Percentiles are within the bucket resolution of the true values
+  - The rolling window forgets samples older than 30 seconds
+  - /metrics/prometheus exports counters and a cumulative histogram
+"""
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import metrics as metrics_module
+from app.services.metrics import _Metrics
+
+
+@pytest.fixture()
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+def test_percentiles_within_bucket_resolution():
+    m = _Metrics()
+    for ms in range(1, 1001):
+        m.record_latency(float(ms))
+
+    snap = m.snapshot()
+    for key, expected in (("p50", 500), ("p95", 950), ("p99", 990)):
+        assert snap[f"latency_{key}_ms"] == pytest.approx(expected, rel=0.1)
+        assert snap[f"rolling_{key}_ms"] == pytest.approx(expected, rel=0.1)
+    assert snap["average_response_time_ms"] == pytest.approx(500.5)
+
+
+def test_rolling_window_forgets_old_samples():
+    m = _Metrics()
+    with patch.object(metrics_module.time, "monotonic", return_value=1000.0):
+        for _ in range(10):
+            m.record_latency(2000.0)
+        assert m.snapshot()["latency_alert"] is True
+
+    with patch.object(metrics_module.time, "monotonic", return_value=1031.0):
+        m.record_latency(10.0)
+        snap = m.snapshot()
+
+    assert snap["rolling_window_avg_ms"] == pytest.approx(10.0)
+    assert snap["rolling_p99_ms"] == pytest.approx(10.0, rel=0.1)
+    assert snap["latency_alert"] is False
+    # The all-time view still has everything.
+    assert snap["latency_p50_ms"] == pytest.approx(2000.0, rel=0.1)
+
+
+def test_prometheus_export(client):
+    fresh = _Metrics()
+    for ms in (0.5, 3.0, 3.0, 40.0, 500_000.0):
+        fresh.record_latency(ms)
+
+    with patch("app.services.worker_metrics.metrics", fresh):
+        resp = client.get("/metrics/prometheus")
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    lines = resp.text.splitlines()
+    assert "gateway_total_orders 0.0" in lines
+    assert "# TYPE gateway_order_latency_ms histogram" in lines
+
+    buckets = {
+        line.split('"')[1]: int(line.rsplit(" ", 1)[1])
+        for line in lines if line.startswith("gateway_order_latency_ms_bucket")
+    }
+    assert buckets["0.5"] == 1
+    assert buckets["4"] == 3
+    assert buckets["64"] == 4
+    assert buckets["+Inf"] == 5
+    values = list(buckets.values())
+    assert values == sorted(values)
+    assert "gateway_order_latency_ms_count 5" in lines
@@ -14,6 +14,8 @@ from fastapi.testclient import TestClient
 
 # conftest.py sets env vars; this import triggers Settings() resolution
 from app.main import app
+from app.models.outbox import OutboxEvent
+from tests.conftest import _TestSessionLocal
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -49,8 +51,7 @@ def client():
 @patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
 @patch("app.routers.order.set_cached_stock", new_callable=AsyncMock)
 @patch("app.routers.order.deduct_stock", new_callable=AsyncMock)
-@patch("app.routers.order.publish_order_event")
-def test_successful_order_returns_202(mock_publish, mock_deduct, mock_set, mock_get, client):
+def test_successful_order_returns_202(mock_deduct, mock_set, mock_get, client):
     mock_deduct.return_value = {"remaining_stock": 5}
     body = _order_body()
 
@@ -69,7 +70,10 @@ def test_successful_order_returns_202(mock_publish, mock_deduct, mock_set, mock_
         item_id=body["item_id"],
         quantity=body["quantity"],
     )
-    mock_publish.assert_called_once()
+    db = _TestSessionLocal()
+    events = db.query(OutboxEvent).filter(OutboxEvent.aggregate_id == body["order_id"]).all()
+    db.close()
+    assert len(events) == 1
 
 
 def test_missing_jwt_returns_401(client):
@@ -96,9 +100,8 @@ def test_expired_jwt_returns_401(mock_deduct, mock_get, client):
 @patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
 @patch("app.routers.order.set_cached_stock", new_callable=AsyncMock)
 @patch("app.routers.order.deduct_stock", new_callable=AsyncMock)
-@patch("app.routers.order.publish_order_event")
 def test_duplicate_order_id_not_double_decremented(
-    mock_publish, mock_deduct, mock_set, mock_get, client
+    mock_deduct, mock_set, mock_get, client
 ):
     """
     When the same order_id is submitted twice, the gateway's idempotency layer
@@ -148,9 +151,8 @@ def test_stock_service_timeout_returns_504(mock_deduct, mock_set, mock_get, clie
 @patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
 @patch("app.routers.order.set_cached_stock", new_callable=AsyncMock)
 @patch("app.routers.order.deduct_stock", new_callable=AsyncMock)
-@patch("app.routers.order.publish_order_event")
 def test_redis_unavailable_falls_back_to_stock_service(
-    mock_publish, mock_deduct, mock_set, mock_get, client
+    mock_deduct, mock_set, mock_get, client
 ):
     """
     When Redis returns None (simulating an unreachable cache), the request
@@ -172,9 +174,8 @@ def test_redis_unavailable_falls_back_to_stock_service(
 @patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
 @patch("app.routers.order.set_cached_stock", new_callable=AsyncMock)
 @patch("app.routers.order.deduct_stock", new_callable=AsyncMock)
-@patch("app.routers.order.publish_order_event")
 def test_successful_order_increments_metrics(
-    mock_publish, mock_deduct, mock_set, mock_get, client
+    mock_deduct, mock_set, mock_get, client
 ):
     from app.services.metrics import metrics
 
@@ -0,0 +1,138 @@
+"""
+Tests for the gateway's order status projection and GET /orders.
+
+Covers:
+  - Status events only move an order forward, whatever order they arrive in
+  - The kitchen_events consumer applies valid events and drops malformed ones
+  - GET /orders pages through a student's orders with a keyset cursor and
+    reports the projected status (PENDING when there is none)
+"""
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.order import GatewayOrder
+from app.models.order_status import OrderStatusView
+from app.services import order_status
+from tests.conftest import _TestAsyncSessionLocal, _TestSessionLocal
+
+_JWT_SECRET = "test-secret-for-pytest-at-least-32-bytes!"
+
+
+def _auth(student_id: str) -> dict:
+    token = jwt.encode(
+        {"student_id": student_id, "exp": int(time.time()) + 3600}, _JWT_SECRET, algorithm="HS256",
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture()
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+def _stored_status(order_id: uuid.UUID) -> str | None:
+    db = _TestSessionLocal()
+    try:
+        row = db.get(OrderStatusView, order_id)
+        return row.status if row else None
+    finally:
+        db.close()
+
+
+def _apply(order_id: uuid.UUID, status: str) -> None:
+    async def _run():
+        async with _TestAsyncSessionLocal() as db:
+            await order_status.apply_status(db, order_id, status)
+            await db.commit()
+
+    asyncio.run(_run())
+
+
+def _message(body: bytes) -> MagicMock:
+    message = MagicMock()
+    message.body = body
+    message.ack = AsyncMock()
+    message.nack = AsyncMock()
+    return message
+
+
+def test_status_only_moves_forward():
+    order_id = uuid.uuid4()
+
+    _apply(order_id, "PENDING")
+    _apply(order_id, "IN_KITCHEN")
+    _apply(order_id, "STOCK_VERIFIED")   # late delivery
+    assert _stored_status(order_id) == "IN_KITCHEN"
+
+    _apply(order_id, "READY")
+    _apply(order_id, "READY")            # redelivery
+    assert _stored_status(order_id) == "READY"
+
+
+@patch("app.core.database.SessionLocal", _TestAsyncSessionLocal)
+def test_consumer_applies_events_and_drops_malformed_ones():
+    order_id = uuid.uuid4()
+    good = _message(json.dumps({"order_id": str(order_id), "status": "STOCK_VERIFIED"}).encode())
+    bad = _message(b'{"order_id": "not-a-uuid", "status": "READY"}')
+
+    asyncio.run(order_status._on_message(good))
+    asyncio.run(order_status._on_message(bad))
+
+    assert _stored_status(order_id) == "STOCK_VERIFIED"
+    good.ack.assert_awaited_once()
+    bad.ack.assert_awaited_once()
+    bad.nack.assert_not_called()
+
+
+def test_list_orders_pages_with_cursor(client):
+    base = datetime.now(timezone.utc) - timedelta(hours=1)
+    orders = [
+        GatewayOrder(
+            order_id=uuid.uuid4(),
+            student_id="stu-001",
+            item_id=f"item-{i}",
+            quantity=1,
+            status="CONFIRMED",
+            created_at=base + timedelta(minutes=i),
+        )
+        for i in range(5)
+    ]
+    db = _TestSessionLocal()
+    db.add_all(orders)
+    db.add(GatewayOrder(
+        order_id=uuid.uuid4(), student_id="someone-else", item_id="x", quantity=1,
+        status="CONFIRMED", created_at=base,
+    ))
+    db.add(OrderStatusView(order_id=orders[4].order_id, status="READY", status_rank=3))
+    db.commit()
+    db.close()
+
+    seen = []
+    cursor = None
+    for expected_size in (2, 2, 1):
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        resp = client.get("/orders", params=params, headers=_auth("stu-001"))
+        assert resp.status_code == 200
+        body = resp.json()
+        assert len(body["orders"]) == expected_size
+        seen.extend(body["orders"])
+        cursor = body["next_cursor"]
+    assert cursor is None
+
+    assert [o["item_id"] for o in seen] == ["item-4", "item-3", "item-2", "item-1", "item-0"]
+    assert [o["status"] for o in seen] == ["READY", "PENDING", "PENDING", "PENDING", "PENDING"]
+
+
+def test_invalid_cursor_is_400(client):
+    resp = client.get("/orders", params={"cursor": "garbage"}, headers=_auth("stu-001"))
+    assert resp.status_code == 400
@@ -0,0 +1,188 @@
+"""
+Tests for GET /orders/{order_id}.
+
+Redis is mocked.
+
+Covers:
+  - A cache miss reads the DB and caches the order; a hit skips the DB
+  - Orders of other students are 404
+  - ETag / If-None-Match answers 304 when the status is unchanged
+  - A long poll returns as soon as the status changes, or 304 after the wait
+  - A long poll answers 404 if the order disappears while it waits
+  - Status changes refresh the cache and are announced to other replicas
+"""
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, patch
+
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.order import GatewayOrder
+from app.services import order_tracking
+from app.services.metrics import metrics
+from tests.conftest import _TestSessionLocal
+
+_JWT_SECRET = "test-secret-for-pytest-at-least-32-bytes!"
+
+
+def _auth(student_id: str = "stu-001") -> dict:
+    token = jwt.encode(
+        {"student_id": student_id, "exp": int(time.time()) + 3600}, _JWT_SECRET, algorithm="HS256",
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _summary(order_id: uuid.UUID, student_id: str = "stu-001") -> str:
+    return json.dumps({
+        "order_id": str(order_id),
+        "student_id": student_id,
+        "item_id": "burger",
+        "quantity": 1,
+        "items": None,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    })
+
+
+@pytest.fixture()
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture()
+def redis_client():
+    redis = AsyncMock()
+    redis.hmget.return_value = [None, None]
+    redis.eval.return_value = [None, None]
+    with patch.object(order_tracking, "_get_client", return_value=redis):
+        yield redis
+
+
+def test_cache_miss_reads_db_and_fills_cache(redis_client, client):
+    order_id = uuid.uuid4()
+    db = _TestSessionLocal()
+    db.add(GatewayOrder(
+        order_id=order_id, student_id="stu-001", item_id="burger", quantity=2, status="CONFIRMED",
+    ))
+    db.commit()
+    db.close()
+    redis_client.eval.side_effect = lambda *args: [args[6], args[3]]
+    before = metrics.snapshot()["order_cache_misses"]
+
+    resp = client.get(f"/orders/{order_id}", headers=_auth())
+
+    assert resp.status_code == 200
+    assert resp.json()["status"] == "PENDING"
+    assert resp.json()["quantity"] == 2
+    assert resp.headers["ETag"] == '"PENDING"'
+    cached = json.loads(redis_client.eval.await_args.args[6])
+    assert cached["student_id"] == "stu-001"
+    assert metrics.snapshot()["order_cache_misses"] == before + 1
+
+
+def test_cache_hit_skips_db(redis_client, client):
+    order_id = uuid.uuid4()   # not in the DB at all
+    redis_client.hmget.return_value = [_summary(order_id), "IN_KITCHEN"]
+
+    resp = client.get(f"/orders/{order_id}", headers=_auth())
+
+    assert resp.status_code == 200
+    assert resp.json()["status"] == "IN_KITCHEN"
+    redis_client.eval.assert_not_called()
+
+
+def test_other_students_order_is_404(redis_client, client):
+    order_id = uuid.uuid4()
+    redis_client.hmget.return_value = [_summary(order_id, "stu-001"), "READY"]
+
+    resp = client.get(f"/orders/{order_id}", headers=_auth("stu-002"))
+
+    assert resp.status_code == 404
+
+
+def test_unchanged_status_is_304(redis_client, client):
+    order_id = uuid.uuid4()
+    redis_client.hmget.return_value = [_summary(order_id), "READY"]
+
+    resp = client.get(
+        f"/orders/{order_id}", headers={**_auth(), "If-None-Match": '"READY"'},
+    )
+
+    assert resp.status_code == 304
+    assert resp.headers["ETag"] == '"READY"'
+
+
+def test_long_poll_returns_on_status_change(redis_client, client):
+    order_id = uuid.uuid4()
+    redis_client.hmget.side_effect = [
+        [_summary(order_id), "STOCK_VERIFIED"],
+        [_summary(order_id), "STOCK_VERIFIED"],
+        [_summary(order_id), "IN_KITCHEN"],
+    ]
+
+    with patch.object(order_tracking, "_RECHECK_SECONDS", 0.01):
+        resp = client.get(
+            f"/orders/{order_id}",
+            params={"wait": 5},
+            headers={**_auth(), "If-None-Match": '"STOCK_VERIFIED"'},
+        )
+
+    assert resp.status_code == 200
+    assert resp.json()["status"] == "IN_KITCHEN"
+    assert resp.headers["ETag"] == '"IN_KITCHEN"'
+
+
+def test_long_poll_times_out_with_304(redis_client, client):
+    order_id = uuid.uuid4()
+    redis_client.hmget.return_value = [_summary(order_id), "READY"]
+
+    started = time.monotonic()
+    resp = client.get(
+        f"/orders/{order_id}",
+        params={"wait": 0.2},
+        headers={**_auth(), "If-None-Match": '"READY"'},
+    )
+
+    assert resp.status_code == 304
+    assert time.monotonic() - started >= 0.2
+
+
+def test_long_poll_404s_when_order_disappears(redis_client, client):
+    order_id = uuid.uuid4()
+    redis_client.hmget.side_effect = [
+        [_summary(order_id), "READY"],
+        [None, None],                     # evicted, and not in the DB either
+    ]
+
+    with patch.object(order_tracking, "_RECHECK_SECONDS", 0.01):
+        resp = client.get(
+            f"/orders/{order_id}",
+            params={"wait": 5},
+            headers={**_auth(), "If-None-Match": '"READY"'},
+        )
+
+    assert resp.status_code == 404
+
+
+def test_status_change_wakes_waiters_and_refreshes_cache(redis_client):
+    order_id = uuid.uuid4()
+
+    async def _run() -> float:
+        started = time.monotonic()
+        waiter = asyncio.create_task(order_tracking.wait_for_change(order_id, 5.0))
+        await asyncio.sleep(0)
+        await order_tracking.record_status_change(order_id, "READY")
+        await waiter
+        return time.monotonic() - started
+
+    assert asyncio.run(_run()) < 1.0
+    args = redis_client.eval.await_args.args
+    assert args[2:6] == (f"order:{order_id}", "READY", 3, order_tracking._ORDER_TTL_SECONDS)
+    redis_client.publish.assert_awaited_once_with(order_tracking._CHANGED_CHANNEL, str(order_id))
+    assert order_tracking._waiters == {}
@@ -0,0 +1,149 @@
+"""
+Tests for the push-driven outbox relay.
+
+Covers:
+  - Committing an outbox row wakes the relay immediately
+  - A relay batch publishes pending rows and marks them published
+  - Outbox lag metric reflects the oldest unpublished row
+  - Only broker-confirmed events are marked published; batch size adapts
+"""
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+
+from sqlalchemy import text
+
+from app.models.outbox import OutboxEvent
+from app.services import queue
+from app.services.metrics import metrics
+from tests.conftest import _TestAsyncSessionLocal, _TestSessionLocal
+
+
+def _lend(exchange):
+    @asynccontextmanager
+    async def _exchange(name):
+        yield exchange
+    return _exchange
+
+
+def _event(order_id: str | None = None) -> dict:
+    return {
+        "order_id": order_id or str(uuid.uuid4()),
+        "item_id": "burger",
+        "quantity": 1,
+        "student_id": "stu-001",
+    }
+
+
+def test_commit_wakes_relay():
+    async def _run() -> tuple[bool, bool]:
+        queue._relay_wakeup = asyncio.Event()
+        async with _TestAsyncSessionLocal() as db:
+            queue.publish_order_event(db, _event())
+            before_commit = queue._relay_wakeup.is_set()
+            await db.commit()
+        return before_commit, queue._relay_wakeup.is_set()
+
+    try:
+        before_commit, after_commit = asyncio.run(_run())
+    finally:
+        queue._relay_wakeup = None
+
+    assert before_commit is False
+    assert after_commit is True
+
+
+def test_rollback_does_not_wake_relay():
+    async def _run() -> bool:
+        queue._relay_wakeup = asyncio.Event()
+        async with _TestAsyncSessionLocal() as db:
+            queue.publish_order_event(db, _event())
+            await db.rollback()
+        return queue._relay_wakeup.is_set()
+
+    try:
+        assert asyncio.run(_run()) is False
+    finally:
+        queue._relay_wakeup = None
+
+
+@patch("app.core.database.SessionLocal", _TestAsyncSessionLocal)
+def test_relay_batch_publishes_and_marks_rows():
+    db = _TestSessionLocal()
+    for _ in range(3):
+        db.add(OutboxEvent(aggregate_id="x", event_type="order.placed", payload=_event()))
+    db.commit()
+    db.close()
+
+    exchange = AsyncMock()
+    with patch.object(queue, "_exchange", _lend(exchange)):
+        published = asyncio.run(queue._relay_batch())
+
+    assert published == 3
+    assert exchange.publish.await_count == 3
+    db = _TestSessionLocal()
+    try:
+        unpublished = db.execute(
+            text("SELECT COUNT(*) FROM outbox_events WHERE published = 0")
+        ).scalar()
+        assert unpublished == 0
+    finally:
+        db.close()
+
+
+@patch("app.core.database.SessionLocal", _TestAsyncSessionLocal)
+def test_outbox_lag_metric_tracks_oldest_unpublished_row():
+    asyncio.run(queue._record_outbox_lag())
+    assert metrics.snapshot()["outbox_lag_seconds"] == 0.0
+
+    db = _TestSessionLocal()
+    db.add(OutboxEvent(
+        aggregate_id="x",
+        event_type="order.placed",
+        payload=_event(),
+        created_at=datetime.now(timezone.utc) - timedelta(seconds=30),
+    ))
+    db.commit()
+    db.close()
+
+    asyncio.run(queue._record_outbox_lag())
+    assert metrics.snapshot()["outbox_lag_seconds"] >= 30.0
+    metrics.set_outbox_lag(0.0)
+
+
+@patch("app.core.database.SessionLocal", _TestAsyncSessionLocal)
+def test_relay_batch_only_marks_confirmed_events():
+    db = _TestSessionLocal()
+    for i in range(4):
+        db.add(OutboxEvent(aggregate_id=str(i), event_type="order.placed", payload={"n": i}))
+    db.commit()
+    db.close()
+
+    async def _publish(message, routing_key):
+        if b'"n": 2' in message.body:
+            raise ConnectionError("broker nack")
+
+    exchange = AsyncMock()
+    exchange.publish.side_effect = _publish
+    with patch.object(queue, "_exchange", _lend(exchange)):
+        published = asyncio.run(queue._relay_batch())
+
+    assert published == 3
+    db = _TestSessionLocal()
+    try:
+        left = db.execute(
+            text("SELECT aggregate_id FROM outbox_events WHERE published = 0")
+        ).scalars().all()
+        assert left == ["2"]
+    finally:
+        db.close()
+
+
+def test_batch_size_adapts_to_backlog():
+    assert queue._next_batch_size(50, 50) == 100
+    assert queue._next_batch_size(800, 800) == queue._RELAY_BATCH_MAX
+    assert queue._next_batch_size(400, 10) == 200
+    assert queue._next_batch_size(50, 0) == queue._RELAY_BATCH_MIN
+    assert queue._next_batch_size(100, 60) == 100
@@ -0,0 +1,107 @@
+"""
+Tests for the per-phase timing of POST /order.
+
+Redis and stock-service are mocked.
+
+Covers:
+  - A confirmed order reports every phase in Server-Timing
+  - A cache short-circuit reports the phases it ran, also on the 409
+  - Phase durations are recorded under the outcome of the request
+  - /metrics/prometheus exports the phase histograms labelled by outcome
+"""
+import time
+import uuid
+from unittest.mock import AsyncMock, patch
+
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.metrics import PhaseTimer, _Metrics
+
+_JWT_SECRET = "test-secret-for-pytest-at-least-32-bytes!"
+
+
+def _auth() -> dict:
+    token = jwt.encode(
+        {"student_id": "stu-001", "exp": int(time.time()) + 3600}, _JWT_SECRET, algorithm="HS256",
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _order_body() -> dict:
+    return {"order_id": str(uuid.uuid4()), "item_id": "burger", "quantity": 1}
+
+
+def _timing_names(header: str) -> list[str]:
+    return [entry.split(";", 1)[0].strip() for entry in header.split(",")]
+
+
+@pytest.fixture()
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture()
+def fresh_metrics():
+    fresh = _Metrics()
+    with patch("app.routers.order.metrics", fresh), patch("app.services.worker_metrics.metrics", fresh):
+        yield fresh
+
+
+@patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
+@patch("app.routers.order.set_cached_stock", new_callable=AsyncMock)
+@patch("app.routers.order.deduct_stock", new_callable=AsyncMock, return_value={"remaining_stock": 5})
+def test_success_reports_every_phase(
+    mock_deduct, mock_set, mock_get, fresh_metrics, client,
+):
+    resp = client.post("/order", json=_order_body(), headers=_auth())
+
+    assert resp.status_code == 202
+    assert _timing_names(resp.headers["Server-Timing"]) == [
+        "admission", "idempotency", "cache", "stock", "persist", "total",
+    ]
+    outcomes = {(phase, outcome) for phase, outcome, *_ in fresh_metrics.phase_histograms()}
+    assert ("stock", "success") in outcomes
+    assert fresh_metrics.snapshot()["phase_stock_avg_ms"] > 0
+
+
+@patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=0)
+@patch("app.routers.order.deduct_stock", new_callable=AsyncMock)
+def test_cache_reject_reports_phases_on_409(mock_deduct, mock_get, fresh_metrics, client):
+    resp = client.post("/order", json=_order_body(), headers=_auth())
+
+    assert resp.status_code == 409
+    assert _timing_names(resp.headers["Server-Timing"]) == [
+        "admission", "idempotency", "cache", "total",
+    ]
+    histograms = fresh_metrics.phase_histograms()
+    assert {outcome for _, outcome, *_ in histograms} == {"cache_reject"}
+    assert "stock" not in {phase for phase, *_ in histograms}
+
+
+def test_phase_timer_charges_time_to_running_phase():
+    timer = PhaseTimer()
+    timer.begin("cache")
+    time.sleep(0.01)
+    timer.begin("stock")
+    durations = timer.finish()
+
+    assert durations["cache"] >= 10
+    assert durations["stock"] < durations["cache"]
+    assert 'cache;desc="Redis";dur=' in timer.server_timing()
+
+
+def test_prometheus_exports_phase_histograms(fresh_metrics, client):
+    fresh_metrics.record_phases("success", {"stock": 3.0, "persist": 1.0})
+    fresh_metrics.record_phases("timeout", {"stock": 2000.0})
+
+    lines = client.get("/metrics/prometheus").text.splitlines()
+
+    assert "# TYPE gateway_order_phase_ms histogram" in lines
+    assert 'gateway_order_phase_ms_count{phase="stock",outcome="success"} 1' in lines
+    assert 'gateway_order_phase_ms_count{phase="stock",outcome="timeout"} 1' in lines
+    assert 'gateway_order_phase_ms_bucket{phase="stock",outcome="success",le="4"} 1' in lines
+    assert 'gateway_order_phase_ms_bucket{phase="stock",outcome="timeout",le="+Inf"} 1' in lines
@@ -0,0 +1,132 @@
+"""
+Tests for outbox / idempotency retention.
+
+Covers:
+  - Published outbox rows past the TTL are purged; pending rows never are
+  - Idempotency keys past the TTL are purged; recent ones are kept
+  - Purging runs in batches and updates the retention metrics
+  - A retry arriving after its key was purged is answered as a replay
+"""
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+
+import jwt
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.main import app
+from app.models.idempotency import IdempotencyKey
+from app.models.order import GatewayOrder
+from app.models.outbox import OutboxEvent
+from app.services.metrics import metrics
+from app.services.retention import run_retention_pass
+from tests.conftest import _TestAsyncSessionLocal, _TestSessionLocal
+
+_OLD = datetime.now(timezone.utc) - timedelta(days=30)
+_RECENT = datetime.now(timezone.utc) - timedelta(minutes=1)
+
+
+def _outbox(published: bool, at: datetime) -> OutboxEvent:
+    return OutboxEvent(
+        aggregate_id=str(uuid.uuid4()),
+        event_type="order.placed",
+        payload={},
+        created_at=at,
+        published=published,
+        published_at=at if published else None,
+    )
+
+
+def _idem(at: datetime) -> IdempotencyKey:
+    return IdempotencyKey(
+        order_id=uuid.uuid4(),
+        request_hash="x" * 64,
+        status="CONFIRMED",
+        created_at=at,
+        updated_at=at,
+    )
+
+
+def _count(table: str) -> int:
+    db = _TestSessionLocal()
+    try:
+        return db.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+    finally:
+        db.close()
+
+
+@patch("app.core.database.SessionLocal", _TestAsyncSessionLocal)
+def test_retention_purges_only_expired_rows():
+    db = _TestSessionLocal()
+    db.add_all([
+        _outbox(published=True, at=_OLD),
+        _outbox(published=True, at=_RECENT),
+        _outbox(published=False, at=_OLD),   # never relayed — must survive
+        _idem(_OLD),
+        _idem(_RECENT),
+    ])
+    db.commit()
+    db.close()
+
+    purged = asyncio.run(run_retention_pass())
+
+    assert purged == 2
+    assert _count("outbox_events") == 2
+    assert _count("idempotency_keys") == 1
+    snap = metrics.snapshot()
+    assert snap["outbox_rows"] == 2
+    assert snap["idempotency_rows"] == 1
+
+
+@patch("app.core.database.SessionLocal", _TestAsyncSessionLocal)
+def test_retention_deletes_in_batches():
+    db = _TestSessionLocal()
+    db.add_all([_outbox(published=True, at=_OLD) for _ in range(7)])
+    db.commit()
+    db.close()
+    before = metrics.snapshot()["retention_purged_total"]
+
+    with patch.object(settings, "RETENTION_BATCH_SIZE", 3):
+        purged = asyncio.run(run_retention_pass())
+
+    assert purged == 7
+    assert _count("outbox_events") == 0
+    assert metrics.snapshot()["retention_purged_total"] == before + 7
+
+
+@patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
+@patch("app.routers.order.set_cached_stock", new_callable=AsyncMock)
+@patch("app.routers.order.deduct_stock", new_callable=AsyncMock)
+def test_retry_after_key_purge_is_a_replay(mock_deduct, mock_set, mock_get):
+    # The order went through long ago; retention has since purged its key.
+    mock_deduct.return_value = {"status": "success", "message": "Stock already deducted"}
+    order_id = uuid.uuid4()
+    db = _TestSessionLocal()
+    db.add(GatewayOrder(
+        order_id=order_id, student_id="stu-001", item_id="burger", quantity=1, status="CONFIRMED",
+    ))
+    db.commit()
+    db.close()
+
+    token = jwt.encode(
+        {"student_id": "stu-001", "exp": int(time.time()) + 3600},
+        "test-secret-for-pytest-at-least-32-bytes!", algorithm="HS256",
+    )
+    with TestClient(app) as client:
+        resp = client.post(
+            "/order",
+            json={"order_id": str(order_id), "item_id": "burger", "quantity": 1},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+    assert resp.status_code == 202, resp.text
+    assert resp.json()["status"] == "CONFIRMED"
+    assert _count("gateway_orders") == 1
+    assert _count("outbox_events") == 0
+    db = _TestSessionLocal()
+    assert db.query(IdempotencyKey).one().status == "CONFIRMED"
+    db.close()
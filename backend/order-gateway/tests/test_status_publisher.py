@@ -0,0 +1,82 @@
+"""
+Tests for the bounded PENDING status publisher.
+
+Covers:
+  - Notifications beyond the queue size are dropped and counted
+  - A worker drains queued notifications and publishes them as one batch
+  - Only broker-confirmed publishes count as published
+  - Without started workers (TESTING) publishing is a no-op
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.services import queue
+from app.services.metrics import _Metrics
+
+
+@pytest.fixture()
+def fresh_metrics():
+    fresh = _Metrics()
+    with patch.object(queue, "metrics", fresh):
+        yield fresh
+
+
+def _lend(exchange, checkouts: list):
+    @asynccontextmanager
+    async def _exchange(name):
+        checkouts.append(name)
+        yield exchange
+    return _exchange
+
+
+def test_full_queue_drops_and_counts(fresh_metrics):
+    with patch.object(queue, "_status_queue", asyncio.Queue(maxsize=2)):
+        for n in range(5):
+            queue.publish_status_event({"n": n})
+        assert queue.status_queue_depth() == 2
+
+    assert fresh_metrics.snapshot()["status_events_dropped"] == 3
+
+
+def test_worker_publishes_queued_events_as_one_batch(fresh_metrics):
+    exchange = AsyncMock()
+    checkouts: list[str] = []
+
+    async def _run():
+        status_queue = asyncio.Queue()
+        for n in range(5):
+            status_queue.put_nowait({"n": n})
+        worker = asyncio.create_task(queue._status_worker(status_queue))
+        await asyncio.sleep(0.05)
+        worker.cancel()
+
+    with patch.object(queue, "_exchange", _lend(exchange, checkouts)):
+        asyncio.run(_run())
+
+    assert checkouts == [queue.NOTIFY_EXCHANGE_NAME]
+    assert exchange.publish.await_count == 5
+    assert exchange.publish.await_args.kwargs["routing_key"] == queue.NOTIFY_ROUTING_KEY
+    assert fresh_metrics.snapshot()["status_events_published"] == 5
+
+
+def test_unconfirmed_publishes_count_as_failures(fresh_metrics):
+    async def _publish(message, routing_key):
+        if b'"n": 1' in message.body:
+            raise ConnectionError("broker nack")
+
+    exchange = AsyncMock()
+    exchange.publish.side_effect = _publish
+    with patch.object(queue, "_exchange", _lend(exchange, [])):
+        confirmed = asyncio.run(queue._publish_status_batch([{"n": 0}, {"n": 1}, {"n": 2}]))
+
+    assert confirmed == 2
+
+
+def test_publish_without_workers_is_a_noop(fresh_metrics):
+    queue.publish_status_event({"n": 0})
+
+    assert queue.status_queue_depth() == 0
+    assert fresh_metrics.snapshot()["status_events_dropped"] == 0
@@ -0,0 +1,94 @@
+"""
+Tests for the two-tier (in-process L1 + Redis) stock cache.
+
+Covers:
+  - An L1 hit answers without touching Redis; hit ratios are reported per tier
+  - set_cached_stock refreshes L1 locally and publishes an invalidation
+  - Invalidations from other replicas evict L1; our own are ignored
+  - L1 entries expire after the TTL and the LRU is bounded
+  - A Redis read that raced an invalidation does not repopulate L1
+"""
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.services import cache
+from app.services.metrics import metrics
+
+
+@pytest.fixture()
+def redis_client():
+    client = AsyncMock()
+    client.get.return_value = None
+    with patch.object(cache, "_l1", cache._LocalCache(ttl_seconds=30.0, max_entries=8)), \
+            patch.object(cache, "_get_client", return_value=client):
+        yield client
+
+
+def test_l1_hit_skips_redis(redis_client):
+    redis_client.get.return_value = "0"
+    before = metrics.snapshot()
+
+    assert asyncio.run(cache.get_cached_stock("burger")) == 0
+    assert asyncio.run(cache.get_cached_stock("burger")) == 0
+
+    assert redis_client.get.await_count == 1
+    snap = metrics.snapshot()
+    assert snap["stock_cache_l1_hits"] == before["stock_cache_l1_hits"] + 1
+    assert snap["stock_cache_l1_misses"] == before["stock_cache_l1_misses"] + 1
+    assert snap["stock_cache_l2_hits"] == before["stock_cache_l2_hits"] + 1
+    assert 0.0 < snap["stock_cache_l1_hit_ratio"] <= 1.0
+
+
+def test_redis_miss_is_not_cached_in_l1(redis_client):
+    assert asyncio.run(cache.get_cached_stock("fries")) is None
+    assert asyncio.run(cache.get_cached_stock("fries")) is None
+    assert redis_client.get.await_count == 2
+
+
+def test_set_updates_l1_and_publishes_invalidation(redis_client):
+    asyncio.run(cache.set_cached_stock("burger", 4))
+
+    redis_client.set.assert_awaited_once_with("stock:burger", 4, ex=cache._CACHE_TTL_SECONDS)
+    channel, data = redis_client.publish.await_args.args
+    assert channel == cache._INVALIDATION_CHANNEL
+    assert json.loads(data) == {"item_id": "burger", "origin": cache._INSTANCE_ID}
+    assert asyncio.run(cache.get_cached_stock("burger")) == 4
+    redis_client.get.assert_not_called()
+
+
+def test_invalidation_from_other_replica_evicts(redis_client):
+    cache._l1.put("burger", 4)
+    cache._handle_invalidation(json.dumps({"item_id": "burger", "origin": cache._INSTANCE_ID}))
+    assert cache._l1.get("burger") == 4
+
+    cache._handle_invalidation(json.dumps({"item_id": "burger", "origin": "other-replica"}))
+    assert cache._l1.get("burger") is None
+
+    cache._handle_invalidation("not json")  # ignored, no exception
+
+
+def test_l1_expires_and_is_bounded():
+    l1 = cache._LocalCache(ttl_seconds=30.0, max_entries=2)
+    l1.put("a", 1)
+    l1.put("b", 2)
+    l1.get("a")          # a is now most recently used
+    l1.put("c", 3)
+    assert l1.get("b") is None
+    assert l1.get("a") == 1 and l1.get("c") == 3
+
+    with patch.object(cache.time, "monotonic", return_value=cache.time.monotonic() + 60):
+        assert l1.get("a") is None
+
+
+def test_read_racing_invalidation_does_not_repopulate_l1(redis_client):
+    async def _stale_get(key):
+        cache._handle_invalidation(json.dumps({"item_id": "burger", "origin": "other-replica"}))
+        return "5"
+
+    redis_client.get.side_effect = _stale_get
+
+    assert asyncio.run(cache.get_cached_stock("burger")) == 5
+    assert cache._l1.get("burger") is None
@@ -0,0 +1,116 @@
+"""
+Tests for the stock-service connection pool.
+
+A throwaway HTTP/1.1 server on localhost stands in for stock-service.
+
+Covers:
+  - The client is built from the pool, timeout and keep-alive settings
+  - Requests queued behind a busy connection report their pool wait
+  - Keep-alive connections are reused, so only one new connection is counted
+  - An exhausted pool sheds with StockServiceOverloaded, not a breaker failure
+  - Pool stats fall back to zeros if httpcore's pool internals change
+"""
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from app.core.config import settings
+from app.services import order as order_service
+from app.services.metrics import _Metrics
+from app.services.order import StockServiceOverloaded, _CircuitBreaker, _ConcurrencyLimiter
+
+_BODY = b'{"status": "success", "remaining_stock": 5}'
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, delay: float) -> None:
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            await asyncio.sleep(delay)
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                b"Content-Length: %d\r\n\r\n%s" % (len(_BODY), _BODY)
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _post_concurrently(calls: int, delay: float) -> list:
+    server = await asyncio.start_server(lambda r, w: _handle(r, w, delay), "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        with patch.object(settings, "STOCK_SERVICE_URL", f"http://127.0.0.1:{port}"):
+            return await asyncio.gather(
+                *(order_service._post_deduction("/stock/deduct", {}) for _ in range(calls)),
+                return_exceptions=True,
+            )
+    finally:
+        await order_service.close_http_client()
+        server.close()
+        await server.wait_closed()
+
+
+@pytest.fixture()
+def fresh_metrics():
+    fresh = _Metrics()
+    breaker = _CircuitBreaker(
+        window_seconds=10, min_calls=4, failure_rate=0.5, slow_call_seconds=1.0,
+        slow_call_rate=0.8, recovery_timeout=30, half_open_probes=2,
+    )
+    with patch.object(order_service, "metrics", fresh), \
+            patch.object(order_service, "_breaker", breaker), \
+            patch.object(order_service, "_limiter", _ConcurrencyLimiter(50, 4, 200)):
+        yield fresh
+
+
+def test_client_uses_pool_settings():
+    with patch.object(settings, "STOCK_POOL_MAX_CONNECTIONS", 7), \
+            patch.object(settings, "STOCK_POOL_MAX_KEEPALIVE", 3), \
+            patch.object(settings, "STOCK_POOL_TIMEOUT_MS", 250):
+        client = order_service._get_client()
+        try:
+            pool = order_service._pool_transport._pool
+            assert pool._max_connections == 7
+            assert pool._max_keepalive_connections == 3
+            assert client.timeout.pool == 0.25
+            assert client.timeout.read == settings.GATEWAY_TIMEOUT_MS / 1000.0
+        finally:
+            asyncio.run(order_service.close_http_client())
+
+
+def test_queued_requests_report_pool_wait(fresh_metrics):
+    with patch.object(settings, "STOCK_POOL_MAX_CONNECTIONS", 1), \
+            patch.object(settings, "STOCK_POOL_TIMEOUT_MS", 5000):
+        results = asyncio.run(_post_concurrently(3, delay=0.05))
+
+    assert all(r["status"] == "success" for r in results)
+    snap = fresh_metrics.snapshot()
+    # The third request waited for two 50 ms responses.
+    assert snap["stock_pool_wait_p99_ms"] >= 80
+    assert snap["stock_pool_new_connections_per_sec"] == pytest.approx(1 / 30, abs=1e-3)
+    assert order_service._stock_pool_stats()["stock_pool_connections"] == 0
+
+
+def test_exhausted_pool_sheds(fresh_metrics):
+    with patch.object(settings, "STOCK_POOL_MAX_CONNECTIONS", 1), \
+            patch.object(settings, "STOCK_POOL_TIMEOUT_MS", 20):
+        results = asyncio.run(_post_concurrently(2, delay=0.2))
+
+    assert sum(isinstance(r, StockServiceOverloaded) for r in results) == 1
+    assert order_service._breaker.state == "CLOSED"
+    assert [b[1:3] for b in order_service._breaker._buckets] == [[1, 0]]   # one success, no failure
+
+
+def test_pool_stats_survive_missing_pool_internals():
+    transport = order_service._transport()
+    with patch.object(transport, "_pool", object()):
+        assert transport.pool_stats() == {"stock_pool_connections": 0, "stock_pool_in_use": 0}
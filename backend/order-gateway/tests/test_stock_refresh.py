@@ -0,0 +1,103 @@
+"""
+Tests for the stock cache warm-up / bulk refresh.
+
+Redis and stock-service are mocked.
+
+Covers:
+  - A refresh fills every item in one pipeline with jittered TTLs, fills L1,
+    publishes invalidations and reports the cache age
+  - A level an order wrote after the snapshot is not overwritten by it
+  - A replica that loses the refresh lock does not call stock-service
+  - A failed refresh is counted and gives up the lock
+"""
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services import cache, stock_refresh
+from app.services.metrics import _Metrics
+
+
+@pytest.fixture()
+def redis_client():
+    client = AsyncMock()
+    client.set.return_value = True
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    client.pipeline = MagicMock(return_value=pipe)
+    fresh = _Metrics()
+    with patch.object(cache, "_l1", cache._LocalCache(ttl_seconds=30.0, max_entries=8)), \
+            patch.object(cache, "_get_client", return_value=client), \
+            patch.object(stock_refresh, "metrics", fresh):
+        yield client, pipe, fresh
+
+
+def test_refresh_writes_every_item_with_jittered_ttl(redis_client):
+    client, pipe, fresh = redis_client
+    levels = {"burger": 4, "pizza": 0}
+    pipe.execute.return_value = [True, True, True]
+
+    with patch.object(stock_refresh, "fetch_stock_levels", AsyncMock(return_value=levels)):
+        assert asyncio.run(stock_refresh.refresh_stock_cache()) is True
+
+    item_sets = [c for c in pipe.set.call_args_list if c.args[0] != cache._REFRESHED_AT_KEY]
+    ttls = {c.args[0]: c.kwargs["ex"] for c in item_sets}
+    assert set(ttls) == {"stock:burger", "stock:pizza"}
+    assert all(48 <= ttl <= 72 for ttl in ttls.values())
+    assert all(c.kwargs["nx"] is True for c in item_sets)
+    published = {json.loads(c.args[1])["item_id"] for c in pipe.publish.call_args_list}
+    assert published == {"burger", "pizza"}
+    assert cache._l1.get("pizza") == 0
+    snap = fresh.snapshot()
+    assert snap["stock_cache_refreshes"] == 1
+    assert snap["stock_cache_items"] == 2
+    assert snap["stock_cache_age_seconds"] < 5
+
+
+def test_lock_held_elsewhere_skips_stock_service(redis_client):
+    client, pipe, fresh = redis_client
+    client.set.return_value = None
+    client.get.return_value = str(time.time() - 12)
+    fetch = AsyncMock()
+
+    with patch.object(stock_refresh, "fetch_stock_levels", fetch):
+        assert asyncio.run(stock_refresh.refresh_stock_cache()) is True
+
+    fetch.assert_not_called()
+    pipe.execute.assert_not_called()
+    assert 11 <= fresh.snapshot()["stock_cache_age_seconds"] < 20
+
+
+def test_failed_refresh_releases_the_lock(redis_client):
+    client, pipe, fresh = redis_client
+
+    with patch.object(
+        stock_refresh, "fetch_stock_levels", AsyncMock(side_effect=ConnectionError("down")),
+    ):
+        assert asyncio.run(stock_refresh.refresh_stock_cache()) is False
+
+    client.delete.assert_awaited_once_with(cache._REFRESH_LOCK_KEY)
+    assert fresh.snapshot()["stock_cache_refresh_failures"] == 1
+
+
+def test_refresh_does_not_overwrite_a_newer_order_level(redis_client):
+    client, pipe, fresh = redis_client
+
+    async def _snapshot_then_sell_out():
+        levels = {"burger": 4, "pizza": 7}
+        # An order sells the last burger after stock-service took the snapshot.
+        await cache.set_cached_stock("burger", 0)
+        return levels
+
+    # Redis answers the SET NX for the key the order just wrote with None.
+    pipe.execute.return_value = [None, True, True]
+    with patch.object(stock_refresh, "fetch_stock_levels", _snapshot_then_sell_out):
+        assert asyncio.run(stock_refresh.refresh_stock_cache()) is True
+
+    assert cache._l1.get("burger") == 0
+    assert cache._l1.get("pizza") == 7
+    published = [json.loads(c.args[1])["item_id"] for c in pipe.publish.call_args_list]
+    assert published == ["pizza"]
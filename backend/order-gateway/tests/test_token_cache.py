@@ -0,0 +1,92 @@
+"""
+Tests for the verified-JWT cache in front of validate_token.
+
+Covers:
+  - A repeat token is served from the cache without re-running jwt.decode
+  - Entries expire at the token's exp and the LRU is bounded
+  - Rejected tokens are never cached
+  - Hit / miss counters are exposed on /metrics
+"""
+import time
+from unittest.mock import patch
+
+import jwt
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import auth
+from app.services.token_cache import VerifiedTokenCache
+
+_JWT_SECRET = "test-secret-for-pytest-at-least-32-bytes!"
+
+
+def _token(exp_in: int = 3600, **claims) -> str:
+    payload = {"student_id": "stu-001", "exp": int(time.time()) + exp_in, **claims}
+    return jwt.encode(payload, _JWT_SECRET, algorithm="HS256")
+
+
+def _bearer(token: str) -> HTTPAuthorizationCredentials:
+    return HTTPAuthorizationCredentials(scheme="bearer", credentials=token)
+
+
+@pytest.fixture()
+def cache():
+    fresh = VerifiedTokenCache(max_entries=2)
+    with patch.object(auth, "verified_tokens", fresh):
+        yield fresh
+
+
+def test_repeat_token_skips_signature_check(cache):
+    token = _token()
+    with patch("app.services.auth.jwt.decode", wraps=jwt.decode) as decode:
+        first = auth.validate_token(_bearer(token))
+        second = auth.validate_token(_bearer(token))
+
+    assert decode.call_count == 1
+    assert first == second and first["student_id"] == "stu-001"
+    assert cache.stats() == {"jwt_cache_hits": 1, "jwt_cache_misses": 1, "jwt_cache_size": 1}
+
+
+def test_cached_payload_is_a_copy(cache):
+    token = _token()
+    auth.validate_token(_bearer(token))["student_id"] = "tampered"
+    assert auth.validate_token(_bearer(token))["student_id"] == "stu-001"
+
+
+def test_entry_expires_with_the_token(cache):
+    token = _token(exp_in=60)
+    auth.validate_token(_bearer(token))
+
+    with patch("app.services.token_cache.time.time", return_value=time.time() + 120):
+        assert cache.get(token) is None
+    assert cache.stats()["jwt_cache_size"] == 0
+
+
+def test_lru_is_bounded(cache):
+    tokens = [_token(student_id=f"stu-{n}") for n in range(3)]
+    for token in tokens:
+        auth.validate_token(_bearer(token))
+
+    assert cache.stats()["jwt_cache_size"] == 2
+    assert cache.get(tokens[0]) is None
+    assert cache.get(tokens[2])["student_id"] == "stu-2"
+
+
+def test_rejected_tokens_are_not_cached(cache):
+    bad = jwt.encode({"student_id": "x", "exp": int(time.time()) + 60}, "wrong-secret-0123456789abcdef0123", algorithm="HS256")
+    no_claim = jwt.encode({"exp": int(time.time()) + 60}, _JWT_SECRET, algorithm="HS256")
+    for token in (bad, no_claim):
+        with pytest.raises(HTTPException):
+            auth.validate_token(_bearer(token))
+    assert cache.stats()["jwt_cache_size"] == 0
+
+
+def test_metrics_expose_cache_counters(cache):
+    auth.validate_token(_bearer(_token()))
+    with TestClient(app) as client:
+        body = client.get("/metrics").json()
+    assert body["jwt_cache_misses"] == 1
+    assert body["jwt_cache_size"] == 1
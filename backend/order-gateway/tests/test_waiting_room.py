@@ -0,0 +1,150 @@
+"""
+Tests for the virtual waiting room in front of POST /order.
+
+Redis is mocked; each test scripts the result of the admission Lua script.
+
+Covers:
+  - A queued request gets 429 with its ticket, position and Retry-After, and
+    leaves no idempotency record behind
+  - An admitted ticket holder goes through; the overload flag follows the
+    number of orders in flight on this replica
+  - The room fails open when Redis is unavailable and is skipped when disabled
+  - GET /queue/{ticket} reports the position; unknown tickets are 404
+"""
+import asyncio
+import time
+import uuid
+from unittest.mock import AsyncMock, patch
+
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.models.idempotency import IdempotencyKey
+from app.services import waiting_room
+from app.services.metrics import metrics
+from tests.conftest import _TestSessionLocal
+
+_JWT_SECRET = "test-secret-for-pytest-at-least-32-bytes!"
+
+
+def _auth(student_id: str = "stu-001") -> dict:
+    token = jwt.encode(
+        {"student_id": student_id, "exp": int(time.time()) + 3600}, _JWT_SECRET, algorithm="HS256",
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _order_body() -> dict:
+    return {"order_id": str(uuid.uuid4()), "item_id": "burger", "quantity": 1}
+
+
+@pytest.fixture()
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture()
+def redis_client():
+    redis = AsyncMock()
+    with patch.object(waiting_room, "_get_client", return_value=redis), \
+            patch.object(settings, "ADMISSION_MAX_IN_FLIGHT", 2), \
+            patch.object(settings, "ADMISSION_RATE_PER_SECOND", 10.0):
+        yield redis
+
+
+def _script_args(redis_client) -> tuple:
+    """(mode, rate, overloaded, ticket, owner) of the last script call."""
+    return redis_client.eval.await_args.args[5:10]
+
+
+def test_queued_request_gets_ticket_and_429(redis_client, client):
+    redis_client.eval.return_value = [0, 42, 25, 1]
+    before = metrics.snapshot()["waiting_room_tickets"]
+    body = _order_body()
+
+    resp = client.post("/order", json=body, headers=_auth())
+
+    assert resp.status_code == 429
+    assert resp.headers["Retry-After"] == "3"
+    detail = resp.json()["detail"]
+    assert detail["ticket"] == 42
+    assert detail["position"] == 25
+    assert detail["estimated_wait_seconds"] == 2.5
+    assert detail["admitted"] is False
+    assert metrics.snapshot()["waiting_room_tickets"] == before + 1
+
+    db = _TestSessionLocal()
+    try:
+        assert db.query(IdempotencyKey).filter_by(order_id=uuid.UUID(body["order_id"])).first() is None
+    finally:
+        db.close()
+
+
+@patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
+@patch("app.routers.order.set_cached_stock", new_callable=AsyncMock)
+@patch("app.routers.order.deduct_stock", new_callable=AsyncMock, return_value={"remaining_stock": 5})
+def test_admitted_ticket_places_order(_deduct, _set, _get, redis_client, client):
+    redis_client.eval.return_value = [1, 42, 0, 0]
+    before = metrics.snapshot()["waiting_room_admitted"]
+
+    resp = client.post(
+        "/order", json=_order_body(), headers={**_auth(), "X-Queue-Ticket": "42"},
+    )
+
+    assert resp.status_code == 202
+    assert _script_args(redis_client) == ("admit", 10.0, "0", "42", "stu-001")
+    assert metrics.snapshot()["waiting_room_admitted"] == before + 1
+    assert waiting_room.in_flight() == 0
+
+
+def test_overload_flag_follows_in_flight_orders(redis_client):
+    redis_client.eval.return_value = [0, 1, 1, 1]
+    with waiting_room.occupy():
+        asyncio.run(waiting_room.admit("stu-001"))
+        assert _script_args(redis_client)[2] == "0"
+        with waiting_room.occupy():
+            asyncio.run(waiting_room.admit("stu-001"))
+            assert _script_args(redis_client)[2] == "1"
+
+
+@patch("app.routers.order.get_cached_stock", new_callable=AsyncMock, return_value=None)
+@patch("app.routers.order.set_cached_stock", new_callable=AsyncMock)
+@patch("app.routers.order.deduct_stock", new_callable=AsyncMock, return_value={"remaining_stock": 5})
+def test_redis_outage_admits_requests(_deduct, _set, _get, redis_client, client):
+    redis_client.eval.side_effect = ConnectionError("redis down")
+
+    resp = client.post("/order", json=_order_body(), headers=_auth())
+
+    assert resp.status_code == 202
+
+
+def test_disabled_room_does_not_touch_redis(redis_client):
+    with patch.object(settings, "ADMISSION_MAX_IN_FLIGHT", 0):
+        admission = asyncio.run(waiting_room.admit("stu-001"))
+
+    assert admission.admitted
+    redis_client.eval.assert_not_called()
+
+
+def test_queue_ticket_status(redis_client, client):
+    redis_client.eval.return_value = [0, 42, 5, 0]
+
+    resp = client.get("/queue/42", headers=_auth())
+
+    assert resp.status_code == 200
+    assert resp.json() == {
+        "ticket": 42, "admitted": False, "position": 5, "estimated_wait_seconds": 0.5,
+    }
+    assert _script_args(redis_client)[0] == "status"
+
+
+def test_unknown_ticket_is_404(redis_client, client):
+    redis_client.eval.return_value = [0, 0, 0, 0]
+
+    resp = client.get("/queue/7", headers=_auth("someone-else"))
+
+    assert resp.status_code == 404
@@ -0,0 +1,104 @@
+"""
+Tests for metrics merged across uvicorn worker processes.
+
+Covers:
+  - Merging worker states gives the totals and percentiles of one process
+    that saw every request
+  - Rolling windows of different workers merge slot by slot
+  - /metrics with METRICS_MULTIPROC_DIR includes the other workers' files
+  - Gauges of a worker whose file went stale are dropped, counters are kept
+"""
+import json
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.services import worker_metrics
+from app.services.metrics import _Metrics
+
+
+def _worker(latencies_ms: list[float]) -> _Metrics:
+    worker = _Metrics()
+    for ms in latencies_ms:
+        worker.increment_total_attempts()
+        worker.record_latency(ms)
+        worker.record_phases("success", {"stock": ms})
+    worker.record_stock_cache_lookup("l1", hit=True)
+    return worker
+
+
+def test_merged_state_matches_a_single_process():
+    first, second = [1.0, 2.0, 3.0], [50.0, 80.0, 400.0, 900.0]
+    merged = _Metrics()
+    merged.merge_state(_worker(first).state())
+    merged.merge_state(json.loads(json.dumps(_worker(second).state())))
+
+    everything = _worker(first + second)
+    everything.record_stock_cache_lookup("l1", hit=True)
+    assert merged.snapshot() == everything.snapshot()
+    assert merged.phase_histograms() == everything.phase_histograms()
+
+
+def test_rolling_windows_merge_slot_by_slot():
+    now = time.monotonic()
+    old, recent = _Metrics(), _Metrics()
+    with patch("app.services.metrics.time.monotonic", return_value=now - 60):
+        old.record_latency(5000.0)
+    with patch("app.services.metrics.time.monotonic", return_value=now):
+        recent.record_latency(10.0)
+
+    merged = _Metrics()
+    merged.merge_state(recent.state())
+    merged.merge_state(old.state())
+
+    with patch("app.services.metrics.time.monotonic", return_value=now):
+        snap = merged.snapshot()
+    assert snap["total_orders"] == 0
+    assert snap["rolling_p99_ms"] < 20
+    assert snap["latency_p99_ms"] > 1000
+
+
+def _peer_file(directory, pid: int, written_at: float, **process) -> None:
+    state = {
+        "written_at": written_at,
+        "metrics": _worker([10.0, 20.0]).state(),
+        "process": {"orders_in_flight": 7, "stock_breaker_open": 1, **process},
+    }
+    (directory / f"{pid}.json").write_text(json.dumps(state))
+
+
+@pytest.fixture()
+def multiproc_dir(tmp_path):
+    with patch.object(settings, "METRICS_MULTIPROC_DIR", str(tmp_path)), \
+            patch.object(worker_metrics, "metrics", _worker([5.0])):
+        yield tmp_path
+
+
+def test_metrics_include_other_workers(multiproc_dir):
+    _peer_file(multiproc_dir, 999_001, time.time())
+    _peer_file(multiproc_dir, 999_002, time.time(), stock_hedge_rate=0.5)
+
+    with TestClient(app) as client:
+        body = client.get("/metrics").json()
+        prometheus = client.get("/metrics/prometheus").text.splitlines()
+
+    assert body["total_orders"] == 5
+    assert body["stock_cache_l1_hits"] == 3
+    assert body["orders_in_flight"] == 14
+    assert body["stock_breaker_open"] == 1
+    assert body["stock_hedge_rate"] == 0.25
+    assert "gateway_order_latency_ms_count 5" in prometheus
+
+
+def test_stale_worker_keeps_counters_but_not_gauges(multiproc_dir):
+    _peer_file(multiproc_dir, 999_003, time.time() - 3600)
+
+    merged, process = worker_metrics.collect()
+
+    assert merged.snapshot()["total_orders"] == 3
+    assert process["orders_in_flight"] == 0
+    assert process["stock_breaker_open"] == 0
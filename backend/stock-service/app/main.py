@@ -1,18 +1,43 @@
+import asyncio
 import time
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 
-from app.core.database import engine, Base
+from app.core.config import LEASE_SWEEP_INTERVAL_SECONDS, RESERVATION_CONSUMER
+from app.core.database import engine, Base, SessionLocal
 from app.models import inventory as _inventory_models  # noqa: F401
+from app.models import lease as _lease_models  # noqa: F401
 from app.models import transaction as _transaction_models  # noqa: F401
 from app.routers import admin, inventory, stock
+from app.services.lease import expire_stale_leases
 from app.services.metrics import record_deduction, record_request
+from app.services.reservations import start_reservation_consumer, stop_reservation_consumer
 
 # We'll import the seed function dynamically to avoid circular imports
 # or path issues if not strictly necessary at top level.
 
+
+def _sweep_leases() -> None:
+    db = SessionLocal()
+    try:
+        expire_stale_leases(db)
+    finally:
+        db.close()
+
+
+async def _lease_sweeper() -> None:
+    """Return stock held by leases whose gateway never released them."""
+    while True:
+        await asyncio.sleep(LEASE_SWEEP_INTERVAL_SECONDS)
+        try:
+            await run_in_threadpool(_sweep_leases)
+        except Exception as e:
+            print(f"Lease sweep failed: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: create tables
@@ -26,8 +51,13 @@ async def lifespan(app: FastAPI):
         pass  # In case the file is not found in the path
     except Exception as e:
         print(f"Seeding failed: {e}")
-        
+
+    sweeper = asyncio.create_task(_lease_sweeper())
+    if RESERVATION_CONSUMER:
+        start_reservation_consumer()
     yield
+    sweeper.cancel()
+    await stop_reservation_consumer()
 
 app = FastAPI(title="Stock Service", version="1.0.0", lifespan=lifespan)
 
@@ -48,7 +78,7 @@ async def metrics_middleware(request: Request, call_next):
 
     record_request(request.url.path, process_time)
 
-    if request.url.path == "/stock/deduct" and request.method == "POST":
+    if request.url.path in ("/stock/deduct", "/stock/deduct/batch") and request.method == "POST":
         record_deduction(failed=response.status_code != 200)
 
     return response
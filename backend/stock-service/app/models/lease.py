@@ -0,0 +1,39 @@
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Index
+from sqlalchemy import Uuid as UUID
+from sqlalchemy.sql import func
+import enum
+import uuid
+
+from app.core.database import Base
+
+
+class LeaseStatus(str, enum.Enum):
+    ACTIVE = "ACTIVE"
+    RELEASED = "RELEASED"
+    EXPIRED = "EXPIRED"
+
+
+class StockLease(Base):
+    """
+    A block of inventory handed to one gateway replica.
+
+    ``granted`` units leave ``inventory.quantity`` when the lease is created;
+    the holder reports the orders it confirmed against them (``consumed``,
+    recorded as StockTransaction rows) and the rest goes back to inventory
+    on release or expiry.
+    """
+
+    __tablename__ = "stock_leases"
+    __table_args__ = (
+        Index("ix_stock_leases_status_expires_at", "status", "expires_at"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    item_id = Column(UUID(as_uuid=True), ForeignKey("items.id"), nullable=False, index=True)
+    holder = Column(String, nullable=False)
+    granted = Column(Integer, nullable=False)
+    consumed = Column(Integer, nullable=False, default=0)
+    status = Column(String, nullable=False, default=LeaseStatus.ACTIVE.value)
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=func.now())
+    closed_at = Column(DateTime, nullable=True)
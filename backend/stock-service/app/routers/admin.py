@@ -5,6 +5,7 @@ from fastapi import APIRouter, Depends, Response
 from sqlalchemy.orm import Session
 
 from app.core.database import check_db_health, get_db
+from app.services import auth
 from app.services.metrics import get_snapshot
 from app.schemas.health import HealthResponse
 
@@ -40,6 +41,8 @@ def get_metrics():
         f"failed_deductions {snapshot['failed_deductions']}",
         f"average_latency_ms {avg_latency:.2f}",
     ]
+    for name, value in auth.verified_tokens.stats().items():
+        lines.append(f"{name} {value}")
     for route, count in snapshot["request_count_per_route"].items():
         lines.append(f'request_count{{path="{route}"}} {count}')
     return Response(content="\n".join(lines), media_type="text/plain")
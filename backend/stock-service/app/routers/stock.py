@@ -6,7 +6,14 @@ from sqlalchemy.orm import Session
 
 from app.core.config import INTERNAL_API_KEY
 from app.core.database import get_db
-from app.schemas.stock import StockDeductRequest, StockTransactionResponse
+from app.schemas.stock import (
+    LeaseGrantRequest,
+    LeaseReconcileRequest,
+    StockDeductBatchRequest,
+    StockDeductRequest,
+    StockTransactionResponse,
+)
+from app.services import lease as lease_service
 from app.services import stock as stock_service
 from app.services.auth import require_auth
 
@@ -33,6 +40,46 @@ def deduct_stock(
     return stock_service.deduct_stock(db, request)
 
 
+@router.post("/stock/deduct/batch", status_code=200)
+def deduct_stock_batch(
+    request: StockDeductBatchRequest,
+    db: Session = Depends(get_db),
+    _key: None = Depends(_require_internal_key),
+):
+    """Deduct several (order_id, item_id, quantity) lines in one all-or-nothing transaction."""
+    return stock_service.deduct_stock_batch(db, request)
+
+
+@router.get("/stock/levels", status_code=200)
+def stock_levels(
+    db: Session = Depends(get_db),
+    _key: None = Depends(_require_internal_key),
+):
+    """Every item's current quantity, for warming the gateway's stock cache."""
+    return stock_service.stock_levels(db)
+
+
+@router.post("/stock/leases", status_code=201)
+def grant_lease(
+    request: LeaseGrantRequest,
+    db: Session = Depends(get_db),
+    _key: None = Depends(_require_internal_key),
+):
+    """Lease a block of stock to a gateway replica (may grant less than asked)."""
+    return lease_service.grant_lease(db, request)
+
+
+@router.post("/stock/leases/{lease_id}/reconcile", status_code=200)
+def reconcile_lease(
+    lease_id: UUID,
+    request: LeaseReconcileRequest,
+    db: Session = Depends(get_db),
+    _key: None = Depends(_require_internal_key),
+):
+    """Record orders confirmed against a lease; ``release`` returns the rest."""
+    return lease_service.reconcile_lease(db, lease_id, request)
+
+
 @router.get("/transactions/{order_id}", response_model=List[StockTransactionResponse], tags=["audit"])
 def get_transaction_by_order(order_id: UUID, db: Session = Depends(get_db), _user: dict[str, Any] = Depends(require_auth)):
     return stock_service.get_transaction_by_order(db, order_id)
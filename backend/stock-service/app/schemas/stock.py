@@ -1,4 +1,5 @@
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, model_validator
+from typing import List
 from uuid import UUID
 from datetime import datetime
 
@@ -9,6 +10,45 @@ class StockDeductRequest(BaseModel):
     quantity: int = Field(..., gt=0)
 
 
+class StockDeductBatchRequest(BaseModel):
+    lines: List[StockDeductRequest] = Field(..., min_length=1, max_length=100)
+    # False: lines are independent orders (coalesced by the gateway) and each
+    # succeeds or fails on its own — see ``deduct_stock_batch``.
+    atomic: bool = True
+
+    @model_validator(mode="after")
+    def _unique_lines(self) -> "StockDeductBatchRequest":
+        if not self.atomic:
+            return self
+        keys = {(line.order_id, line.item_id) for line in self.lines}
+        if len(keys) != len(self.lines):
+            raise ValueError("Each (order_id, item_id) pair may appear only once per batch")
+        return self
+
+
+class LeaseGrantRequest(BaseModel):
+    item_id: UUID
+    holder: str = Field(..., min_length=1, max_length=128)
+    quantity: int = Field(..., gt=0, le=1000)
+    ttl_seconds: int = Field(30, gt=0, le=600)
+
+
+class LeaseConsumption(BaseModel):
+    order_id: UUID
+    quantity: int = Field(..., gt=0)
+
+
+class LeaseReconcileRequest(BaseModel):
+    lines: List[LeaseConsumption] = Field(default_factory=list, max_length=1000)
+    release: bool = False
+
+    @model_validator(mode="after")
+    def _unique_orders(self) -> "LeaseReconcileRequest":
+        if len({line.order_id for line in self.lines}) != len(self.lines):
+            raise ValueError("Each order_id may appear only once per reconciliation")
+        return self
+
+
 class StockTransactionBase(BaseModel):
     order_id: UUID
     item_id: UUID
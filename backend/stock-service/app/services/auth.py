@@ -10,10 +10,14 @@ import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
-from app.core.config import JWT_SECRET, JWT_ALGORITHM
+from app.core.config import JWT_CACHE_MAX_ENTRIES, JWT_SECRET, JWT_ALGORITHM
+from app.services.token_cache import VerifiedTokenCache
 
 _bearer = HTTPBearer(auto_error=False)
 
+# Repeat callers skip the signature check (see services/token_cache.py).
+verified_tokens = VerifiedTokenCache(JWT_CACHE_MAX_ENTRIES)
+
 
 def require_auth(
     credentials: HTTPAuthorizationCredentials = Depends(_bearer),
@@ -35,6 +39,10 @@ def require_auth(
         )
 
     token = credentials.credentials
+    cached = verified_tokens.get(token)
+    if cached is not None:
+        return cached
+
     try:
         payload: dict[str, Any] = jwt.decode(
             token,
@@ -62,4 +70,5 @@ def require_auth(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    verified_tokens.put(token, payload)
     return payload
@@ -0,0 +1,187 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import LEASE_GRACE_SECONDS
+from app.models.inventory import Inventory
+from app.models.lease import LeaseStatus, StockLease
+from app.models.transaction import StockTransaction
+from app.schemas.stock import LeaseGrantRequest, LeaseReconcileRequest
+from app.services.stock import _guarded_decrement, _raise_deduction_failure
+
+
+def _utcnow() -> datetime:
+    # Naive UTC, matching the other DateTime columns of this service.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _return_to_inventory(db: Session, item_id: UUID, quantity: int) -> None:
+    if quantity > 0:
+        db.execute(
+            update(Inventory)
+            .where(Inventory.item_id == item_id)
+            .values(quantity=Inventory.quantity + quantity, version=Inventory.version + 1)
+        )
+
+
+def _close(db: Session, lease: StockLease, new_status: LeaseStatus) -> int:
+    """Give the unconsumed part of *lease* back to inventory; return how much."""
+    returned = max(lease.granted - lease.consumed, 0)
+    _return_to_inventory(db, lease.item_id, returned)
+    lease.status = new_status.value
+    lease.closed_at = _utcnow()
+    return returned
+
+
+def _lease_body(lease: StockLease, **extra) -> dict:
+    return {
+        "lease_id": str(lease.id),
+        "item_id": str(lease.item_id),
+        "status": lease.status,
+        "granted": lease.granted,
+        "consumed": lease.consumed,
+        **extra,
+    }
+
+
+def expire_stale_leases(db: Session, item_id: Optional[UUID] = None) -> int:
+    """
+    Close ACTIVE leases more than ``LEASE_GRACE_SECONDS`` past their expiry and
+    return their unconsumed units to inventory.  Returns the number expired.
+    """
+    cutoff = _utcnow() - timedelta(seconds=LEASE_GRACE_SECONDS)
+    query = db.query(StockLease).filter(
+        StockLease.status == LeaseStatus.ACTIVE.value,
+        StockLease.expires_at < cutoff,
+    )
+    if item_id is not None:
+        query = query.filter(StockLease.item_id == item_id)
+    stale = query.with_for_update(skip_locked=True).all()
+    for lease in stale:
+        _close(db, lease, LeaseStatus.EXPIRED)
+    db.commit()
+    return len(stale)
+
+
+def grant_lease(db: Session, request: LeaseGrantRequest) -> dict:
+    """
+    Move up to ``request.quantity`` units out of inventory into a new lease.
+
+    Grants whatever is left when less than requested is available; fails with
+    409 only when the item is sold out.
+    """
+    expire_stale_leases(db, item_id=request.item_id)
+
+    inventory = (
+        db.query(Inventory)
+        .filter(Inventory.item_id == request.item_id)
+        .with_for_update()
+        .populate_existing()
+        .first()
+    )
+    if inventory is None:
+        db.rollback()
+        _raise_deduction_failure(db, request.item_id)
+    granted = min(request.quantity, inventory.quantity)
+    if granted <= 0:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Insufficient stock")
+
+    inventory.quantity -= granted
+    inventory.version += 1
+    lease = StockLease(
+        id=uuid.uuid4(),
+        item_id=request.item_id,
+        holder=request.holder,
+        granted=granted,
+        consumed=0,
+        status=LeaseStatus.ACTIVE.value,
+        expires_at=_utcnow() + timedelta(seconds=request.ttl_seconds),
+    )
+    db.add(lease)
+    db.commit()
+    return _lease_body(
+        lease,
+        remaining_stock=inventory.quantity,
+        expires_at=lease.expires_at.isoformat(),
+    )
+
+
+def reconcile_lease(db: Session, lease_id: UUID, request: LeaseReconcileRequest) -> dict:
+    """
+    Record the orders the holder confirmed against *lease_id* as
+    StockTransaction rows and, with ``release``, close the lease.
+
+    Orders already in the ledger are skipped, so a retried reconciliation is
+    harmless.  Consumption beyond what the lease still covers — or reported
+    after the lease was closed (its leftover was already returned) — is
+    charged to inventory directly.  Lines that inventory cannot cover either
+    are listed under ``rejected`` instead of failing the whole batch, so the
+    valid ones are still recorded.
+    """
+    lease = (
+        db.query(StockLease)
+        .filter(StockLease.id == lease_id)
+        .with_for_update()
+        .populate_existing()
+        .first()
+    )
+    if lease is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Lease not found")
+
+    recorded = set()
+    if request.lines:
+        recorded = {
+            order_id
+            for (order_id,) in db.query(StockTransaction.order_id).filter(
+                StockTransaction.item_id == lease.item_id,
+                StockTransaction.order_id.in_([line.order_id for line in request.lines]),
+            )
+        }
+    new_lines = [line for line in request.lines if line.order_id not in recorded]
+
+    accepted = []
+    rejected = []
+    try:
+        active = lease.status == LeaseStatus.ACTIVE.value
+        for line in new_lines:
+            if active and lease.consumed + line.quantity <= lease.granted:
+                lease.consumed += line.quantity
+            elif db.execute(_guarded_decrement(lease.item_id, line.quantity)).scalar() is not None:
+                if not active:
+                    lease.consumed += line.quantity
+            else:
+                rejected.append(str(line.order_id))
+                continue
+            accepted.append(line)
+
+        if accepted:
+            db.execute(insert(StockTransaction), [
+                {
+                    "id": uuid.uuid4(),
+                    "order_id": line.order_id,
+                    "item_id": lease.item_id,
+                    "quantity_deducted": line.quantity,
+                }
+                for line in accepted
+            ])
+
+        returned = 0
+        if request.release and active:
+            returned = _close(db, lease, LeaseStatus.RELEASED)
+        db.commit()
+    except IntegrityError:
+        # A direct /stock/deduct recorded one of these orders concurrently.
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Concurrent updates detected. Please retry.",
+        )
+
+    return _lease_body(lease, recorded=len(accepted), returned=returned, rejected=rejected)
@@ -0,0 +1,190 @@
+"""
+Asynchronous stock reservation for orders the gateway accepted up front.
+
+With STOCK_RESERVATION_ASYNC the gateway does not call ``/stock/deduct``
+while the student waits: it publishes ``order.received`` on ``order_events``
+instead.  This consumer deducts each such order exactly as the HTTP
+endpoints would (single item or all-or-nothing cart) and publishes the
+outcome on ``kitchen_events``:
+
+  STOCK_VERIFIED  with the remaining ``stock_levels``; the order is then
+                  handed on to the kitchen as ``order.placed``
+  REJECTED        with a ``reason`` (sold out, unknown item, bad order)
+
+Deductions are idempotent per (order_id, item_id), so a redelivered order
+is reported as verified again without being charged twice.  Database
+errors leave the message on the queue to be retried.
+"""
+import asyncio
+import json
+import logging
+from typing import Any
+
+import aio_pika
+from aio_pika.abc import AbstractIncomingMessage
+from fastapi import HTTPException
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import RABBITMQ_URL, RESERVATION_PREFETCH
+from app.core.database import SessionLocal
+from app.schemas.stock import StockDeductBatchRequest, StockDeductRequest
+from app.services import stock as stock_service
+
+logger = logging.getLogger(__name__)
+
+ORDER_EXCHANGE = "order_events"
+STATUS_EXCHANGE = "kitchen_events"
+QUEUE_NAME = "stock_reservation_queue"
+CONSUME_KEY = "order.received"
+PLACED_KEY = "order.placed"
+STATUS_KEY = "order.status"
+_RETRY_DELAY_SECONDS = 1.0
+_RECONNECT_DELAY_SECONDS = 5.0
+
+_connection: aio_pika.abc.AbstractRobustConnection | None = None
+_channel: aio_pika.abc.AbstractChannel | None = None
+_consumer_task: asyncio.Task | None = None
+
+
+def _result(event: dict[str, Any], status: str, **fields) -> dict[str, Any]:
+    return {
+        "order_id": event["order_id"],
+        "student_id": event.get("student_id"),
+        "status": status,
+        **fields,
+    }
+
+
+def _rejection(event: dict[str, Any], exc: HTTPException) -> dict[str, Any]:
+    # Cart failures name the offending line (see ``deduct_stock_batch``).
+    detail = exc.detail
+    item_id = event.get("item_id")
+    if isinstance(detail, dict):
+        item_id = detail.get("item_id", item_id)
+        detail = detail.get("message", detail)
+    fields: dict[str, Any] = {"reason": str(detail)}
+    if exc.status_code == 409 and item_id is not None:
+        fields["stock_levels"] = {str(item_id): 0}
+    return _result(event, "REJECTED", **fields)
+
+
+def reserve(event: dict[str, Any]) -> dict[str, Any]:
+    """
+    Deduct the stock for one ``order.received`` event (BLOCKING) and return
+    the status event to publish.  Raises on errors worth retrying.
+    """
+    lines = event.get("items") or [
+        {"item_id": event.get("item_id"), "quantity": event.get("quantity")}
+    ]
+    try:
+        requests = [
+            StockDeductRequest(order_id=event["order_id"], **line) for line in lines
+        ]
+        batch = StockDeductBatchRequest(lines=requests) if len(requests) > 1 else None
+    except (ValidationError, TypeError):
+        return _result(event, "REJECTED", reason="Invalid order")
+
+    db = SessionLocal()
+    try:
+        if batch is None:
+            results = [{
+                "item_id": requests[0].item_id,
+                **stock_service.deduct_stock(db, requests[0]),
+            }]
+        else:
+            results = stock_service.deduct_stock_batch(db, batch)["results"]
+    except HTTPException as exc:
+        if exc.status_code >= 500:
+            raise
+        return _rejection(event, exc)
+    finally:
+        db.close()
+
+    return _result(event, "STOCK_VERIFIED", stock_levels={
+        str(result["item_id"]): result["remaining_stock"]
+        for result in results
+        if result.get("remaining_stock") is not None
+    })
+
+
+async def _publish(exchange_name: str, routing_key: str, payload: dict[str, Any]) -> None:
+    exchange = await _channel.get_exchange(exchange_name, ensure=False)
+    await exchange.publish(
+        aio_pika.Message(
+            body=json.dumps(payload).encode(),
+            content_type="application/json",
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+        ),
+        routing_key=routing_key,
+    )
+
+
+async def _on_message(message: AbstractIncomingMessage) -> None:
+    try:
+        event = json.loads(message.body.decode())
+        order_id = event["order_id"]
+    except (ValueError, KeyError, TypeError):
+        logger.warning("Dropping malformed order event: %r", message.body[:200])
+        await message.ack()
+        return
+
+    try:
+        result = await run_in_threadpool(reserve, event)
+        if result["status"] == "STOCK_VERIFIED":
+            # The kitchen skips its own STOCK_VERIFIED for these.
+            await _publish(ORDER_EXCHANGE, PLACED_KEY, {**event, "stock_verified": True})
+        await _publish(STATUS_EXCHANGE, STATUS_KEY, result)
+    except Exception as exc:
+        logger.warning("Reservation of order %s failed, retrying: %s", order_id, exc)
+        await asyncio.sleep(_RETRY_DELAY_SECONDS)
+        await message.nack(requeue=True)
+        return
+    await message.ack()
+    logger.info("Order %s reserved: %s", order_id, result["status"])
+
+
+async def _consume() -> None:
+    """Connect (retrying until RabbitMQ is up) and start consuming."""
+    global _connection, _channel
+    while True:
+        try:
+            _connection = await aio_pika.connect_robust(RABBITMQ_URL)
+            break
+        except Exception as exc:
+            logger.warning("Reservation consumer cannot reach RabbitMQ, retrying: %s", exc)
+            await asyncio.sleep(_RECONNECT_DELAY_SECONDS)
+
+    _channel = await _connection.channel(publisher_confirms=True)
+    await _channel.set_qos(prefetch_count=RESERVATION_PREFETCH)
+    order_exchange = await _channel.declare_exchange(
+        ORDER_EXCHANGE, aio_pika.ExchangeType.TOPIC, durable=True,
+    )
+    await _channel.declare_exchange(STATUS_EXCHANGE, aio_pika.ExchangeType.TOPIC, durable=True)
+    queue = await _channel.declare_queue(QUEUE_NAME, durable=True)
+    await queue.bind(order_exchange, routing_key=CONSUME_KEY)
+    await queue.consume(_on_message)
+    logger.info(
+        "Reservation consumer started — queue=%s exchange=%s key=%s",
+        QUEUE_NAME, ORDER_EXCHANGE, CONSUME_KEY,
+    )
+
+
+def start_reservation_consumer() -> None:
+    """Start reserving ``order.received`` orders on the running event loop."""
+    global _consumer_task
+    _consumer_task = asyncio.create_task(_consume())
+
+
+async def stop_reservation_consumer() -> None:
+    global _connection, _channel, _consumer_task
+    if _consumer_task is not None:
+        _consumer_task.cancel()
+        try:
+            await _consumer_task
+        except asyncio.CancelledError:
+            pass
+        _consumer_task = None
+    if _connection is not None and not _connection.is_closed:
+        await _connection.close()
+    _connection = _channel = None
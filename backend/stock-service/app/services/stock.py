@@ -1,18 +1,175 @@
+import uuid
 from typing import List, Optional
 from uuid import UUID
 
 from fastapi import HTTPException, status
+from sqlalchemy import Uuid, exists, func, insert, literal, select, tuple_, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.models.inventory import Inventory, Item
 from app.models.transaction import StockTransaction
-from app.schemas.stock import StockDeductRequest
+from app.schemas.stock import StockDeductBatchRequest, StockDeductRequest
+
+
+def _already_deducted(transaction_id) -> dict:
+    return {
+        "status": "success",
+        "message": "Stock already deducted",
+        "transaction_id": str(transaction_id),
+    }
+
+
+def _deducted(transaction_id, remaining_stock: int) -> dict:
+    return {
+        "status": "success",
+        "message": "Stock deducted successfully",
+        "transaction_id": str(transaction_id),
+        "remaining_stock": remaining_stock,
+    }
+
+
+def _find_transaction(db: Session, order_id: UUID, item_id: UUID) -> Optional[StockTransaction]:
+    return (
+        db.query(StockTransaction)
+        .filter(
+            StockTransaction.order_id == order_id,
+            StockTransaction.item_id == item_id,
+        )
+        .first()
+    )
+
+
+def _raise_deduction_failure(db: Session, item_id: UUID) -> None:
+    """
+    Work out why the guarded decrement matched no row and raise accordingly.
+
+    Only runs on the failure path, so successful deductions never pay for it.
+    """
+    inventory_quantity = db.execute(
+        select(Inventory.quantity).where(Inventory.item_id == item_id)
+    ).scalar()
+    if inventory_quantity is not None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Insufficient stock")
+    item_exists = db.execute(select(Item.id).where(Item.id == item_id)).first()
+    if not item_exists:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Inventory record not found for this item",
+    )
+
+
+def _guarded_decrement(item_id: UUID, quantity: int):
+    """``UPDATE inventory ... WHERE quantity >= :q RETURNING quantity``."""
+    return (
+        update(Inventory)
+        .where(Inventory.item_id == item_id, Inventory.quantity >= quantity)
+        .values(
+            quantity=Inventory.quantity - quantity,
+            version=Inventory.version + 1,
+        )
+        .returning(Inventory.quantity)
+    )
+
+
+def _build_deduct_statement(request: StockDeductRequest):
+    """
+    Idempotency check, guarded decrement and ledger insert as ONE statement:
+
+        WITH existing    AS (SELECT id FROM stock_transactions WHERE ...),
+             decremented AS (UPDATE inventory SET quantity = quantity - :q
+                              WHERE item_id = :item AND quantity >= :q
+                                AND NOT EXISTS (SELECT 1 FROM existing)
+                              RETURNING quantity),
+             ledger      AS (INSERT INTO stock_transactions ...
+                              SELECT ... FROM decremented RETURNING id)
+        SELECT (SELECT id FROM existing), (SELECT quantity FROM decremented),
+               (SELECT id FROM ledger)
+
+    The row lock taken by the UPDATE serialises concurrent deductions for the
+    same item; ``quantity >= :q`` is re-checked against the latest row version,
+    so stock can never go negative.
+    """
+    existing = (
+        select(StockTransaction.id)
+        .where(
+            StockTransaction.order_id == request.order_id,
+            StockTransaction.item_id == request.item_id,
+        )
+        .cte("existing")
+    )
+    decremented = (
+        _guarded_decrement(request.item_id, request.quantity)
+        .where(~exists(select(existing.c.id)))
+        .cte("decremented")
+    )
+    ledger = (
+        insert(StockTransaction)
+        .from_select(
+            ["id", "order_id", "item_id", "quantity_deducted", "created_at"],
+            select(
+                literal(uuid.uuid4(), Uuid),
+                literal(request.order_id, Uuid),
+                literal(request.item_id, Uuid),
+                literal(request.quantity),
+                func.now(),
+            ).select_from(decremented),
+        )
+        .returning(StockTransaction.id)
+        .cte("ledger")
+    )
+    return select(
+        select(existing.c.id).scalar_subquery().label("existing_id"),
+        select(decremented.c.quantity).scalar_subquery().label("remaining_stock"),
+        select(ledger.c.id).scalar_subquery().label("transaction_id"),
+    )
+
+
+def _deduct_single_statement(db: Session, request: StockDeductRequest) -> dict:
+    """PostgreSQL path: one round trip, no optimistic retries."""
+    row = db.execute(_build_deduct_statement(request)).one()
+    if row.existing_id is not None:
+        db.rollback()
+        return _already_deducted(row.existing_id)
+    if row.transaction_id is None:
+        db.rollback()
+        _raise_deduction_failure(db, request.item_id)
+    db.commit()
+    return _deducted(row.transaction_id, row.remaining_stock)
+
+
+def _deduct_fallback(db: Session, request: StockDeductRequest) -> dict:
+    """
+    Portable path for databases without data-modifying CTEs (SQLite in tests):
+    the same guarded decrement, as separate statements in one transaction.
+    """
+    existing_txn = _find_transaction(db, request.order_id, request.item_id)
+    if existing_txn:
+        return _already_deducted(existing_txn.id)
+
+    remaining_stock = db.execute(
+        _guarded_decrement(request.item_id, request.quantity)
+    ).scalar()
+    if remaining_stock is None:
+        db.rollback()
+        _raise_deduction_failure(db, request.item_id)
+
+    new_txn = StockTransaction(
+        id=uuid.uuid4(),
+        order_id=request.order_id,
+        item_id=request.item_id,
+        quantity_deducted=request.quantity,
+    )
+    db.add(new_txn)
+    db.commit()
+    return _deducted(new_txn.id, remaining_stock)
 
 
 def deduct_stock(db: Session, request: StockDeductRequest) -> dict:
     """
-    Atomically verify and deduct stock using Optimistic Locking.
+    Atomically verify and deduct stock with a guarded decrement
+    (``quantity >= :q``) instead of an optimistic-locking retry loop.
     Ensures idempotency via unique constraint on StockTransaction.
     """
     if request.quantity <= 0:
@@ -21,127 +178,155 @@ def deduct_stock(db: Session, request: StockDeductRequest) -> dict:
             detail="Quantity must be greater than 0",
         )
 
-    # 1. Quick check for existing transaction (optimization)
-    existing_txn = (
-        db.query(StockTransaction)
-        .filter(
-            StockTransaction.order_id == request.order_id,
-            StockTransaction.item_id == request.item_id,
+    try:
+        if db.get_bind().dialect.name == "postgresql":
+            return _deduct_single_statement(db, request)
+        return _deduct_fallback(db, request)
+    except IntegrityError:
+        # A concurrent request for the same (order_id, item_id) won the race;
+        # its decrement stands and ours was rolled back with the failed insert.
+        db.rollback()
+        existing_txn_race = _find_transaction(db, request.order_id, request.item_id)
+        if existing_txn_race:
+            return _already_deducted(existing_txn_race.id)
+        raise
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+
+def _line_result(line: StockDeductRequest, outcome: dict) -> dict:
+    return {"order_id": str(line.order_id), "item_id": str(line.item_id), **outcome}
+
+
+def _apply_batch(db: Session, lines: List[StockDeductRequest]) -> dict:
+    """One all-or-nothing pass over a batch (caller commits or rolls back)."""
+    # Deterministic lock order: every batch locks inventory rows sorted by
+    # item_id, so two overlapping carts can never deadlock each other.
+    item_ids = sorted({line.item_id for line in lines})
+    inventories = {
+        inv.item_id: inv
+        for inv in (
+            db.query(Inventory)
+            .filter(Inventory.item_id.in_(item_ids))
+            .order_by(Inventory.item_id)
+            .with_for_update()
+            .populate_existing()
+            .all()
         )
-        .first()
-    )
-    if existing_txn:
-        return {
-            "status": "success",
-            "message": "Stock already deducted",
-            "transaction_id": str(existing_txn.id),
-        }
-
-    # 2. Check Item existence
-    item = db.query(Item).filter(Item.id == request.item_id).first()
-    if not item:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+    }
 
-    # 3. Optimistic Locking Loop
-    max_retries = 3
-    for attempt in range(max_retries):
+    existing = {
+        (txn.order_id, txn.item_id): txn
+        for txn in db.query(StockTransaction).filter(
+            tuple_(StockTransaction.order_id, StockTransaction.item_id).in_(
+                [(line.order_id, line.item_id) for line in lines]
+            )
+        )
+    }
+
+    # Validate every line before writing anything.
+    needed: dict = {}
+    for line in lines:
+        if (line.order_id, line.item_id) in existing:
+            continue
+        inventory = inventories.get(line.item_id)
+        needed[line.item_id] = needed.get(line.item_id, 0) + line.quantity
         try:
-            # Read current state (No lock)
-            inventory = (
-                db.query(Inventory)
-                .filter(Inventory.item_id == request.item_id)
-                .first()
+            if inventory is None:
+                _raise_deduction_failure(db, line.item_id)
+            if inventory.quantity < needed[line.item_id]:
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Insufficient stock")
+        except HTTPException as exc:
+            # Name the offending line so the caller knows which item failed.
+            raise HTTPException(
+                status_code=exc.status_code,
+                detail=_line_result(line, {"message": exc.detail}),
             )
-            if not inventory:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Inventory record not found for this item",
-                )
 
-            # Check stock
-            if inventory.quantity < request.quantity:
-                raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT,
-                    detail="Insufficient stock",
-                )
+    remaining: dict = {}
+    for item_id in sorted(needed):
+        remaining[item_id] = db.execute(
+            _guarded_decrement(item_id, needed[item_id])
+        ).scalar_one()
 
-            # Attempt update with version check
-            current_version = inventory.version
-            update_result = (
-                db.query(Inventory)
-                .filter(
-                    Inventory.item_id == request.item_id,
-                    Inventory.version == current_version,
-                )
-                .update(
-                    {
-                        "quantity": Inventory.quantity - request.quantity,
-                        "version": Inventory.version + 1,
-                    },
-                    synchronize_session=False,
-                )
-            )
+    results = []
+    new_txns = []
+    for line in lines:
+        existing_txn = existing.get((line.order_id, line.item_id))
+        if existing_txn is not None:
+            results.append(_line_result(line, _already_deducted(existing_txn.id)))
+            continue
+        txn_id = uuid.uuid4()
+        new_txns.append({
+            "id": txn_id,
+            "order_id": line.order_id,
+            "item_id": line.item_id,
+            "quantity_deducted": line.quantity,
+        })
+        results.append(_line_result(line, _deducted(txn_id, remaining[line.item_id])))
+    if new_txns:
+        db.execute(insert(StockTransaction), new_txns)
 
-            if update_result == 0:
-                # Version mismatch (concurrent update) -> Retry
-                db.rollback()
-                continue
+    return {"status": "success", "results": results}
 
-            # Insert transaction record
-            new_txn = StockTransaction(
-                order_id=request.order_id,
-                item_id=request.item_id,
-                quantity_deducted=request.quantity,
-            )
-            db.add(new_txn)
 
-            # Commit transaction
-            db.commit()
-            db.refresh(new_txn)
-            
-            # Since we used synchronize_session=False, we need to refresh inventory or calc remaining
-            # But simpler to just return the calculated remaining if needed, or query again.
-            # We know what we subtracted.
-            remaining_stock = inventory.quantity - request.quantity
-            
-            return {
-                "status": "success",
-                "message": "Stock deducted successfully",
-                "transaction_id": str(new_txn.id),
-                "remaining_stock": remaining_stock,
-            }
+def _deduct_each(db: Session, lines: List[StockDeductRequest]) -> dict:
+    """Deduct independent lines one by one; each carries its own status code."""
+    results = []
+    for line in lines:
+        try:
+            outcome = {"status_code": status.HTTP_200_OK, **deduct_stock(db, line)}
+        except HTTPException as exc:
+            outcome = {"status_code": exc.status_code, "detail": exc.detail}
+        results.append(_line_result(line, outcome))
+    return {"status": "success", "results": results}
+
+
+def deduct_stock_batch(db: Session, request: StockDeductBatchRequest) -> dict:
+    """
+    Deduct every line of a cart in ONE transaction, all-or-nothing.
+
+    Lines already recorded in StockTransaction are reported as
+    "Stock already deducted" and not charged again; if any remaining line
+    cannot be satisfied, nothing is deducted and the whole batch fails with
+    that line's 404 / 409.
+
+    With ``atomic=False`` the lines are unrelated orders: each is deducted
+    exactly as ``/stock/deduct`` would, and the response carries one result
+    per line with its own ``status_code`` (and ``detail`` on failure).
+    """
+    if not request.atomic:
+        return _deduct_each(db, request.lines)
 
+    for attempt in range(2):
+        try:
+            result = _apply_batch(db, request.lines)
+            db.commit()
+            return result
         except IntegrityError:
-            # Catch race condition on StockTransaction unique constraint
+            # A concurrent single deduction recorded one of our lines after we
+            # looked; roll back and re-run so it is reported as already deducted.
             db.rollback()
-            existing_txn_race = (
-                db.query(StockTransaction)
-                .filter(
-                    StockTransaction.order_id == request.order_id,
-                    StockTransaction.item_id == request.item_id,
+            if attempt:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Concurrent updates detected. Please retry.",
                 )
-                .first()
-            )
-            if existing_txn_race:
-                return {
-                    "status": "success",
-                    "message": "Stock already deducted",
-                    "transaction_id": str(existing_txn_race.id),
-                }
-            # If IntegrityError was something else (unlikely), re-raise
-            raise
-
         except HTTPException:
+            db.rollback()
             raise
         except Exception as e:
             db.rollback()
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
-    # If loop exhausts retries
-    raise HTTPException(
-        status_code=status.HTTP_409_CONFLICT,
-        detail="Concurrent updates detected. Please retry.",
-    )
+
+def stock_levels(db: Session) -> dict:
+    """Current quantity of every item with an inventory record, in one query."""
+    rows = db.execute(select(Inventory.item_id, Inventory.quantity)).all()
+    return {"levels": {str(item_id): quantity for item_id, quantity in rows}}
 
 
 def get_transaction_by_order(db: Session, order_id: UUID) -> List[StockTransaction]:
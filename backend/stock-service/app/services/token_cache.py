@@ -0,0 +1,68 @@
+"""
+Bounded LRU cache of verified JWTs.
+
+Entries are keyed by a SHA-256 digest of the raw token (the token itself is
+never stored) and are valid only until the token's own ``exp``, so a cache
+hit is never accepted after ``jwt.decode`` would have rejected the token.
+Only tokens that passed full verification are stored.
+
+This module is identical in order-gateway, stock-service and
+notification-service, so all three use the same eviction policy.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class VerifiedTokenCache:
+    def __init__(self, max_entries: int = 10_000):
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        # digest → (payload, exp)
+        self._entries: OrderedDict[bytes, tuple[dict[str, Any], float]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[dict[str, Any]]:
+        """Return a copy of the cached payload for *token*, or ``None``."""
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() < entry[1]:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return dict(entry[0])
+            if entry is not None:
+                del self._entries[key]
+            self._misses += 1
+            return None
+
+    def put(self, token: str, payload: dict[str, Any]) -> None:
+        """Remember a verified *payload*; tokens without a numeric ``exp`` are not cached."""
+        exp = payload.get("exp")
+        if self._max_entries <= 0 or not isinstance(exp, (int, float)) or exp <= time.time():
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (dict(payload), float(exp))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "jwt_cache_hits": self._hits,
+                "jwt_cache_misses": self._misses,
+                "jwt_cache_size": len(self._entries),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
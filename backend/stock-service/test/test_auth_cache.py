@@ -0,0 +1,47 @@
+"""Verified-JWT cache in front of require_auth."""
+import time
+from unittest.mock import patch
+
+import jwt
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.core.config import JWT_ALGORITHM, JWT_SECRET
+from app.services import auth
+from app.services.token_cache import VerifiedTokenCache
+
+
+def _bearer(payload):
+    token = jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    return HTTPAuthorizationCredentials(scheme="bearer", credentials=token)
+
+
+@pytest.fixture()
+def cache():
+    fresh = VerifiedTokenCache(max_entries=16)
+    with patch.object(auth, "verified_tokens", fresh):
+        yield fresh
+
+
+def test_repeat_token_is_verified_once(cache):
+    creds = _bearer({"student_id": "stu-1", "exp": int(time.time()) + 600})
+    with patch("app.services.auth.jwt.decode", wraps=jwt.decode) as decode:
+        assert auth.require_auth(creds)["student_id"] == "stu-1"
+        assert auth.require_auth(creds)["student_id"] == "stu-1"
+    assert decode.call_count == 1
+    assert cache.stats() == {"jwt_cache_hits": 1, "jwt_cache_misses": 1, "jwt_cache_size": 1}
+
+
+def test_invalid_token_is_not_cached(cache):
+    creds = _bearer({"exp": int(time.time()) + 600})    # no student_id
+    with pytest.raises(HTTPException):
+        auth.require_auth(creds)
+    assert cache.stats()["jwt_cache_size"] == 0
+
+
+def test_metrics_report_cache_counters(client, cache):
+    auth.require_auth(_bearer({"student_id": "stu-1", "exp": int(time.time()) + 600}))
+    body = client.get("/metrics").text
+    assert "jwt_cache_misses 1" in body
+    assert "jwt_cache_size 1" in body
@@ -0,0 +1,139 @@
+"""Asynchronous stock reservation tests — the ``order.received`` consumer."""
+import asyncio
+import json
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.models.inventory import Item, Inventory
+from app.models.transaction import StockTransaction
+from app.services import reservations
+
+
+@pytest.fixture(autouse=True)
+def _test_sessions(setup_db):
+    with patch.object(reservations, "SessionLocal", setup_db):
+        yield
+
+
+def _seed(db_session, name, quantity):
+    item = Item(name=name, price=1.0)
+    db_session.add(item)
+    db_session.commit()
+    db_session.add(Inventory(item_id=item.id, quantity=quantity))
+    db_session.commit()
+    return str(item.id)
+
+
+def _quantity(db_session, item_id):
+    db_session.expire_all()
+    return db_session.query(Inventory).filter(Inventory.item_id == uuid.UUID(item_id)).one().quantity
+
+
+def _event(**fields):
+    return {"order_id": str(uuid.uuid4()), "student_id": "stu-001", **fields}
+
+
+def _message(event):
+    message = MagicMock()
+    message.body = json.dumps(event).encode()
+    message.ack = AsyncMock()
+    message.nack = AsyncMock()
+    return message
+
+
+def test_single_item_is_verified_with_remaining_stock(db_session):
+    burger = _seed(db_session, "Burger", 10)
+    event = _event(item_id=burger, quantity=3)
+
+    result = reservations.reserve(event)
+
+    assert result == {
+        "order_id": event["order_id"],
+        "student_id": "stu-001",
+        "status": "STOCK_VERIFIED",
+        "stock_levels": {burger: 7},
+    }
+    assert _quantity(db_session, burger) == 7
+
+
+def test_redelivered_order_is_not_charged_twice(db_session):
+    burger = _seed(db_session, "Burger", 10)
+    event = _event(item_id=burger, quantity=3)
+
+    assert reservations.reserve(event)["status"] == "STOCK_VERIFIED"
+    assert reservations.reserve(event)["status"] == "STOCK_VERIFIED"
+
+    assert _quantity(db_session, burger) == 7
+    assert db_session.query(StockTransaction).count() == 1
+
+
+def test_cart_rejection_names_the_sold_out_item(db_session):
+    burger = _seed(db_session, "Burger", 10)
+    soda = _seed(db_session, "Soda", 1)
+    event = _event(items=[
+        {"item_id": burger, "quantity": 2},
+        {"item_id": soda, "quantity": 2},
+    ])
+
+    result = reservations.reserve(event)
+
+    assert result["status"] == "REJECTED"
+    assert result["reason"] == "Insufficient stock"
+    assert result["stock_levels"] == {soda: 0}
+    assert _quantity(db_session, burger) == 10
+
+
+def test_invalid_order_is_rejected():
+    result = reservations.reserve({"order_id": "not-a-uuid", "item_id": "x", "quantity": 1})
+
+    assert result["status"] == "REJECTED"
+    assert result["reason"] == "Invalid order"
+
+
+def test_unknown_item_is_rejected():
+    result = reservations.reserve(_event(item_id=str(uuid.uuid4()), quantity=1))
+
+    assert result["status"] == "REJECTED"
+    assert result["reason"] == "Item not found"
+
+
+@patch("app.services.reservations._publish", new_callable=AsyncMock)
+def test_verified_order_is_handed_to_the_kitchen(mock_publish, db_session):
+    burger = _seed(db_session, "Burger", 10)
+    event = _event(item_id=burger, quantity=1)
+    message = _message(event)
+
+    asyncio.run(reservations._on_message(message))
+
+    placed, status = mock_publish.await_args_list
+    assert placed.args == ("order_events", "order.placed", {**event, "stock_verified": True})
+    assert status.args[:2] == ("kitchen_events", "order.status")
+    assert status.args[2]["status"] == "STOCK_VERIFIED"
+    message.ack.assert_awaited_once()
+
+
+@patch("app.services.reservations._publish", new_callable=AsyncMock)
+def test_rejected_order_only_publishes_its_status(mock_publish, db_session):
+    soda = _seed(db_session, "Soda", 0)
+    message = _message(_event(item_id=soda, quantity=1))
+
+    asyncio.run(reservations._on_message(message))
+
+    mock_publish.assert_awaited_once()
+    assert mock_publish.await_args.args[2]["status"] == "REJECTED"
+    message.ack.assert_awaited_once()
+
+
+@patch.object(reservations, "_RETRY_DELAY_SECONDS", 0)
+@patch("app.services.reservations._publish", new_callable=AsyncMock)
+@patch("app.services.reservations.reserve", side_effect=RuntimeError("database is down"))
+def test_server_error_requeues_the_message(mock_reserve, mock_publish):
+    message = _message(_event(item_id=str(uuid.uuid4()), quantity=1))
+
+    asyncio.run(reservations._on_message(message))
+
+    mock_publish.assert_not_awaited()
+    message.nack.assert_awaited_once_with(requeue=True)
+    message.ack.assert_not_awaited()
@@ -0,0 +1,108 @@
+"""Batched multi-item deduction tests — POST /stock/deduct/batch."""
+import uuid
+
+from app.models.inventory import Item, Inventory
+from app.models.transaction import StockTransaction
+
+
+def _seed(db_session, name, quantity):
+    item = Item(name=name, price=1.0)
+    db_session.add(item)
+    db_session.commit()
+    db_session.add(Inventory(item_id=item.id, quantity=quantity))
+    db_session.commit()
+    return str(item.id)
+
+
+def _quantity(db_session, item_id):
+    db_session.expire_all()
+    return db_session.query(Inventory).filter(Inventory.item_id == uuid.UUID(item_id)).one().quantity
+
+
+def test_batch_deducts_all_lines_and_reports_per_line(client, db_session):
+    burger = _seed(db_session, "Burger", 10)
+    fries = _seed(db_session, "Fries", 5)
+    order_id = str(uuid.uuid4())
+    lines = [
+        {"order_id": order_id, "item_id": burger, "quantity": 2},
+        {"order_id": order_id, "item_id": fries, "quantity": 3},
+    ]
+
+    resp = client.post("/stock/deduct/batch", json={"lines": lines})
+    assert resp.status_code == 200, resp.text
+    results = resp.json()["results"]
+    assert [r["item_id"] for r in results] == [burger, fries]
+    assert [r["remaining_stock"] for r in results] == [8, 2]
+    assert all(r["message"] == "Stock deducted successfully" for r in results)
+
+    # Replaying the same batch is idempotent.
+    resp = client.post("/stock/deduct/batch", json={"lines": lines})
+    assert resp.status_code == 200
+    assert all(r["message"] == "Stock already deducted" for r in resp.json()["results"])
+    assert _quantity(db_session, burger) == 8
+    assert _quantity(db_session, fries) == 2
+
+
+def test_batch_is_all_or_nothing(client, db_session):
+    burger = _seed(db_session, "Burger", 10)
+    soda = _seed(db_session, "Soda", 1)
+    order_id = str(uuid.uuid4())
+
+    resp = client.post("/stock/deduct/batch", json={"lines": [
+        {"order_id": order_id, "item_id": burger, "quantity": 2},
+        {"order_id": order_id, "item_id": soda, "quantity": 2},
+    ]})
+    assert resp.status_code == 409
+    detail = resp.json()["detail"]
+    assert detail["item_id"] == soda
+    assert detail["message"] == "Insufficient stock"
+
+    assert _quantity(db_session, burger) == 10
+    assert _quantity(db_session, soda) == 1
+    assert db_session.query(StockTransaction).count() == 0
+
+
+def test_batch_sums_quantities_for_the_same_item(client, db_session):
+    burger = _seed(db_session, "Burger", 3)
+
+    resp = client.post("/stock/deduct/batch", json={"lines": [
+        {"order_id": str(uuid.uuid4()), "item_id": burger, "quantity": 2},
+        {"order_id": str(uuid.uuid4()), "item_id": burger, "quantity": 2},
+    ]})
+    assert resp.status_code == 409
+    assert _quantity(db_session, burger) == 3
+
+
+def test_batch_unknown_item_returns_404(client, db_session):
+    resp = client.post("/stock/deduct/batch", json={"lines": [
+        {"order_id": str(uuid.uuid4()), "item_id": str(uuid.uuid4()), "quantity": 1},
+    ]})
+    assert resp.status_code == 404
+    assert resp.json()["detail"]["message"] == "Item not found"
+
+
+def test_batch_rejects_duplicate_and_empty_lines(client, db_session):
+    line = {"order_id": str(uuid.uuid4()), "item_id": str(uuid.uuid4()), "quantity": 1}
+    assert client.post("/stock/deduct/batch", json={"lines": [line, line]}).status_code == 422
+    assert client.post("/stock/deduct/batch", json={"lines": []}).status_code == 422
+
+
+def test_non_atomic_batch_resolves_each_line_independently(client, db_session):
+    burger = _seed(db_session, "Burger", 3)
+    first, second, third = (str(uuid.uuid4()) for _ in range(3))
+
+    resp = client.post("/stock/deduct/batch", json={"atomic": False, "lines": [
+        {"order_id": first, "item_id": burger, "quantity": 2},
+        {"order_id": second, "item_id": burger, "quantity": 2},
+        {"order_id": third, "item_id": burger, "quantity": 1},
+        {"order_id": first, "item_id": burger, "quantity": 2},
+        {"order_id": third, "item_id": str(uuid.uuid4()), "quantity": 1},
+    ]})
+    assert resp.status_code == 200, resp.text
+    results = resp.json()["results"]
+    assert [r["status_code"] for r in results] == [200, 409, 200, 200, 404]
+    assert results[0]["remaining_stock"] == 1
+    assert results[1]["detail"] == "Insufficient stock"
+    assert results[2]["remaining_stock"] == 0
+    assert results[3]["message"] == "Stock already deducted"
+    assert _quantity(db_session, burger) == 0
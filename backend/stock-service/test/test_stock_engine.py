@@ -0,0 +1,65 @@
+"""Guarded-decrement deduction engine tests — SQLite fallback path + PG statement shape."""
+import uuid
+
+from sqlalchemy.dialects import postgresql
+
+from app.models.inventory import Item, Inventory
+from app.models.transaction import StockTransaction
+from app.schemas.stock import StockDeductRequest
+from app.services.stock import _build_deduct_statement
+
+
+def _seed(db_session, quantity=5, with_inventory=True):
+    item = Item(name="Burger", price=5.99)
+    db_session.add(item)
+    db_session.commit()
+    if with_inventory:
+        db_session.add(Inventory(item_id=item.id, quantity=quantity))
+        db_session.commit()
+    return str(item.id)
+
+
+def test_guarded_decrement_returns_remaining_and_never_goes_negative(client, db_session):
+    item_id = _seed(db_session, quantity=5)
+
+    remaining = []
+    for _ in range(5):
+        resp = client.post("/stock/deduct", json={
+            "order_id": str(uuid.uuid4()), "item_id": item_id, "quantity": 1,
+        })
+        assert resp.status_code == 200
+        remaining.append(resp.json()["remaining_stock"])
+    assert remaining == [4, 3, 2, 1, 0]
+
+    resp = client.post("/stock/deduct", json={
+        "order_id": str(uuid.uuid4()), "item_id": item_id, "quantity": 1,
+    })
+    assert resp.status_code == 409
+    assert resp.json()["detail"] == "Insufficient stock"
+
+    inventory = db_session.query(Inventory).filter(Inventory.item_id == uuid.UUID(item_id)).one()
+    assert inventory.quantity == 0
+    assert inventory.version == 6
+    assert db_session.query(StockTransaction).count() == 5
+
+
+def test_item_without_inventory_returns_404(client, db_session):
+    item_id = _seed(db_session, with_inventory=False)
+
+    resp = client.post("/stock/deduct", json={
+        "order_id": str(uuid.uuid4()), "item_id": item_id, "quantity": 1,
+    })
+    assert resp.status_code == 404
+    assert resp.json()["detail"] == "Inventory record not found for this item"
+
+
+def test_postgres_statement_is_a_single_cte_round_trip():
+    request = StockDeductRequest(order_id=uuid.uuid4(), item_id=uuid.uuid4(), quantity=2)
+    sql = str(_build_deduct_statement(request).compile(dialect=postgresql.dialect()))
+
+    assert sql.startswith("WITH existing AS")
+    assert "decremented AS" in sql and "ledger AS" in sql
+    assert "UPDATE inventory SET quantity=(inventory.quantity -" in sql
+    assert "inventory.quantity >=" in sql
+    assert "INSERT INTO stock_transactions" in sql
+    assert sql.count("RETURNING") == 2
@@ -0,0 +1,133 @@
+"""Stock lease tests — POST /stock/leases and /stock/leases/{id}/reconcile."""
+import uuid
+from datetime import datetime, timedelta
+
+from app.models.inventory import Item, Inventory
+from app.models.lease import StockLease
+from app.models.transaction import StockTransaction
+from app.services.lease import expire_stale_leases
+
+
+def _seed(db_session, name, quantity):
+    item = Item(name=name, price=1.0)
+    db_session.add(item)
+    db_session.commit()
+    db_session.add(Inventory(item_id=item.id, quantity=quantity))
+    db_session.commit()
+    return str(item.id)
+
+
+def _quantity(db_session, item_id):
+    db_session.expire_all()
+    return db_session.query(Inventory).filter(Inventory.item_id == uuid.UUID(item_id)).one().quantity
+
+
+def _grant(client, item_id, quantity=20):
+    return client.post(
+        "/stock/leases",
+        json={"item_id": item_id, "holder": "gw-1", "quantity": quantity, "ttl_seconds": 30},
+    )
+
+
+def test_grant_moves_stock_out_of_inventory(client, db_session):
+    burger = _seed(db_session, "Burger", 50)
+
+    resp = _grant(client, burger)
+    assert resp.status_code == 201, resp.text
+    body = resp.json()
+    assert body["granted"] == 20
+    assert body["remaining_stock"] == 30
+    assert body["status"] == "ACTIVE"
+    assert _quantity(db_session, burger) == 30
+
+
+def test_grant_is_capped_by_available_stock(client, db_session):
+    burger = _seed(db_session, "Burger", 7)
+
+    assert _grant(client, burger).json()["granted"] == 7
+    resp = _grant(client, burger)
+    assert resp.status_code == 409
+    assert resp.json()["detail"] == "Insufficient stock"
+
+
+def test_grant_unknown_item_returns_404(client):
+    assert _grant(client, str(uuid.uuid4())).status_code == 404
+
+
+def test_reconcile_records_orders_and_release_returns_the_rest(client, db_session):
+    burger = _seed(db_session, "Burger", 50)
+    lease_id = _grant(client, burger).json()["lease_id"]
+    orders = [str(uuid.uuid4()) for _ in range(3)]
+    lines = [{"order_id": o, "quantity": 2} for o in orders]
+
+    resp = client.post(f"/stock/leases/{lease_id}/reconcile", json={"lines": lines})
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["consumed"] == 6
+    assert db_session.query(StockTransaction).count() == 3
+
+    # A retried reconciliation is not charged twice; release returns 20 - 6.
+    resp = client.post(f"/stock/leases/{lease_id}/reconcile", json={"lines": lines, "release": True})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["recorded"] == 0
+    assert body["returned"] == 14
+    assert body["status"] == "RELEASED"
+    assert db_session.query(StockTransaction).count() == 3
+    assert _quantity(db_session, burger) == 44
+
+
+def test_reconcile_charges_over_consumption_to_inventory(client, db_session):
+    burger = _seed(db_session, "Burger", 50)
+    lease_id = _grant(client, burger, quantity=2).json()["lease_id"]
+
+    resp = client.post(f"/stock/leases/{lease_id}/reconcile", json={
+        "lines": [{"order_id": str(uuid.uuid4()), "quantity": 3}],
+    })
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["recorded"] == 1
+    assert resp.json()["rejected"] == []
+    assert _quantity(db_session, burger) == 45
+
+
+def test_reconcile_records_valid_lines_and_lists_rejected_ones(client, db_session):
+    burger = _seed(db_session, "Burger", 3)
+    lease_id = _grant(client, burger, quantity=2).json()["lease_id"]
+    fits, too_big = str(uuid.uuid4()), str(uuid.uuid4())
+
+    resp = client.post(f"/stock/leases/{lease_id}/reconcile", json={
+        "lines": [{"order_id": fits, "quantity": 2}, {"order_id": too_big, "quantity": 5}],
+    })
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    assert body["recorded"] == 1
+    assert body["rejected"] == [too_big]
+    assert [str(t.order_id) for t in db_session.query(StockTransaction)] == [fits]
+    assert _quantity(db_session, burger) == 1
+
+
+def test_reconcile_unknown_lease_returns_404(client):
+    resp = client.post(f"/stock/leases/{uuid.uuid4()}/reconcile", json={"lines": []})
+    assert resp.status_code == 404
+
+
+def test_stale_leases_expire_back_into_inventory(client, db_session):
+    burger = _seed(db_session, "Burger", 50)
+    lease_id = _grant(client, burger).json()["lease_id"]
+    client.post(f"/stock/leases/{lease_id}/reconcile", json={
+        "lines": [{"order_id": str(uuid.uuid4()), "quantity": 5}],
+    })
+
+    lease = db_session.get(StockLease, uuid.UUID(lease_id))
+    lease.expires_at = datetime.utcnow() - timedelta(minutes=5)
+    db_session.commit()
+
+    assert expire_stale_leases(db_session) == 1
+    assert _quantity(db_session, burger) == 45
+
+    # Consumption reported late is charged to inventory directly.
+    resp = client.post(f"/stock/leases/{lease_id}/reconcile", json={
+        "lines": [{"order_id": str(uuid.uuid4()), "quantity": 1}],
+    })
+    assert resp.status_code == 200
+    assert resp.json()["status"] == "EXPIRED"
+    assert _quantity(db_session, burger) == 44
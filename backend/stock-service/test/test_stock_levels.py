@@ -0,0 +1,33 @@
+"""Bulk stock level tests — GET /stock/levels."""
+from app.core.config import INTERNAL_API_KEY
+from app.main import app
+from app.models.inventory import Item, Inventory
+from app.routers.stock import _require_internal_key
+
+
+def _seed(db_session, name, quantity):
+    item = Item(name=name, price=1.0)
+    db_session.add(item)
+    db_session.commit()
+    db_session.add(Inventory(item_id=item.id, quantity=quantity))
+    db_session.commit()
+    return str(item.id)
+
+
+def test_levels_lists_every_item(client, db_session):
+    burger = _seed(db_session, "Burger", 10)
+    soda = _seed(db_session, "Soda", 0)
+
+    resp = client.get("/stock/levels")
+    assert resp.status_code == 200, resp.text
+    assert resp.json() == {"levels": {burger: 10, soda: 0}}
+
+
+def test_levels_requires_the_internal_key(client):
+    app.dependency_overrides.pop(_require_internal_key)
+
+    assert client.get("/stock/levels").status_code == 401
+    assert client.get("/stock/levels", headers={"X-Internal-Key": "wrong"}).status_code == 401
+    resp = client.get("/stock/levels", headers={"X-Internal-Key": INTERNAL_API_KEY})
+    assert resp.status_code == 200
+    assert resp.json() == {"levels": {}}
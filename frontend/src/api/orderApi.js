@@ -1,33 +1,67 @@
 import axiosClient from './axiosClient';
 
-export const placeOrder = async (items) => {
-  // Backend expects a single item per request in the current hackathon setup
+export const placeOrder = async (items, onQueued) => {
   const orderId = crypto.randomUUID();
-  
-  // For this MVP, let's just place the first item found. 
-  const firstItem = items[0];
-  
-  const response = await axiosClient.post('/order', { 
-    order_id: orderId,
-    item_id: String(firstItem.menu_item_id), // Backend expects string
-    quantity: firstItem.quantity
-  });
-  return response.data;
+
+  // A single line keeps the original item_id/quantity body; a multi-item cart
+  // is sent as ONE order with an `items` list.
+  const body = items.length === 1
+    ? {
+        order_id: orderId,
+        item_id: String(items[0].menu_item_id), // Backend expects string
+        quantity: items[0].quantity,
+      }
+    : {
+        order_id: orderId,
+        items: items.map((item) => ({
+          item_id: String(item.menu_item_id),
+          quantity: item.quantity,
+        })),
+      };
+
+  // During rush hour the gateway may answer 429 with a waiting-room ticket:
+  // poll its position, then resubmit the same order with the ticket.
+  let headers = {};
+  for (;;) {
+    try {
+      const response = await axiosClient.post('/order', body, { headers });
+      return response.data;
+    } catch (err) {
+      const ticket = err.response?.status === 429 ? err.response.data?.detail : null;
+      if (!ticket?.ticket) throw err;
+      await waitForTurn(ticket, onQueued);
+      headers = { 'X-Queue-Ticket': String(ticket.ticket) };
+    }
+  }
 };
 
-export const getOrder = async (orderId) => {
-  // This endpoint might not exist in backend, but let's keep it for direct access if needed
-  // or if we add it later. For now, the dashboard will primarily use getOrders (list)
-  // or rely on WebSocket for single order updates if we already have the ID.
-  // Actually, for "Track Order" with manual ID, we might need a specific endpoint.
-  // Since we added GET /orders (list), we can also filter client side if needed, 
-  // OR strictly we should add GET /order/{id} to backend if we want to track ANY order.
-  // But for "My Orders", list is fine.
-  const response = await axiosClient.get(`/orders/${orderId}`);
-  return response.data;
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+const waitForTurn = async (ticket, onQueued) => {
+  let status = ticket;
+  while (!status.admitted) {
+    onQueued?.(status);
+    await sleep(Math.min(Math.max(status.estimated_wait_seconds, 1), 5) * 1000);
+    const response = await axiosClient.get(`/queue/${ticket.ticket}`);
+    status = response.data;
+  }
+};
+
+// One order with its latest pipeline status.  Pass the ETag of a previous
+// response and `wait` (seconds, max 30) to long-poll for the next change;
+// resolves to null when the status did not change in time (304).
+export const getOrder = async (orderId, { etag, wait } = {}) => {
+  const response = await axiosClient.get(`/orders/${orderId}`, {
+    params: wait ? { wait } : {},
+    headers: etag ? { 'If-None-Match': etag } : {},
+    validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+  });
+  if (response.status === 304) return null;
+  return { ...response.data, etag: response.headers.etag };
 };
 
-export const getOrders = async () => {
-  const response = await axiosClient.get('/orders');
+// Newest first, one page at a time: pass the previous page's next_cursor.
+export const getOrders = async (cursor = null) => {
+  const response = await axiosClient.get('/orders', { params: cursor ? { cursor } : {} });
   return response.data;
 };
@@ -90,6 +90,19 @@ const ServiceMetricCard = ({ name, url }) => {
           />
         )}
 
+        {metrics?.rolling_p95_ms !== undefined && (
+          <MetricItem
+            label="30s p95 / p99"
+            value={`${metrics.rolling_p95_ms.toFixed(1)} / ${metrics.rolling_p99_ms.toFixed(1)} ms`}
+          />
+        )}
+        {metrics?.phase_stock_p95_ms !== undefined && (
+          <MetricItem
+            label="30s p95 stock / persist"
+            value={`${metrics.phase_stock_p95_ms.toFixed(1)} / ${metrics.phase_persist_p95_ms.toFixed(1)} ms`}
+          />
+        )}
+
         {/* Gateway-specific counters */}
         {metrics?.auth_failures !== undefined && (
           <MetricItem label="Auth Failures" value={metrics.auth_failures} />
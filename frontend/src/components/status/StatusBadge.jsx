@@ -19,6 +19,7 @@ const StatusBadge = ({ status }) => {
       colorClass = 'bg-green-200 text-green-800';
       break;
     case ORDER_STATUS.CANCELLED:
+    case ORDER_STATUS.REJECTED:
       colorClass = 'bg-red-200 text-red-800';
       break;
     default:
@@ -17,25 +17,28 @@ const DashboardPage = () => {
   const { status: wsStatus, isConnected } = useWebSocket(orderId);
   const [currentStatus, setCurrentStatus] = useState(null);
   const [orders, setOrders] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
   const [manualOrderId, setManualOrderId] = useState('');
 
-  // Fetch all orders on mount
-  useEffect(() => {
-    const fetchOrders = async () => {
-      setLoading(true);
-      try {
-        const data = await getOrders();
-        setOrders(data.orders || []);
-      } catch (err) {
-        console.error("Failed to fetch orders", err);
-        setError('Failed to load order history.');
-      } finally {
-        setLoading(false);
-      }
-    };
+  // Fetch one page of orders; without a cursor this (re)loads the newest page
+  const fetchOrders = async (cursor = null) => {
+    setLoading(true);
+    try {
+      const data = await getOrders(cursor);
+      const page = data.orders || [];
+      setOrders(prev => (cursor ? [...prev, ...page] : page));
+      setNextCursor(data.next_cursor || null);
+    } catch (err) {
+      console.error("Failed to fetch orders", err);
+      setError('Failed to load order history.');
+    } finally {
+      setLoading(false);
+    }
+  };
 
+  useEffect(() => {
     fetchOrders();
   }, []);
 
@@ -57,7 +60,7 @@ const DashboardPage = () => {
   // Pipeline statuses the stepper understands; gateway-only statuses
   // (CONFIRMED / RECEIVED) are normalised to PENDING as a safety fallback
   // until the first real pipeline event arrives via WebSocket.
-  const PIPELINE_STATUSES = new Set(['PENDING', 'STOCK_VERIFIED', 'IN_KITCHEN', 'READY', 'CANCELLED']);
+  const PIPELINE_STATUSES = new Set(['PENDING', 'STOCK_VERIFIED', 'IN_KITCHEN', 'READY', 'CANCELLED', 'REJECTED']);
 
   // Set initial status when orderId changes or orders are loaded
   useEffect(() => {
@@ -134,6 +137,13 @@ const DashboardPage = () => {
                 </div>
               ))
             )}
+            {nextCursor && (
+              <div className="p-4 text-center">
+                <Button className="text-sm" onClick={() => fetchOrders(nextCursor)} disabled={loading}>
+                  {loading ? 'Loading…' : 'Load older orders'}
+                </Button>
+              </div>
+            )}
           </div>
         </div>
 
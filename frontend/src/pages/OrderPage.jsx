@@ -8,6 +8,7 @@ const OrderPage = () => {
   const [selectedItems, setSelectedItems] = useState({});
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
+  const [queue, setQueue] = useState(null);
   const navigate = useNavigate();
 
   const handleQuantityChange = (itemId, quantity) => {
@@ -35,7 +36,7 @@ const OrderPage = () => {
     setError('');
 
     try {
-      const response = await placeOrder(items);
+      const response = await placeOrder(items, setQueue);
       const orderId = response.order_id || response.id; 
       navigate(`${ROUTES.DASHBOARD}?orderId=${orderId}`);
     } catch (err) {
@@ -46,6 +47,7 @@ const OrderPage = () => {
       }
     } finally {
       setLoading(false);
+      setQueue(null);
     }
   };
 
@@ -60,6 +62,12 @@ const OrderPage = () => {
       <h1 className="text-3xl font-bold mb-8 text-center">Place Your Order</h1>
       
       {error && <div className="bg-red-100 border border-red-400 text-red-700 px-4 py-3 rounded mb-4">{error}</div>}
+      {queue && (
+        <div className="bg-amber-50 border border-amber-300 text-amber-800 px-4 py-3 rounded mb-4">
+          The canteen is busy — you are #{queue.position} in the queue (about {Math.ceil(queue.estimated_wait_seconds)}s).
+          Your order will be placed automatically.
+        </div>
+      )}
 
       <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-4 mb-8">
         {MENU_ITEMS.map(item => (
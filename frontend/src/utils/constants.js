@@ -9,6 +9,7 @@ export const ORDER_STATUS = {
   IN_KITCHEN: 'IN_KITCHEN',
   READY: 'READY',
   CANCELLED: 'CANCELLED',
+  REJECTED: 'REJECTED',     // stock-service could not reserve the stock
 };
 
 export const ROUTES = {